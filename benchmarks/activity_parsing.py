@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+"""
+Microbenchmark of the /api/messages ingress: raw body -> Activity.
+
+Compares, for every recorded payload in benchmarks/payloads (Emulator and Teams activities: messages with mentions
+and cards, conversationUpdate, invoke, messageReaction):
+- msrest: json.loads (what request.json() does) followed by Activity().deserialize, the previous path;
+- fast: src.bots.activity_parser.parse_activity on the raw bytes.
+
+Before timing, it checks that both paths produce identical Activity objects (== and the same serialize() output) and
+exits with status 1 if any payload differs, so it doubles as the equivalence check of the fast parser.
+
+Usage (from the repository root):
+    python -m benchmarks.activity_parsing
+    python -m benchmarks.activity_parsing --iterations 20000 --payloads path/to/recorded/activities
+"""
+
+PAYLOADS_DIR = Path(__file__).parent / "payloads"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the msrest and fast Activity deserialization paths.")
+    parser.add_argument("--iterations", type=int, default=5000, help="Parses per payload and path")
+    parser.add_argument("--payloads", default=str(PAYLOADS_DIR), help="Directory of recorded activity JSON files")
+    return parser.parse_args()
+
+
+def msrest_path(raw: bytes):
+    from botbuilder.schema import Activity
+    return Activity().deserialize(json.loads(raw))
+
+
+def time_path(parse, raw: bytes, iterations: int) -> float:
+    """Mean seconds per parse."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parse(raw)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    args = parse_args()
+    from src.bots.activity_parser import parse_activity
+
+    payloads = sorted(Path(args.payloads).glob("*.json"))
+    if not payloads:
+        raise SystemExit(f"No payloads found in {args.payloads}")
+
+    mismatches = []
+    for path in payloads:
+        raw = path.read_bytes()
+        reference, fast = msrest_path(raw), parse_activity(raw)
+        if fast != reference or fast.serialize() != reference.serialize():
+            mismatches.append(path.name)
+    if mismatches:
+        print(f"Fast parser differs from msrest for: {', '.join(mismatches)}")
+        sys.exit(1)
+    print(f"{len(payloads)} payloads parse to identical activities\n")
+
+    print(f"{'payload':<32} {'bytes':>7} {'msrest_us':>10} {'fast_us':>9} {'speedup':>8}")
+    total_msrest = total_fast = 0.0
+    for path in payloads:
+        raw = path.read_bytes()
+        msrest_seconds = time_path(msrest_path, raw, args.iterations)
+        fast_seconds = time_path(parse_activity, raw, args.iterations)
+        total_msrest += msrest_seconds
+        total_fast += fast_seconds
+        print(f"{path.stem:<32} {len(raw):>7} {msrest_seconds * 1e6:>10.1f} {fast_seconds * 1e6:>9.1f} "
+              f"{msrest_seconds / fast_seconds:>7.1f}x")
+    print(f"{'all':<32} {'':>7} {total_msrest * 1e6:>10.1f} {total_fast * 1e6:>9.1f} "
+          f"{total_msrest / total_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from benchmarks.mock_services import MockServices
+
+"""
+Check and microbenchmark of the inbound request authentication (src/bots/bot_authentication.py).
+
+Tokens are minted locally with a throwaway RSA key whose public JWK is served by the stub OpenID metadata endpoint of
+benchmarks/mock_services.py (BOT_OPENID_METADATA_URL). The Emulator metadata URL, whose keys are loaded as well, points
+to the same stub, so the script makes no network calls. It then:
+- checks that valid tokens are accepted and that expired tokens, tokens for another app id, tokens with another
+  serviceurl and tokens signed with an unknown key are rejected, with and without a cached identity;
+- checks that withdrawing a key from the metadata clears the cached identities it signed;
+- times full validations (cache disabled) against cached ones, and reports how often the keys were downloaded.
+
+Exits with status 1 if a check fails.
+
+Usage (from the repository root):
+    python -m benchmarks.auth_validation
+    python -m benchmarks.auth_validation --iterations 5000
+"""
+
+APP_ID = "00000000-0000-4000-8000-00000000b07a"
+SERVICE_URL = "https://smba.trafficmanager.net/apac/"
+CHANNEL_ID = "msteams"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check and time the cached Bot Framework JWT validation.")
+    parser.add_argument("--iterations", type=int, default=2000, help="Authentications per timed path")
+    return parser.parse_args()
+
+
+def new_signing_key() -> tuple[str, rsa.RSAPrivateKey, dict[str, any]]:
+    key_id = uuid.uuid4().hex
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({"kid": key_id, "use": "sig", "endorsements": [CHANNEL_ID]})
+    return key_id, private_key, jwk
+
+
+def mint_token(key_id: str, private_key, audience: str = APP_ID, service_url: str = SERVICE_URL,
+               lifetime: float = 3600) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://api.botframework.com",
+        "aud": audience,
+        "serviceurl": service_url,
+        "nbf": now - 60,
+        "exp": now + int(lifetime),
+    }
+    return "Bearer " + jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": key_id})
+
+
+async def authenticate(adapter, activity, auth_header: str) -> bool:
+    try:
+        await adapter._authenticate_request(activity, auth_header)
+        return True
+    except Exception:
+        return False
+
+
+async def timed(adapter, activity, auth_header: str, iterations: int) -> float:
+    """Mean seconds per authentication."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await adapter._authenticate_request(activity, auth_header)
+    return (time.perf_counter() - started) / iterations
+
+
+async def run(args) -> list[str]:
+    from botbuilder.core import BotFrameworkAdapterSettings
+    from botbuilder.schema import Activity
+    from botframework.connector.auth import AuthenticationConstants
+    from src.config import app_config
+    from src.bots.bot_adapter import CachingBotFrameworkAdapter
+    from src.bots import bot_authentication
+    from src.bots.bot_authentication import (
+        VALIDATED_TOKEN_CACHE, initialize_bot_authentication, close_bot_authentication
+    )
+
+    mocks = MockServices()
+    base_url = await mocks.start()
+    key_id, private_key, jwk = new_signing_key()
+    mocks.signing_keys = [jwk]
+
+    app_config.MICROSOFT_APP_ID = APP_ID
+    app_config.MICROSOFT_APP_PASSWORD = "unused"
+    app_config.BOT_OPENID_METADATA_URL = f"{base_url}/openid/metadata"
+    emulator_metadata_url = AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL
+    AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL = f"{base_url}/openid/metadata?emulator"
+    await initialize_bot_authentication()
+    failures = []
+    try:
+        settings = BotFrameworkAdapterSettings(APP_ID, "unused")
+        cached_adapter = CachingBotFrameworkAdapter(settings)
+        uncached_adapter = CachingBotFrameworkAdapter(settings, cache_tokens=False)
+        activity = Activity(type="message", channel_id=CHANNEL_ID, service_url=SERVICE_URL)
+        token = mint_token(key_id, private_key)
+
+        _, unknown_private_key, _ = new_signing_key()
+        rejected_tokens = {
+            "expired": mint_token(key_id, private_key, lifetime=-600),
+            "other app id": mint_token(key_id, private_key, audience=str(uuid.uuid4())),
+            "other serviceurl": mint_token(key_id, private_key, service_url="https://attacker.example/"),
+            "unknown key": mint_token(uuid.uuid4().hex, unknown_private_key),
+        }
+        for adapter in (uncached_adapter, cached_adapter, cached_adapter):
+            if not await authenticate(adapter, activity, token):
+                failures.append("valid token rejected")
+            for name, rejected_token in rejected_tokens.items():
+                if await authenticate(adapter, activity, rejected_token):
+                    failures.append(f"{name} token accepted")
+        if len(VALIDATED_TOKEN_CACHE) != 1:
+            failures.append(f"expected 1 cached identity, found {len(VALIDATED_TOKEN_CACHE)}")
+
+        full_seconds = await timed(uncached_adapter, activity, token, args.iterations)
+        cached_seconds = await timed(cached_adapter, activity, token, args.iterations)
+
+        # Key rollover: after a refresh the new key is accepted and the withdrawn key's identities are dropped
+        new_key_id, new_private_key, new_jwk = new_signing_key()
+        mocks.signing_keys = [new_jwk]
+        await bot_authentication.OPENID_KEY_REFRESHER.metadata[app_config.BOT_OPENID_METADATA_URL].refresh()
+        if len(VALIDATED_TOKEN_CACHE):
+            failures.append("cached identities kept after their key was withdrawn")
+        if await authenticate(cached_adapter, activity, token):
+            failures.append("token of a withdrawn key accepted")
+        if not await authenticate(cached_adapter, activity, mint_token(new_key_id, new_private_key)):
+            failures.append("token of the new key rejected")
+
+        print(f"full validation   {full_seconds * 1e6:>9.1f} us")
+        print(f"cached            {cached_seconds * 1e6:>9.1f} us  ({full_seconds / cached_seconds:.0f}x)")
+        print(f"OpenID metadata and key downloads: {mocks.openid_requests}")
+    finally:
+        await close_bot_authentication()
+        AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL = emulator_metadata_url
+        await mocks.close()
+    return failures
+
+
+def main():
+    failures = asyncio.run(run(parse_args()))
+    if failures:
+        print("Failed checks:\n- " + "\n- ".join(failures))
+        sys.exit(1)
+    print("All authentication checks passed")
+
+
+if __name__ == "__main__":
+    main()
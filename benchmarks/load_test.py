@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+"""
+End-to-end load test of POST /api/messages with local stand-ins for every external dependency.
+
+The real FastAPI app (lifespan, adapter, middleware, handler, services, repositories) is driven in-process through
+httpx's ASGI transport, with:
+
+- JWT validation bypassed the way the Bot Framework does it for local runs: an empty MICROSOFT_APP_ID and no
+  Authorization header;
+- a SQLite database (seeded with one client, its domain and contacts) or a local Postgres given with --db-url
+  (schema and seed data must then already exist);
+- MemoryStorage for bot state (STATE_STORAGE=memory);
+- an aiohttp mock for the SAP reset endpoint and the Bot Connector with configurable latency (benchmarks/mock_services.py).
+
+Each virtual user first sends a conversationUpdate (which resolves and stores the user's client) and then messages
+picked from the intent mix. Throughput and p50/p95/p99 latency are reported per intent. Password reset turns only
+queue a job; the run then waits for the background jobs to deliver their results (jobs_drained_seconds in the JSON).
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --users 20 --messages 25 --sap-latency 0.2
+    python -m benchmarks.load_test --mix contact=1,key_user=2,reset_password=1 --json-out results.json
+    TURN_QUEUE_ENABLED=true python -m benchmarks.load_test --users 50   # accept-then-process mode
+"""
+
+INTENT_MESSAGES = {
+    "contact": ["who is the contact?", "kontak support dong"],
+    "key_user": ["siapa key user FI?", "who is the key user for Sales Distribution", "key user MM"],
+    "reset_password": ["please reset password", "saya lupa password"],
+    "unmatched": ["hello", "terima kasih"],
+}
+CLIENT_ID = "AMMAN"
+EMAIL_DOMAIN = "amman.co.id"
+CONTACT_STREAMS = [
+    ("FI", "General Ledger"), ("FI", "Asset Accounting"), ("SD", "Sales Distribution"),
+    ("SD", "Billing"), ("MM", "Purchasing"), ("MM", "Inventory"),
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test POST /api/messages with local stand-ins.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per user after the conversationUpdate")
+    parser.add_argument(
+        "--mix", default="contact=1,key_user=1,reset_password=1",
+        help="Intent weights, e.g. contact=1,key_user=2,reset_password=1,unmatched=1")
+    parser.add_argument("--sap-latency", type=float, default=0.2, help="Mock SAP response latency in seconds")
+    parser.add_argument("--connector-latency", type=float, default=0.01, help="Mock Bot Connector latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform random latency added to the mocks")
+    parser.add_argument("--db-url", default=None, help="Async SQLAlchemy URL of a prepared database (default: SQLite)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, for repeatable message sequences")
+    parser.add_argument("--json-out", default=None, help="Also write the results as JSON to this file")
+    return parser.parse_args()
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        intent, _, weight = item.partition("=")
+        if intent.strip() not in INTENT_MESSAGES:
+            raise SystemExit(f"Unknown intent in --mix: {intent}")
+        weights[intent.strip()] = float(weight or 1)
+    return weights
+
+
+def configure_environment(db_url: str):
+    """Environment for src.config, set before anything from src is imported."""
+    os.environ.update({
+        # No Key Vault: the secrets are set directly on app_config in run()
+        "DEV_AZURE_KEY_VAULT_URL": "",
+        "SECRET_CACHE_PATH": "",
+        "DB_URL": db_url,
+        "STATE_STORAGE": "memory",
+        "SAP_HTTP2": "false",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    })
+
+
+def install_sqlite_support(public_db_path: str):
+    """
+    Lets SQLite serve the Postgres models: the "public" schema is an attached database, tsvector columns are TEXT
+    and to_tsvector (used by the generated search columns) is a plain lowercase function.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.dialects.postgresql import TSVECTOR
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(TSVECTOR, "sqlite")
+    def compile_tsvector(element, compiler, **kw):
+        return "TEXT"
+
+    @event.listens_for(Engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        if "sqlite" not in type(dbapi_connection).__module__:
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"ATTACH DATABASE '{public_db_path}' AS public")
+        cursor.execute("PRAGMA public.journal_mode=WAL")
+        cursor.close()
+        dbapi_connection.create_function(
+            "to_tsvector", 2, lambda _, text: (text or "").lower(), deterministic=True)
+
+
+async def create_and_seed_database(db_url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from src.database.base import Base
+    # Registers every table model on Base.metadata
+    import src.models.model_relationships
+    import src.models.reset_password_job
+    from src.models.client import Client
+    from src.models.contact import Contact
+    from src.models.domain import Domain
+
+    engine = create_async_engine(db_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(Client(client_id=CLIENT_ID, client_name="Amman Mineral"))
+        session.add(Domain(domain_id=EMAIL_DOMAIN, client_id=CLIENT_ID))
+        for index, (stream, sub_stream) in enumerate(CONTACT_STREAMS):
+            session.add(Contact(
+                id=f"C{index}", client_id=CLIENT_ID, contact_id=f"{index:05d}", stream=stream, sub_stream=sub_stream,
+                contact_name=f"Key User {index}", contact_email=f"key.user{index}@{EMAIL_DOMAIN}"
+            ))
+        await session.commit()
+    await engine.dispose()
+
+
+def build_activity(activity_type: str, user_index: int, conversation_id: str, service_url: str, text: str = None):
+    user_id = f"user-{user_index}"
+    user = {"id": user_id, "name": f"User {user_index}", "properties": {"email": f"user{user_index}@{EMAIL_DOMAIN}"}}
+    activity = {
+        "type": activity_type,
+        "id": uuid.uuid4().hex,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "serviceUrl": service_url,
+        "channelId": "webchat",
+        "from": user,
+        "recipient": {"id": "saphira-bot", "name": "Saphira"},
+        "conversation": {"id": conversation_id},
+    }
+    if activity_type == "conversationUpdate":
+        activity["membersAdded"] = [{"id": user_id, "name": user["name"]}]
+    else:
+        activity["text"] = text
+    return activity
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_user(client, user_index: int, args, weights: dict[str, float], service_url: str, results):
+    rng = random.Random(args.seed + user_index)
+    conversation_id = f"conversation-{user_index}"
+    plan = [("conversation_update", build_activity("conversationUpdate", user_index, conversation_id, service_url))]
+    intents = rng.choices(list(weights), weights=list(weights.values()), k=args.messages)
+    for intent in intents:
+        text = rng.choice(INTENT_MESSAGES[intent])
+        plan.append((intent, build_activity("message", user_index, conversation_id, service_url, text)))
+
+    for intent, activity in plan:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/messages", json=activity)
+            # 202: accepted by the turn queue (TURN_QUEUE_ENABLED), processed after the response
+            ok = response.status_code in (200, 202)
+        except Exception:
+            ok = False
+        results[intent].append((time.perf_counter() - started, ok))
+
+
+def summarize(results, elapsed: float) -> dict[str, any]:
+    summary = {"elapsed_seconds": elapsed, "intents": {}}
+    total = 0
+    for intent, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        total += len(samples)
+        summary["intents"][intent] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    summary["requests"] = total
+    summary["throughput_rps"] = total / elapsed if elapsed else 0.0
+    return summary
+
+
+def print_summary(summary: dict[str, any]):
+    print(f"\n{summary['requests']} requests in {summary['elapsed_seconds']:.2f}s "
+          f"({summary['throughput_rps']:.1f} req/s)\n")
+    header = f"{'intent':<22}{'requests':>9}{'errors':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    print(header)
+    print("-" * len(header))
+    for intent, stats in summary["intents"].items():
+        print(f"{intent:<22}{stats['requests']:>9}{stats['errors']:>8}"
+              f"{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    print("\n(latencies in ms)")
+
+
+async def run(args, db_url: str):
+    import httpx
+    from benchmarks.mock_services import MockServices
+    from src.config import app_config
+
+    mock_services = MockServices(
+        sap_latency=args.sap_latency, connector_latency=args.connector_latency, jitter=args.jitter)
+    service_url = await mock_services.start()
+
+    # Secrets normally loaded from Key Vault: no app id/password disables JWT validation
+    app_config.MICROSOFT_APP_ID = ""
+    app_config.MICROSOFT_APP_PASSWORD = ""
+    app_config.AZURE_STORAGE_CONNECTION_STRING = None
+    app_config.AZURE_STORAGE_CONTAINER_NAME = None
+    app_config.AMMAN_RP_SAP_SERV = f"{service_url}/sap/reset-password"
+    app_config.AMMAN_RP_SAP_USER = "benchmark"
+    app_config.AMMAN_RP_SAP_PASS = "benchmark"
+
+    if args.db_url is None:
+        await create_and_seed_database(db_url)
+
+    from src.main import app, lifespan
+    from src.services.reset_password_job_runner import get_reset_password_job_runner
+    weights = parse_mix(args.mix)
+    results = defaultdict(list)
+    try:
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://saphira", timeout=60) as client:
+                while (await client.get("/ready")).status_code != 200:
+                    await asyncio.sleep(0.05)
+                started = time.perf_counter()
+                await asyncio.gather(*[
+                    run_user(client, user_index, args, weights, service_url, results)
+                    for user_index in range(args.users)
+                ])
+                elapsed = time.perf_counter() - started
+                # Password resets are answered by background jobs: wait until their results have been delivered
+                job_runner = get_reset_password_job_runner()
+                drain_deadline = time.perf_counter() + 60
+                while job_runner and await job_runner.count_unfinished_jobs() and time.perf_counter() < drain_deadline:
+                    await asyncio.sleep(0.05)
+                drain_elapsed = time.perf_counter() - started
+                summary = summarize(results, elapsed)
+                summary["jobs_drained_seconds"] = drain_elapsed
+                summary["mock_requests"] = {
+                    "sap": mock_services.sap_requests, "connector": mock_services.connector_requests}
+                summary["db_pool"] = (await client.get("/stats/db-pool")).json()
+    finally:
+        await mock_services.close()
+
+    summary["settings"] = {key: value for key, value in vars(args).items() if key != "json_out"}
+    print_summary(summary)
+    if args.json_out:
+        with open(args.json_out, "w") as out_file:
+            json.dump(summary, out_file, indent=2, default=str)
+
+
+def main():
+    args = parse_args()
+    db_url = args.db_url
+    if db_url is None:
+        db_dir = tempfile.mkdtemp(prefix="saphira-bench-")
+        db_url = f"sqlite+aiosqlite:///{os.path.join(db_dir, 'main.sqlite')}"
+        install_sqlite_support(os.path.join(db_dir, "public.sqlite"))
+    configure_environment(db_url)
+    # The repository root must be importable when run as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asyncio.run(run(args, db_url))
+
+
+if __name__ == "__main__":
+    main()
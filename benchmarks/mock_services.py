@@ -0,0 +1,82 @@
+import asyncio
+import random
+import uuid
+from aiohttp import web
+
+"""
+Local stand-ins for the external HTTP services the bot calls during a turn:
+
+- the SAP password reset endpoint (POST /sap/reset-password), answering a success message after a configurable latency;
+- the Bot Connector service (POST /v3/conversations/{conversation_id}/activities[/{activity_id}]),
+  which receives the bot's replies;
+- an OpenID metadata document and its signing keys (GET /openid/metadata, GET /openid/keys), serving `signing_keys`
+  (public JWKs) so locally minted tokens can be validated (benchmarks/auth_validation.py).
+
+Latency is `latency` seconds plus a uniform random `jitter`, so both are visible in the benchmark percentiles.
+"""
+
+
+class MockServices:
+    """Runs the mock SAP and Bot Connector endpoints on a local port."""
+
+    def __init__(self, sap_latency: float = 0.2, connector_latency: float = 0.01, jitter: float = 0.0):
+        self.sap_latency = sap_latency
+        self.connector_latency = connector_latency
+        self.jitter = jitter
+        self.sap_requests = 0
+        self.connector_requests = 0
+        self.openid_requests = 0
+        self.signing_keys: list[dict[str, any]] = []
+        self._runner: web.AppRunner | None = None
+        self.base_url: str | None = None
+
+        self._app = web.Application()
+        self._app.router.add_post("/sap/reset-password", self._reset_password)
+        self._app.router.add_post("/v3/conversations/{conversation_id}/activities", self._send_activity)
+        self._app.router.add_post("/v3/conversations/{conversation_id}/activities/{activity_id}", self._send_activity)
+        self._app.router.add_get("/openid/metadata", self._openid_metadata)
+        self._app.router.add_get("/openid/keys", self._openid_keys)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts the server (on a free port by default) and returns its base URL."""
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self, latency: float):
+        await asyncio.sleep(latency + random.uniform(0, self.jitter))
+
+    async def _reset_password(self, request: web.Request) -> web.Response:
+        self.sap_requests += 1
+        body = await request.json()
+        await self._delay(self.sap_latency)
+        return web.json_response({
+            "Request": {
+                "Msgty": "S",
+                "Msgcd": "0",
+                "Msgtx": f"Password reset for {body.get('Email')} initiated."
+            }
+        })
+
+    async def _send_activity(self, request: web.Request) -> web.Response:
+        self.connector_requests += 1
+        await request.read()
+        await self._delay(self.connector_latency)
+        return web.json_response({"id": uuid.uuid4().hex})
+
+    async def _openid_metadata(self, request: web.Request) -> web.Response:
+        self.openid_requests += 1
+        return web.json_response({"issuer": "https://api.botframework.com", "jwks_uri": f"{self.base_url}/openid/keys"})
+
+    async def _openid_keys(self, request: web.Request) -> web.Response:
+        self.openid_requests += 1
+        return web.json_response({"keys": self.signing_keys})
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+"""
+Statement counts of the repository calls, against a client with a large log history.
+
+The relationships of the models are lazy="raise" (src/models/model_relationships.py), so a repository call only runs
+the statements of its own query, whatever the size of the related tables. This script seeds a SQLite database with a
+client whose log tables hold --log-rows rows each, counts the SQL statements every repository call executes and exits
+with status 1 when a call runs more statements than expected, or when an unrequested relationship can be loaded.
+
+ObjectRepository.get_all_by_question relies on Postgres full-text search and is not covered here.
+
+Usage (from the repository root):
+    python -m benchmarks.query_counts
+    python -m benchmarks.query_counts --log-rows 50000
+"""
+
+CLIENT_ID = "AMMAN"
+EMAIL_DOMAIN = "amman.co.id"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Count the SQL statements of each repository call.")
+    parser.add_argument("--log-rows", type=int, default=5000, help="Rows per log table of the seeded client")
+    return parser.parse_args()
+
+
+async def seed(session, log_rows: int):
+    from src.models.client import Client
+    from src.models.contact import Contact
+    from src.models.domain import Domain
+    from src.models.faq import Faq
+    from src.models.log import Log
+    from src.models.log_faq import LogFaq
+    from src.models.log_reset_password import LogResetPassword
+    from src.models.object import Object
+    from src.models.verb import Verb
+
+    session.add(Client(client_id=CLIENT_ID, client_name="Amman Mineral"))
+    session.add(Domain(domain_id=EMAIL_DOMAIN, client_id=CLIENT_ID))
+    session.add(Verb(verb_id="V1", verb_tag="reset"))
+    for index in range(20):
+        session.add(Object(id=f"O{index}", client_id=CLIENT_ID, object_id=f"OBJ{index}", stream="FI",
+                           object_tag=f"object {index}"))
+        session.add(Faq(id=f"F{index}", client_id=CLIENT_ID, faq_id=f"{index:05d}", object_id=f"OBJ{index}",
+                        verb_id="V1", question_text=f"question {index}", answer_text=f"answer {index}"))
+        session.add(Contact(id=f"C{index}", client_id=CLIENT_ID, contact_id=f"{index:05d}", stream="FI",
+                            sub_stream=f"Sub {index % 4}", contact_name=f"Key User {index}"))
+    session.add_all([
+        row
+        for index in range(log_rows)
+        for row in (
+            Log(session_id=f"s{index}", email=f"user{index}@{EMAIL_DOMAIN}", client_id=CLIENT_ID),
+            LogFaq(session_id=f"s{index}", client_id=CLIENT_ID, faq_id=f"{index % 20:05d}",
+                   object_id=f"OBJ{index % 20}", verb_id="V1"),
+            LogResetPassword(session_id=f"s{index}", email=f"user{index}@{EMAIL_DOMAIN}", client_id=CLIENT_ID),
+        )
+    ])
+    await session.commit()
+
+
+async def run(args) -> list[str]:
+    from sqlalchemy import event
+    from sqlalchemy.exc import InvalidRequestError
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from src.database.base import Base
+    import src.models.model_relationships
+    from src.repositories.contact_repository import ContactRepository
+    from src.repositories.domain_client_repository import DomainClientRepository
+    from src.repositories.faq_repository import FaqRepository
+
+    engine = create_async_engine(os.environ["DB_URL"])
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        await seed(session, args.log_rows)
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *rest: statements.append(statement))
+
+    failures = []
+    async with AsyncSession(engine) as session:
+        domain_clients = DomainClientRepository(session)
+        contacts = ContactRepository(session)
+        faqs = FaqRepository(session)
+        calls = [
+            ("DomainClientRepository.select_domain_client_by_email",
+             lambda: domain_clients.select_domain_client_by_email(EMAIL_DOMAIN)),
+            ("DomainClientRepository.select_domain_clients_by_email_or_domain",
+             lambda: domain_clients.select_domain_clients_by_email_or_domain(f"user@{EMAIL_DOMAIN}", EMAIL_DOMAIN)),
+            ("DomainClientRepository.select_all_domain_clients", domain_clients.select_all_domain_clients),
+            ("ContactRepository.select_distinct_streams", lambda: contacts.select_distinct_streams(CLIENT_ID)),
+            ("ContactRepository.select_distinct_stream_vocabulary",
+             lambda: contacts.select_distinct_stream_vocabulary(CLIENT_ID)),
+            ("ContactRepository.select_all_by_stream_or_substream",
+             lambda: contacts.select_all_by_stream_or_substream(CLIENT_ID, "FI")),
+            ("FaqRepository.select_faq_with_object_details", lambda: faqs.select_faq_with_object_details(CLIENT_ID)),
+            ("FaqRepository.select_faq_search_documents", lambda: faqs.select_faq_search_documents(CLIENT_ID)),
+        ]
+        print(f"{'repository call':<64} {'rows':>6} {'statements':>10}")
+        results = {}
+        for name, call in calls:
+            statements.clear()
+            results[name] = await call()
+            rows = 1 if results[name] is not None and not isinstance(results[name], list) else len(results[name])
+            print(f"{name:<64} {rows:>6} {len(statements):>10}")
+            if len(statements) != 1:
+                failures.append(f"{name} ran {len(statements)} statements instead of 1")
+
+        # Requested relationships are loaded by the query itself, the others refuse to load
+        statements.clear()
+        if any(faq.object is None for faq in results["FaqRepository.select_faq_with_object_details"]) or statements:
+            failures.append("Faq.object was not loaded with the FAQs")
+        client = results["DomainClientRepository.select_domain_client_by_email"]
+        for relationship_name in ("logs", "log_faqs", "log_reset_passwords", "contacts", "faqs"):
+            try:
+                getattr(client, relationship_name)
+                failures.append(f"Client.{relationship_name} loaded without being requested")
+            except InvalidRequestError:
+                pass
+    await engine.dispose()
+    return failures
+
+
+def main():
+    args = parse_args()
+    db_dir = tempfile.mkdtemp(prefix="saphira-query-counts-")
+    # The SQLite stand-in of the load test (attached "public" schema, tsvector as TEXT)
+    from benchmarks.load_test import install_sqlite_support
+    install_sqlite_support(os.path.join(db_dir, "public.sqlite"))
+    os.environ.update({
+        "DEV_AZURE_KEY_VAULT_URL": "",
+        "DB_URL": f"sqlite+aiosqlite:///{os.path.join(db_dir, 'main.sqlite')}",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    })
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    failures = asyncio.run(run(args))
+    if failures:
+        print("Failed checks:\n- " + "\n- ".join(failures))
+        sys.exit(1)
+    print("Every repository call ran one statement")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+"""
+Import-time profile of the app entry point, i.e. what a gunicorn/uvicorn worker pays before serving its first request.
+
+Imports --module (src.main by default) in fresh interpreters with `python -X importtime` and reports, as medians over
+--runs runs (after one unmeasured run that writes the bytecode caches):
+- the wall time of the import, and of a bare interpreter start for reference;
+- the import time by top-level package (the sum of the self times of its modules);
+- the heaviest modules of this repository by cumulative time, i.e. what each src module costs including its imports.
+
+It then checks that the optional subsystems that are only needed on use are not imported by the entry point (the Azure
+identity, Key Vault and Blob SDKs, botbuilder-azure and the bands demo router) and exits with status 1 if one is.
+
+Usage (from the repository root):
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --runs 10 --top 25 --module src.bots.bot_adapter
+"""
+
+DEFERRED_MODULES = [
+    "azure.identity",
+    "azure.keyvault",
+    "azure.storage",
+    "botbuilder.azure",
+    "src.api.routes.bands",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Profile the import time of the app entry point.")
+    parser.add_argument("--module", default="src.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Measured imports, each in a fresh interpreter")
+    parser.add_argument("--top", type=int, default=15, help="Rows of the package and module tables")
+    return parser.parse_args()
+
+
+def run_import(statement: str) -> tuple[float, str]:
+    """Runs the statement in a fresh interpreter; returns its wall time and -X importtime output."""
+    env = dict(os.environ, DEV_AZURE_KEY_VAULT_URL="", LOG_LEVEL="WARNING")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise SystemExit(f"`{statement}` failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(output: str) -> dict[str, tuple[int, int]]:
+    """Module -> (self us, cumulative us) from the -X importtime lines."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    args = parse_args()
+    statement = f"import {args.module}"
+    run_import(statement)  # Bytecode caches
+
+    base_times, import_times, profiles = [], [], []
+    for _ in range(args.runs):
+        base_times.append(run_import("pass")[0])
+        elapsed, output = run_import(statement)
+        import_times.append(elapsed)
+        profiles.append(parse_importtime(output))
+
+    package_runs = defaultdict(list)
+    module_runs = defaultdict(list)
+    for profile in profiles:
+        packages = defaultdict(int)
+        for name, (self_us, cumulative_us) in profile.items():
+            packages[name.split(".")[0]] += self_us
+            if name.split(".")[0] == "src":
+                module_runs[name].append(cumulative_us)
+        for package, self_us in packages.items():
+            package_runs[package].append(self_us)
+    package_times = {package: statistics.median(times) / 1000 for package, times in package_runs.items()}
+    module_times = {module: statistics.median(times) / 1000 for module, times in module_runs.items()}
+    total_ms = sum(package_times.values())
+
+    base_ms = statistics.median(base_times) * 1000
+    wall_ms = statistics.median(import_times) * 1000
+    print(f"{statement}: {wall_ms:.0f} ms wall ({base_ms:.0f} ms bare interpreter start, "
+          f"{len(profiles[0])} modules, median of {args.runs} runs)\n")
+
+    print(f"{'package':<32} {'self_ms':>9} {'share':>7}")
+    for package, self_ms in sorted(package_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32} {self_ms:>9.1f} {self_ms / total_ms:>6.1%}")
+
+    print(f"\n{'module':<48} {'cumulative_ms':>13}")
+    for module, cumulative_ms in sorted(module_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{module:<48} {cumulative_ms:>13.1f}")
+
+    imported = [
+        module for module in DEFERRED_MODULES
+        if any(name == module or name.startswith(module + ".") for name in profiles[0])
+    ]
+    if imported:
+        print(f"\nDeferred modules imported by {args.module}: {', '.join(imported)}")
+        sys.exit(1)
+    print(f"\nNone of the deferred modules is imported ({', '.join(DEFERRED_MODULES)})")
+
+
+if __name__ == "__main__":
+    main()
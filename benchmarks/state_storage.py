@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import sys
+import time
+from botbuilder.core import MemoryStorage
+from src.bots.cached_storage import CachedStorage, DURABILITY_WRITE_BEHIND, DURABILITY_WRITE_THROUGH
+
+"""
+Check and microbenchmark of the bot state cache (src/bots/cached_storage.py) against an in-memory backing store.
+
+The backing store is a MemoryStorage with a configurable latency per call (a stand-in for Blob Storage) that records
+its write calls. The script:
+- checks the eTag rules: a stale eTag is rejected, "*" and a fresh eTag are accepted, a new key needs no eTag;
+- checks that write-through writes before returning, and that write-behind writes on the next flush, with one backing
+  write call per flush;
+- checks that a failed flush keeps its items pending, and that close() persists a write whose flush is still running
+  (the backing write is slower than the flush interval);
+- checks concurrency with the backing store: a write based on a version another worker has replaced is rejected
+  (write-through) or dropped (write-behind) instead of overwriting it, a read during a flush returns the version being
+  flushed, and a key deleted during a failing flush stays deleted;
+- times turns (read then write of the user and conversation state) directly on the backing store and through the
+  cache in both durability modes.
+
+Exits with status 1 if a check fails.
+
+Usage (from the repository root):
+    python -m benchmarks.state_storage
+    python -m benchmarks.state_storage --latency 0.02 --turns 200
+"""
+
+
+class FakeBackingStorage(MemoryStorage):
+    """MemoryStorage with latency per call, recording the keys of every write call; can be made to fail writes."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.write_calls: list[list[str]] = []
+        self.fail_writes = False
+
+    async def read(self, keys):
+        await asyncio.sleep(self.latency)
+        return await super().read(keys)
+
+    async def write(self, changes):
+        await asyncio.sleep(self.latency)
+        if self.fail_writes:
+            raise ConnectionError("backing store unavailable")
+        self.write_calls.append(sorted(changes))
+        await super().write(changes)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check and time the cached bot state storage.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per backing store call")
+    parser.add_argument("--turns", type=int, default=100, help="Timed turns per storage")
+    return parser.parse_args()
+
+
+async def check_e_tags(failures: list[str]):
+    storage = CachedStorage(FakeBackingStorage(), durability=DURABILITY_WRITE_THROUGH)
+    await storage.write({"user": {"name": "a"}})
+    first = (await storage.read(["user"]))["user"]
+    await storage.write({"user": {**first, "name": "b"}})
+    try:
+        await storage.write({"user": {**first, "name": "c"}})
+        failures.append("write with a stale eTag accepted")
+    except KeyError:
+        pass
+    current = (await storage.read(["user"]))["user"]
+    if current["name"] != "b":
+        failures.append(f"stale write changed the item: {current}")
+    await storage.write({"user": {**current, "name": "d"}})
+    await storage.write({"user": {"name": "e", "e_tag": "*"}})
+    if (await storage.read(["user"]))["user"]["name"] != "e":
+        failures.append("write with eTag '*' not applied")
+
+
+async def check_durability(failures: list[str]):
+    backing = FakeBackingStorage()
+    storage = CachedStorage(backing, durability=DURABILITY_WRITE_THROUGH)
+    await storage.write({"a": {"n": 1}, "b": {"n": 2}})
+    if backing.write_calls != [["a", "b"]]:
+        failures.append(f"write-through backing writes: {backing.write_calls}")
+
+    backing = FakeBackingStorage()
+    storage = CachedStorage(backing, durability=DURABILITY_WRITE_BEHIND, flush_interval=3600)
+    await storage.write({"a": {"n": 1}})
+    await storage.write({"b": {"n": 2}})
+    await storage.write({"a": {"n": 3, "e_tag": "*"}})
+    if backing.write_calls:
+        failures.append("write-behind wrote before the flush")
+    await storage.flush()
+    if backing.write_calls != [["a", "b"]]:
+        failures.append(f"write-behind flush backing writes: {backing.write_calls}, expected one call")
+    if (await backing.read(["a"])).get("a", {}).get("n") != 3:
+        failures.append("flush did not write the newest version")
+
+    backing.fail_writes = True
+    await storage.write({"c": {"n": 4}})
+    try:
+        await storage.flush()
+        failures.append("failed flush did not raise")
+    except ConnectionError:
+        pass
+    backing.fail_writes = False
+    await storage.flush()
+    if "c" not in await backing.read(["c"]):
+        failures.append("items of a failed flush were not kept pending")
+
+
+async def check_concurrency(failures: list[str]):
+    backing = FakeBackingStorage()
+    # MemoryStorage only versions items that were written with an eTag
+    await backing.write({"user": {"name": "a", "e_tag": "0"}})
+    for durability in (DURABILITY_WRITE_THROUGH, DURABILITY_WRITE_BEHIND):
+        storage = CachedStorage(backing, durability=durability, flush_interval=3600)
+        first = (await storage.read(["user"]))["user"]
+        # Another worker replaces the version this worker has cached
+        other = (await backing.read(["user"]))["user"]
+        await backing.write({"user": {**other, "name": f"other {durability}"}})
+        try:
+            await storage.write({"user": {**first, "name": "stale"}})
+            await storage.flush()
+        except KeyError:
+            pass
+        if (await backing.read(["user"]))["user"]["name"] != f"other {durability}":
+            failures.append(f"{durability}: a stale cached version overwrote another worker's write")
+
+    backing = FakeBackingStorage(latency=0.2)
+    storage = CachedStorage(backing, durability=DURABILITY_WRITE_BEHIND, flush_interval=3600)
+    await storage.write({"k": {"n": 1}})
+    flush = asyncio.create_task(storage.flush())
+    await asyncio.sleep(0.05)
+    if (await storage.read(["k"])).get("k", {}).get("n") != 1:
+        failures.append("a read during the flush did not return the version being flushed")
+    await flush
+
+    backing = FakeBackingStorage(latency=0.2)
+    storage = CachedStorage(backing, durability=DURABILITY_WRITE_BEHIND, flush_interval=3600)
+    await storage.write({"k": {"n": 1}})
+    backing.fail_writes = True
+    flush = asyncio.create_task(storage.flush())
+    await asyncio.sleep(0.05)
+    delete = asyncio.create_task(storage.delete(["k"]))
+    try:
+        await flush
+    except ConnectionError:
+        pass
+    backing.fail_writes = False
+    await delete
+    await storage.flush()
+    if "k" in await storage.read(["k"]) or "k" in await backing.read(["k"]):
+        failures.append("a key deleted during a failing flush was written again")
+
+
+async def check_close_during_flush(failures: list[str]):
+    backing = FakeBackingStorage(latency=0.5)
+    storage = CachedStorage(backing, durability=DURABILITY_WRITE_BEHIND, flush_interval=0.05)
+    storage.start()
+    await storage.write({"k": {"n": 1}})
+    # The background flush is now inside the slow backing write
+    await asyncio.sleep(0.1)
+    await storage.close()
+    if "k" not in await backing.read(["k"]):
+        failures.append("close() lost the write of the flush it interrupted")
+
+
+async def time_turns(storage, turns: int) -> float:
+    """Mean seconds per turn: read both states, then write both."""
+    keys = ["msteams/users/u", "msteams/conversations/c"]
+    started = time.perf_counter()
+    for index in range(turns):
+        items = await storage.read(keys)
+        await storage.write({key: {**items.get(key, {}), "turn": index} for key in keys})
+    return (time.perf_counter() - started) / turns
+
+
+async def run(args) -> list[str]:
+    failures = []
+    await check_e_tags(failures)
+    await check_durability(failures)
+    await check_concurrency(failures)
+    await check_close_during_flush(failures)
+
+    print(f"{'storage':<24} {'turn_ms':>8}")
+    print(f"{'backing only':<24} {await time_turns(FakeBackingStorage(args.latency), args.turns) * 1000:>8.2f}")
+    for durability in (DURABILITY_WRITE_THROUGH, DURABILITY_WRITE_BEHIND):
+        storage = CachedStorage(FakeBackingStorage(args.latency), durability=durability, flush_interval=0.05)
+        storage.start()
+        print(f"{durability:<24} {await time_turns(storage, args.turns) * 1000:>8.2f}")
+        await storage.close()
+    return failures
+
+
+def main():
+    failures = asyncio.run(run(parse_args()))
+    if failures:
+        print("Failed checks:\n- " + "\n- ".join(failures))
+        sys.exit(1)
+    print("All state storage checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+-- Full-text search columns as stored generated tsvectors, backed by GIN indexes.
+--
+-- object.object_token, faq.additional_token and verb.verb_token are recomputed by Postgres from their tag column
+-- on every insert/update, so they can no longer drift from the tags and never need to be written by the app.
+-- The object index also covers client_id (btree_gin), so "client_id = ? AND object_token @@ query"
+-- is answered by one bitmap index scan instead of filtering every object of the client.
+--
+-- This assumes the existing tokens were derived from the tag columns alone. Before dropping them, the migration copies
+-- every existing token to public.fts_token_backup and compares it with to_tsvector('english', tag). If any non-null
+-- token differs (curated search vocabulary that is not in the tag), it aborts and changes nothing. Move that
+-- vocabulary into the tag columns and run it again, or, once the differences are known to be disposable, run it with
+--     SET saphira.fts_accept_token_changes = 'on';
+-- in the same session; the previous tokens then remain in public.fts_token_backup.
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.fts_token_backup (
+    table_name      text NOT NULL,
+    row_id          text NOT NULL,
+    tag             text,
+    token           text,
+    backed_up_at    timestamptz NOT NULL DEFAULT now()
+);
+
+DO $$
+DECLARE
+    source record;
+    mismatches bigint;
+    total_mismatches bigint := 0;
+BEGIN
+    FOR source IN
+        SELECT * FROM (VALUES
+            ('object', 'id', 'object_tag', 'object_token'),
+            ('faq', 'id', 'additional_tag', 'additional_token'),
+            ('verb', 'verb_id', 'verb_tag', 'verb_token')
+        ) AS columns (table_name, id_column, tag_column, token_column)
+    LOOP
+        -- Already generated (migration re-run) or missing: nothing to preserve
+        CONTINUE WHEN NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = source.table_name
+              AND column_name = source.token_column AND is_generated = 'NEVER'
+        );
+        EXECUTE format(
+            'INSERT INTO public.fts_token_backup (table_name, row_id, tag, token) '
+            'SELECT %L, %I::text, %I, %I::text FROM public.%I',
+            source.table_name, source.id_column, source.tag_column, source.token_column, source.table_name);
+        EXECUTE format(
+            'SELECT count(*) FROM public.%I '
+            'WHERE %I IS NOT NULL AND %I::text <> to_tsvector(''english'', coalesce(%I, ''''))::text',
+            source.table_name, source.token_column, source.token_column, source.tag_column) INTO mismatches;
+        IF mismatches > 0 THEN
+            RAISE WARNING '% rows of public.% have a % that is not to_tsvector(%)',
+                mismatches, source.table_name, source.token_column, source.tag_column;
+        END IF;
+        total_mismatches := total_mismatches + mismatches;
+    END LOOP;
+
+    IF total_mismatches > 0 AND coalesce(current_setting('saphira.fts_accept_token_changes', true), '') <> 'on' THEN
+        RAISE EXCEPTION '% existing search tokens differ from their tags, nothing was changed', total_mismatches
+            USING HINT = 'Compare them with public.fts_token_backup; SET saphira.fts_accept_token_changes = ''on'' '
+                         'to replace them anyway.';
+    END IF;
+END
+$$;
+
+ALTER TABLE public.object DROP COLUMN IF EXISTS object_token;
+ALTER TABLE public.object
+    ADD COLUMN object_token tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(object_tag, ''))) STORED;
+
+ALTER TABLE public.faq DROP COLUMN IF EXISTS additional_token;
+ALTER TABLE public.faq
+    ADD COLUMN additional_token tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(additional_tag, ''))) STORED;
+
+ALTER TABLE public.verb DROP COLUMN IF EXISTS verb_token;
+ALTER TABLE public.verb
+    ADD COLUMN verb_token tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(verb_tag, ''))) STORED;
+
+COMMIT;
+
+CREATE INDEX IF NOT EXISTS ix_object_client_id_object_token ON public.object USING gin (client_id, object_token);
+CREATE INDEX IF NOT EXISTS ix_faq_additional_token ON public.faq USING gin (additional_token);
+CREATE INDEX IF NOT EXISTS ix_verb_verb_token ON public.verb USING gin (verb_token);
+
+ANALYZE public.object;
+ANALYZE public.faq;
+ANALYZE public.verb;
+
+-- Verify the plan of ObjectRepository.get_all_by_question (expect a Bitmap Index Scan on
+-- ix_object_client_id_object_token under the Sort/Limit, not a Seq Scan on object):
+--
+-- EXPLAIN (ANALYZE, BUFFERS)
+-- SELECT client_id, object_id, object_tag,
+--        ts_rank_cd(object_token, websearch_to_tsquery('english', 'reset or password')) AS rank
+-- FROM public.object
+-- WHERE client_id = 'AMMAN' AND object_token @@ websearch_to_tsquery('english', 'reset or password')
+-- ORDER BY rank DESC
+-- LIMIT 10;
+--
+-- On small tables the planner may still prefer a Seq Scan; run with SET enable_seqscan = off to confirm
+-- that the index is usable.
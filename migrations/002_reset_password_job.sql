@@ -0,0 +1,30 @@
+-- Durable queue of password resets, run by the background job runner (src/services/reset_password_job_runner.py).
+--
+-- Workers claim queued jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several app workers can poll the table without
+-- blocking each other or running a job twice. Jobs left "running" by a stopped worker are re-queued once they are
+-- older than RESET_PASSWORD_JOB_STALE_AFTER (or failed after RESET_PASSWORD_JOB_MAX_ATTEMPTS), unless they already
+-- called SAP (see 003_reset_password_job_sap_called_at.sql).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.reset_password_job (
+    id                      serial PRIMARY KEY,
+    status                  varchar(10) NOT NULL DEFAULT 'queued',
+    session_id              varchar(255),
+    email                   varchar(240) NOT NULL,
+    client_id               varchar(20) REFERENCES public.client (client_id),
+    conversation_reference  json NOT NULL,
+    attempts                integer NOT NULL DEFAULT 0,
+    result_code             varchar(3),
+    result_text             text,
+    error                   text,
+    created_at              timestamptz NOT NULL DEFAULT now(),
+    started_at              timestamptz,
+    finished_at             timestamptz
+);
+
+-- Small partial index: only the queued jobs, in claim order
+CREATE INDEX IF NOT EXISTS ix_reset_password_job_queued ON public.reset_password_job (id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_reset_password_job_status_started_at ON public.reset_password_job (status, started_at);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Records when a password reset job issued its SAP call (src/services/reset_password_job_runner.py).
+--
+-- The SAP reset is not idempotent: a job left running by a stopped worker is only re-queued when sap_called_at is
+-- NULL. Once the call was issued the job is marked 'unknown' and the user is asked to check before retrying.
+
+BEGIN;
+
+ALTER TABLE public.reset_password_job ADD COLUMN IF NOT EXISTS sap_called_at timestamptz;
+
+COMMIT;
@@ -1,40 +1,121 @@
+import logging
+import uuid
 from fastapi import APIRouter, Request, Depends, status, Response
-from botbuilder.core import BotFrameworkAdapter
-from botbuilder.schema import Activity
-from src.dependencies import get_bot_adapter, get_saphira_activity_handler
+from fastapi.responses import JSONResponse
+from botbuilder.core import BotFrameworkAdapter, InvokeResponse
+from botbuilder.schema import Activity, ActivityTypes, DeliveryModes
+from botframework.connector.auth import ClaimsIdentity
+from src.dependencies import get_bot_adapter, create_turn_dependencies
+from src.middleware.turn_services_middleware import request_turn_services
+from src.bots.activity_parser import parse_activity
+from src.bots.bot_adapter import BotAuthenticationError, CachingBotFrameworkAdapter
 from src.bots.saphira_activity_handler import SaphiraActivityHandler
-import traceback
+from src.bots.turn_queue import TurnQueueFull, get_turn_queue
+from src.utils.log_utils import set_correlation_id, reset_correlation_id
+from src.utils.tracing import span, start_trace
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Activity types used as span names; anything else is traced as "other" to keep the metric labels bounded
+_TRACED_ACTIVITY_TYPES = {activity_type.value for activity_type in ActivityTypes}
+
+
+async def _process_turn(
+    adapter: BotFrameworkAdapter,
+    activity: Activity,
+    activity_handler: SaphiraActivityHandler,
+    turn_services: dict[str, any],
+    auth_header: str | None = None,
+    identity: ClaimsIdentity | None = None
+) -> InvokeResponse | None:
+    """
+    Runs the adapter pipeline and the handler for one activity.
+    The activity is authenticated from auth_header, unless the identity was already established (turn queue).
+    """
+    activity_type = activity.type if activity.type in _TRACED_ACTIVITY_TYPES else "other"
+
+    async def traced_on_turn(turn_context):
+        with span("handler", activity_type):
+            await activity_handler.on_turn(turn_context)
+
+    # The turn's span covers authentication, the middleware pipeline and the handler
+    with start_trace("turn", activity_type, channel=activity.channel_id), request_turn_services(turn_services):
+        if identity is None:
+            return await adapter.process_activity(activity, auth_header, traced_on_turn)
+        return await adapter.process_activity_with_identity(activity, identity, traced_on_turn)
+
+
+async def process_queued_turn(activity: Activity, identity: ClaimsIdentity):
+    """
+    Turn queue processor: runs an accepted activity with its own services,
+    since the request that delivered it has already been answered.
+    """
+    correlation_token = set_correlation_id(activity.id or uuid.uuid4().hex)
+    try:
+        activity_handler, turn_services = create_turn_dependencies()
+        await _process_turn(get_bot_adapter(), activity, activity_handler, turn_services, identity=identity)
+    finally:
+        reset_correlation_id(correlation_token)
+
+
+def _must_answer_inline(activity: Activity) -> bool:
+    """Invoke and expectReplies activities carry their result in the HTTP response, so they are never queued."""
+    return activity.type == ActivityTypes.invoke or activity.delivery_mode == DeliveryModes.expect_replies
+
 
 @router.post("/messages")
 async def messages(
     request: Request,
-    adapter: BotFrameworkAdapter = Depends(get_bot_adapter),
-    activity_handler: SaphiraActivityHandler = Depends(
-        get_saphira_activity_handler)
+    adapter: CachingBotFrameworkAdapter = Depends(get_bot_adapter)
 ):
     """
     Main endpoint for receiving messages from the Bot Framework Service.
     Process the activity using the adapter, pass the raw activity JSON body and the entry point to bot handler's logic
+    The adapter is app-scoped; the turn's handler and services are only built when the turn runs inline, and handed to
+    the adapter's middleware via request_turn_services.
     The adapter will:
-    1. deserializes the body into a Bot Framework Activity object.
+    1. deserializes the body into a Bot Framework Activity object (done here by parse_activity).
     2. It creates a TurnContext object, populating it with the adapter, the activity, and access to the state accessors.
     3. It calls the on_turn method of the ActivityHandler, passing the TurnContext.
     4. The on_turn method then routes the activity to the saphira handler methods implemented (like on_message_activity, on_members_added_activity, etc.)
+    With the turn queue enabled (accept-then-process mode), the activity is only authenticated and queued here and the
+    request is answered 202; the turn then runs on a queue worker (see src/bots/turn_queue.py).
     """
     if request.headers.get("content-type") == "application/json":
+        correlation_token = None
         try:
-            body = await request.json()
-            body_deserialize = Activity().deserialize(body)
+            # Raw body parsed once with orjson into the Activity (see src/bots/activity_parser.py)
+            body_deserialize = parse_activity(await request.body())
+            # Every log line of this turn carries the activity id (or a generated one)
+            correlation_token = set_correlation_id(body_deserialize.id or uuid.uuid4().hex)
             auth_header = request.headers.get("Authorization")
-            await adapter.process_activity(body_deserialize, auth_header, activity_handler.on_turn)
-            print("adapter.process_activity completed.")
+
+            turn_queue = get_turn_queue()
+            if turn_queue and not _must_answer_inline(body_deserialize):
+                identity = await adapter.authenticate(body_deserialize, auth_header or "")
+                turn_queue.submit(body_deserialize, identity)
+                return Response(status_code=status.HTTP_202_ACCEPTED)
+
+            activity_handler, turn_services = create_turn_dependencies()
+            invoke_response = await _process_turn(
+                adapter, body_deserialize, activity_handler, turn_services, auth_header=auth_header)
+            logger.debug("adapter.process_activity completed.")
+            if invoke_response:
+                return JSONResponse(content=invoke_response.body, status_code=invoke_response.status)
+        except TurnQueueFull as e:
+            logger.warning("Turn queue full, asking the channel to retry: %s", e)
+            return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+        except BotAuthenticationError as e:
+            logger.warning("Unauthorized activity: %s", e)
+            return Response(status_code=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
-            print(f"Exception Details: {e}")
-            traceback.print_exc()
+            logger.exception("Exception Details: %s", e)
             return Response(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            if correlation_token is not None:
+                reset_correlation_id(correlation_token)
 
         return Response(status_code=status.HTTP_200_OK)
     else:
@@ -0,0 +1,155 @@
+import logging
+from datetime import datetime
+from typing import Callable
+import orjson
+from botbuilder.schema import Activity
+from msrest.serialization import Deserializer, Model
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Fast ingress path for the activities posted to /api/messages.
+
+Activity.deserialize goes through msrest's reflective deserializer: for every attribute of every model it copies the
+attribute description, runs the key extractors and dispatches on the type string, and it walks free-form values
+(channelData, value, attachment content, entity payloads) recursively to rebuild them. For Teams payloads most of the
+time goes into those free-form parts, which are already plain JSON.
+
+parse_activity reads the raw body with orjson and builds the Activity from converters compiled once per model from
+the same _attribute_map:
+- str/bool/int and iso-8601 fields are converted exactly like msrest does (the datetime parser is msrest's own);
+- nested models (from, conversation, recipient, membersAdded, attachments, entities, ...) use their compiled
+  converters, and their unknown keys become additional_properties like with msrest;
+- free-form "object" values are handed over as parsed, without being walked or copied. Attachment content and
+  channelData are only touched when a handler reads them.
+
+The result compares equal (==) to Activity().deserialize(json.loads(body)); benchmarks/activity_parsing.py checks it
+on the recorded payloads in benchmarks/payloads and measures both paths. A body the fast path cannot convert (an
+unexpected value type) goes through msrest instead, so errors are the ones msrest raises.
+"""
+ACTIVITY_PARSE_FALLBACKS = METRICS.counter(
+    "saphira_activity_parse_fallbacks_total", "Activities the fast parser handed to the msrest deserializer.")
+
+Converter = Callable[[any], any]
+
+_DESERIALIZER = Deserializer(Activity._infer_class_models())
+# Compiled model builders by class name, shared by the models that reference each other
+_MODEL_BUILDERS: dict[str, Converter] = {}
+
+
+def _to_str(value: any) -> str:
+    return value if type(value) is str else Deserializer.deserialize_unicode(value)
+
+
+def _to_bool(value: any) -> bool:
+    return value if type(value) is bool else _DESERIALIZER.deserialize_basic(value, "bool")
+
+
+def _to_int(value: any) -> int:
+    return value if type(value) is int else int(value)
+
+
+def _to_datetime(value: any) -> datetime:
+    return value if isinstance(value, datetime) else Deserializer.deserialize_iso(value)
+
+
+def _as_is(value: any) -> any:
+    # JSON values are already what msrest's deserialize_object rebuilds
+    return value
+
+
+_BASIC_CONVERTERS: dict[str, Converter] = {
+    "str": _to_str,
+    "bool": _to_bool,
+    "int": _to_int,
+    "iso-8601": _to_datetime,
+    "object": _as_is,
+}
+
+
+def _list_converter(item_converter: Converter) -> Converter:
+    def convert(value: any) -> list:
+        if not isinstance(value, list):
+            raise TypeError(f"Expected a list, got {type(value).__name__}")
+        return [None if item is None else item_converter(item) for item in value]
+    return convert
+
+
+def _dict_converter(item_converter: Converter) -> Converter:
+    def convert(value: any) -> dict:
+        return {key: None if item is None else item_converter(item) for key, item in value.items()}
+    return convert
+
+
+def _compile_type(data_type: str) -> Converter:
+    if data_type in _BASIC_CONVERTERS:
+        return _BASIC_CONVERTERS[data_type]
+    if data_type.startswith("["):
+        return _list_converter(_compile_type(data_type[1:-1]))
+    if data_type.startswith("{"):
+        return _dict_converter(_compile_type(data_type[1:-1]))
+    if data_type in _DESERIALIZER.dependencies:
+        return _compile_model(_DESERIALIZER.dependencies[data_type])
+    # Anything else (durations, enums, ...) is left to msrest
+    return lambda value: _DESERIALIZER.deserialize_data(value, data_type)
+
+
+def _is_plain_model(model: type[Model]) -> bool:
+    """Whether a default instance only holds its mapped attributes, all unset, so it can be built from a dict."""
+    if getattr(model, "_validation", None) or getattr(model, "_subtype_map", None):
+        return False
+    if any("." in description["key"] or not description["key"] for description in model._attribute_map.values()):
+        return False
+    instance_attributes = model().__dict__
+    return (set(instance_attributes) == set(model._attribute_map) | {"additional_properties"}
+            and all(value is None for name, value in instance_attributes.items() if name != "additional_properties"))
+
+
+def _compile_model(model: type[Model]) -> Converter:
+    name = model.__name__
+    if name in _MODEL_BUILDERS:
+        return _MODEL_BUILDERS[name]
+    if not _is_plain_model(model):
+        builder = lambda value: _DESERIALIZER.deserialize_data(value, name)
+        _MODEL_BUILDERS[name] = builder
+        return builder
+
+    fields: list[tuple[str, str, Converter]] = []
+    known_keys = frozenset(description["key"] for description in model._attribute_map.values())
+    template = dict.fromkeys(model._attribute_map)
+    new_instance = model.__new__
+
+    def build(data: dict[str, any]) -> Model:
+        attributes = template.copy()
+        for attribute, key, convert in fields:
+            value = data.get(key)
+            if value is not None:
+                attributes[attribute] = convert(value)
+        # Keys the model does not know about are kept, as msrest does
+        attributes["additional_properties"] = {
+            key: value for key, value in data.items() if key not in known_keys}
+        instance = new_instance(model)
+        instance.__dict__.update(attributes)
+        return instance
+
+    # Registered before its fields are compiled, for models that (indirectly) reference themselves
+    _MODEL_BUILDERS[name] = build
+    for attribute, description in model._attribute_map.items():
+        fields.append((attribute, description["key"], _compile_type(description["type"])))
+    return build
+
+
+_build_activity = _compile_model(Activity)
+
+
+def parse_activity(body: bytes | str) -> Activity:
+    """Builds the Activity of a raw JSON request body. Equivalent to Activity().deserialize(json.loads(body))."""
+    data = orjson.loads(body)
+    if isinstance(data, dict):
+        try:
+            return _build_activity(data)
+        except Exception as e:
+            logger.debug("Fast activity parsing failed, using msrest: %s", e)
+    ACTIVITY_PARSE_FALLBACKS.inc()
+    return Activity().deserialize(data)
@@ -0,0 +1,149 @@
+import logging
+from botbuilder.core import TurnContext, BotFrameworkAdapter, BotFrameworkAdapterSettings, AutoSaveStateMiddleware
+from botbuilder.schema import Activity, ResourceResponse
+from botframework.connector.auth import ClaimsIdentity
+from src.config import app_config
+from src.bots.bot_authentication import (
+    BOT_AUTH_REQUESTS, VALIDATED_TOKEN_CACHE, cache_validated_identity, token_cache_key
+)
+from src.bots.bot_state_management import StateAccessorMiddleware, get_conversation_state, get_user_state
+from src.middleware.authorization_middleware import AuthorizationMiddleware
+from src.middleware.turn_services_middleware import TurnServicesMiddleware
+from src.middleware.tracing_middleware import TimedMiddleware
+from src.utils.cache import CACHE_MISS
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+The BotFrameworkAdapter and its middleware pipeline are created once during the FastAPI lifespan startup and shared
+by every request, so the adapter keeps its app credentials, outbound token cache and connector clients between turns.
+Per-request dependencies reach the pipeline through TurnContext.turn_state (see TurnServicesMiddleware).
+"""
+BOT_ADAPTER: BotFrameworkAdapter = None
+
+
+class BotAuthenticationError(PermissionError):
+    """
+    An activity whose Authorization header was rejected. Raised by CachingBotFrameworkAdapter in place of the library's
+    bare PermissionError, so callers can tell it from permission failures of the turn itself.
+    """
+
+
+class TracedBotFrameworkAdapter(BotFrameworkAdapter):
+    """BotFrameworkAdapter recording a tracing span for every batch of replies sent to the Bot Connector."""
+
+    async def send_activities(self, context: TurnContext, activities: list[Activity]) -> list[ResourceResponse]:
+        with span("http", "bot_connector.send_activities", activities=len(activities)):
+            return await super().send_activities(context, activities)
+
+
+class CachingBotFrameworkAdapter(TracedBotFrameworkAdapter):
+    """
+    Adapter reusing the ClaimsIdentity of an already validated Authorization header until the token expires
+    (see src/bots/bot_authentication.py).
+    """
+
+    def __init__(self, settings: BotFrameworkAdapterSettings, cache_tokens: bool = True):
+        super().__init__(settings)
+        self._cache_tokens = cache_tokens
+
+    async def authenticate(self, activity: Activity, auth_header: str) -> ClaimsIdentity:
+        """
+        Authenticates an activity without processing it (accept-then-process mode), with the same validation and
+        token cache as process_activity. Raises BotAuthenticationError when the request is not authorized.
+        """
+        return await self._authenticate_request(activity, auth_header)
+
+    async def _authenticate_request(self, request: Activity, auth_header: str) -> ClaimsIdentity:
+        # Overrides botbuilder's hook, which process_activity calls; other callers go through authenticate()
+        if not auth_header:
+            # Anonymous path (no app id configured): nothing to validate
+            identity = await self._validate_request(request, auth_header)
+            BOT_AUTH_REQUESTS.inc(outcome="anonymous")
+            return identity
+
+        key = token_cache_key(auth_header, request.channel_id, request.service_url)
+        if self._cache_tokens:
+            identity = VALIDATED_TOKEN_CACHE.get(key)
+            if identity is not CACHE_MISS:
+                BOT_AUTH_REQUESTS.inc(outcome="cached")
+                return identity
+
+        try:
+            with span("auth", "jwt.validate"):
+                identity = await self._validate_request(request, auth_header)
+        except Exception:
+            BOT_AUTH_REQUESTS.inc(outcome="rejected")
+            raise
+        BOT_AUTH_REQUESTS.inc(outcome="validated")
+        if self._cache_tokens:
+            cache_validated_identity(key, identity)
+        return identity
+
+    async def _validate_request(self, request: Activity, auth_header: str) -> ClaimsIdentity:
+        try:
+            return await super()._authenticate_request(request, auth_header)
+        except PermissionError as e:
+            raise BotAuthenticationError(str(e)) from e
+
+
+async def initialize_bot_adapter():
+    """
+    Creates the app-scoped adapter and registers its middleware.
+    Requires the configuration and state management to be initialized.
+    """
+    global BOT_ADAPTER
+
+    conversation_state = get_conversation_state()
+    user_state = get_user_state()
+
+    adapter_settings = BotFrameworkAdapterSettings(
+        app_config.MICROSOFT_APP_ID,
+        app_config.MICROSOFT_APP_PASSWORD
+    )
+    adapter = CachingBotFrameworkAdapter(adapter_settings, cache_tokens=app_config.BOT_AUTH_TOKEN_CACHE_ENABLED)
+
+    async def on_turn_error(turn_context: TurnContext, error: Exception):
+        logger.exception("Unhandled error in bot: %s", error)
+        await turn_context.send_activity("The bot encountered an error or bug.")
+        await turn_context.send_trace_activity(
+            "OnTurnError Trace",
+            f"{error}",
+            "https://www.botframework.com/schemas/error",
+            "TurnError"
+        )
+        try:
+            await conversation_state.save_changes(turn_context, True)
+            await user_state.save_changes(turn_context, True)
+            logger.info("State saved after error.")
+        except Exception as save_error:
+            logger.error("Error saving state: %s", save_error)
+
+    adapter.on_turn_error = on_turn_error
+    # *** ADD MIDDLEWARE IN ORDER OF EXECUTION ***
+    # Each middleware is wrapped in a tracing span (see tracing_middleware.py)
+    # 1. Add State Accessors to TurnContext
+    adapter.use(TimedMiddleware(StateAccessorMiddleware()))
+    # 2. Add the request's services to TurnContext
+    adapter.use(TimedMiddleware(TurnServicesMiddleware()))
+    # 3. Authorization Middleware (Checks if user is authorized)
+    adapter.use(TimedMiddleware(AuthorizationMiddleware()))
+    # 4. Auto-save State Middleware (Saves state if not stopped by auth)
+    adapter.use(TimedMiddleware(AutoSaveStateMiddleware([conversation_state, user_state])))
+
+    BOT_ADAPTER = adapter
+    logger.info("BotFrameworkAdapter instantiated with middleware pipeline.")
+
+
+async def close_bot_adapter():
+    """Releases the app-scoped adapter."""
+    global BOT_ADAPTER
+    BOT_ADAPTER = None
+
+
+def get_bot_adapter() -> CachingBotFrameworkAdapter:
+    if BOT_ADAPTER is None:
+        raise RuntimeError(
+            "BotFrameworkAdapter not initialized. Call initialize_bot_adapter first.")
+    return BOT_ADAPTER
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+import httpx
+from jwt.algorithms import RSAAlgorithm
+from botframework.connector.auth import (
+    AuthenticationConstants, ChannelValidation, ClaimsIdentity, JwtTokenExtractor
+)
+from src.config import app_config
+from src.utils.cache import TTLCache
+from src.utils.metrics import METRICS
+from src.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+"""
+Authentication of the inbound Bot Framework requests without a per-message network and CPU cost.
+
+- Validated-token cache: the ClaimsIdentity of a validated Authorization header is cached under
+  sha256(header, channel id, service URL) until the token's exp claim, so a channel reusing its token (it does for
+  about an hour) is only validated once. Rejected tokens are never cached. See CachingBotFrameworkAdapter.
+- Signing keys: botframework-connector's OpenID metadata downloads the keys with blocking `requests` calls on the
+  event loop and parses the JWK again for every validation. AsyncOpenIdMetadata replaces it (in the extractor's
+  metadata cache) for the channel and Emulator endpoints: keys are downloaded with httpx, parsed once, refreshed in the
+  background every BOT_OPENID_KEY_REFRESH_INTERVAL seconds and, for an unknown key id (key rollover), at most every
+  BOT_OPENID_KEY_MIN_REFRESH_INTERVAL seconds. When a refresh drops a key, the token cache is cleared.
+
+BOT_OPENID_METADATA_URL points the channel validation to another OpenID metadata document, e.g. a stub server
+serving the keys of locally minted tokens (see benchmarks/auth_validation.py).
+"""
+BOT_AUTH_REQUESTS = METRICS.counter(
+    "saphira_bot_auth_requests_total",
+    "Inbound request authentications by outcome (cached, validated, rejected, anonymous).",
+    ("outcome",)
+)
+OPENID_KEY_REFRESHES = METRICS.counter(
+    "saphira_openid_key_refreshes_total", "OpenID signing key downloads by endpoint and outcome.",
+    ("endpoint", "outcome")
+)
+
+# App-scoped cache of validated tokens; every entry expires with its token
+VALIDATED_TOKEN_CACHE = TTLCache(max_size=app_config.BOT_AUTH_TOKEN_CACHE_MAX_SIZE, ttl=0)
+
+
+def token_cache_key(auth_header: str, channel_id: str | None, service_url: str | None) -> str:
+    """The endorsements and serviceurl claim are checked against the activity, so they are part of the key."""
+    return hashlib.sha256(f"{auth_header}\n{channel_id}\n{service_url}".encode()).hexdigest()
+
+
+def cache_validated_identity(key: str, identity: ClaimsIdentity):
+    """Caches a validated identity until its token expires; tokens without an exp claim are not cached."""
+    expires_at = identity.claims.get("exp") if identity.claims else None
+    if not isinstance(expires_at, (int, float)):
+        return
+    ttl = expires_at - time.time()
+    if ttl > 0:
+        VALIDATED_TOKEN_CACHE.set(key, identity, ttl=ttl)
+
+
+@dataclass
+class SigningKey:
+    """A parsed signing key, shaped like the library's metadata entries (public_key, endorsements)."""
+    public_key: Any
+    endorsements: list[str] = field(default_factory=list)
+
+
+class AsyncOpenIdMetadata:
+    """
+    Signing keys of one OpenID metadata endpoint, with the interface JwtTokenExtractor expects (`await get(kid)`).
+    """
+
+    def __init__(self, url: str, client: httpx.AsyncClient, min_refresh_interval: float = 300.0,
+                 max_age: float = 86400.0, clock=time.monotonic):
+        self.url = url
+        self._client = client
+        self._min_refresh_interval = min_refresh_interval
+        self._max_age = max_age
+        self._clock = clock
+        self._keys: dict[str, SigningKey] = {}
+        self._refreshed_at: float | None = None
+        self._refreshes = SingleFlight()
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the keys were last downloaded, None before the first download."""
+        return None if self._refreshed_at is None else self._clock() - self._refreshed_at
+
+    async def get(self, key_id: str) -> SigningKey:
+        # The background refresh keeps the keys current; this only covers a stopped refresher
+        if self._refreshed_at is None or self.age >= self._max_age:
+            await self.refresh()
+        key = self._keys.get(key_id)
+        if key is None and self.age >= self._min_refresh_interval:
+            # Possibly a key published since the last refresh
+            await self.refresh()
+            key = self._keys.get(key_id)
+        if key is None:
+            raise PermissionError(f"Unauthorized. Unknown signing key: {key_id}")
+        return key
+
+    async def refresh(self):
+        """Downloads and parses the keys; concurrent callers share one download."""
+        await self._refreshes.do(self.url, self._download)
+
+    async def _download(self):
+        try:
+            response = await self._client.get(self.url)
+            response.raise_for_status()
+            response_keys = await self._client.get(response.json()["jwks_uri"])
+            response_keys.raise_for_status()
+            keys = {}
+            for key in response_keys.json()["keys"]:
+                try:
+                    keys[key["kid"]] = SigningKey(RSAAlgorithm.from_jwk(key), key.get("endorsements", []))
+                except Exception as e:
+                    logger.warning("OpenID metadata: Skipping key %s of %s: %s", key.get("kid"), self.url, e)
+        except Exception:
+            OPENID_KEY_REFRESHES.inc(endpoint=self.url, outcome="failure")
+            raise
+
+        removed = set(self._keys) - set(keys)
+        self._keys = keys
+        self._refreshed_at = self._clock()
+        OPENID_KEY_REFRESHES.inc(endpoint=self.url, outcome="success")
+        if removed:
+            # Tokens signed with a withdrawn key must be validated again
+            VALIDATED_TOKEN_CACHE.clear()
+            logger.warning("OpenID metadata: Keys %s withdrawn from %s, validated tokens cleared", removed, self.url)
+        logger.info("OpenID metadata: %s signing keys loaded from %s", len(keys), self.url)
+
+
+class OpenIdKeyRefresher:
+    """Owns the metadata of the Bot Framework endpoints and refreshes their keys in the background."""
+
+    def __init__(self, urls: list[str], refresh_interval: float = 43200.0, min_refresh_interval: float = 300.0,
+                 timeout: float = 10.0):
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._refresh_interval = refresh_interval
+        self.metadata = {
+            url: AsyncOpenIdMetadata(url, self._client, min_refresh_interval=min_refresh_interval) for url in urls}
+        self._refresher_task: asyncio.Task | None = None
+
+    def install(self):
+        """Makes the token extractors of botframework-connector use these metadata objects."""
+        JwtTokenExtractor.metadataCache.update(self.metadata)
+
+    def start(self):
+        if self._refresher_task is None:
+            self._refresher_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._refresher_task:
+            self._refresher_task.cancel()
+            try:
+                await self._refresher_task
+            except asyncio.CancelledError:
+                pass
+            self._refresher_task = None
+        for url, metadata in self.metadata.items():
+            if JwtTokenExtractor.metadataCache.get(url) is metadata:
+                del JwtTokenExtractor.metadataCache[url]
+        await self._client.aclose()
+
+    async def _run(self):
+        while True:
+            results = await asyncio.gather(
+                *[metadata.refresh() for metadata in self.metadata.values()], return_exceptions=True)
+            for url, result in zip(self.metadata, results):
+                if isinstance(result, Exception):
+                    # The previous keys stay in use; a request with an unknown key retries the download
+                    logger.warning("OpenID metadata: Refreshing %s failed: %s", url, result)
+            await asyncio.sleep(self._refresh_interval)
+
+
+# Global refresher, created during lifespan startup when an app id is configured
+OPENID_KEY_REFRESHER: OpenIdKeyRefresher | None = None
+
+
+async def initialize_bot_authentication():
+    """Installs the asynchronous signing keys and starts their background refresh."""
+    global OPENID_KEY_REFRESHER
+    if app_config.BOT_OPENID_METADATA_URL:
+        ChannelValidation.open_id_metadata_endpoint = app_config.BOT_OPENID_METADATA_URL
+    if not app_config.MICROSOFT_APP_ID:
+        logger.info("No MICROSOFT_APP_ID: requests are not authenticated, signing keys are not loaded.")
+        return
+
+    OPENID_KEY_REFRESHER = OpenIdKeyRefresher(
+        [
+            ChannelValidation.open_id_metadata_endpoint
+            or AuthenticationConstants.TO_BOT_FROM_CHANNEL_OPENID_METADATA_URL,
+            AuthenticationConstants.TO_BOT_FROM_EMULATOR_OPENID_METADATA_URL,
+        ],
+        refresh_interval=app_config.BOT_OPENID_KEY_REFRESH_INTERVAL,
+        min_refresh_interval=app_config.BOT_OPENID_KEY_MIN_REFRESH_INTERVAL
+    )
+    OPENID_KEY_REFRESHER.install()
+    OPENID_KEY_REFRESHER.start()
+
+
+async def close_bot_authentication():
+    """Stops the key refresh and drops the validated tokens."""
+    global OPENID_KEY_REFRESHER
+    if OPENID_KEY_REFRESHER:
+        await OPENID_KEY_REFRESHER.close()
+        OPENID_KEY_REFRESHER = None
+    VALIDATED_TOKEN_CACHE.clear()
+
+
+METRICS.gauge(
+    "saphira_bot_auth_token_cache_entries", "Validated tokens in the authentication cache.",
+    lambda: len(VALIDATED_TOKEN_CACHE)
+)
+METRICS.gauge(
+    "saphira_openid_keys_age_seconds", "Age of the signing keys by OpenID metadata endpoint.",
+    lambda: {(url,): metadata.age for url, metadata in OPENID_KEY_REFRESHER.metadata.items()
+             if metadata.age is not None} if OPENID_KEY_REFRESHER else {},
+    ("endpoint",)
+)
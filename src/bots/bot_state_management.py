@@ -1,6 +1,11 @@
-from botbuilder.core import ConversationState, UserState, StatePropertyAccessor, TurnContext, MemoryStorage, Middleware
-from botbuilder.azure import BlobStorage, BlobStorageSettings
+import logging
+from botbuilder.core import (
+    ConversationState, UserState, StatePropertyAccessor, TurnContext, MemoryStorage, Middleware, Storage
+)
 from src.config import app_config
+from src.bots.cached_storage import CachedStorage
+
+logger = logging.getLogger(__name__)
 
 """
 State management in the Bot Framework is how bot remembers information about the conversation and the user across multiple turns (messages). Since each incoming message is a separate HTTP request, the bot is essentially stateless by default. State management provides a way to store and retrieve data associated with a specific conversation or user ID.
@@ -14,7 +19,8 @@ USER_DATA_PROPERTY = "userData"
 # The underlying mechanism for storing the state data.
 # Create a MemoryStorage instance (for local development) - Stores state in memory (suitable for local dev, state is lost on restart).
 # For production, replace with BlobStorage (Stores state in Azure Blob Storage (persistent)) or CosmosDbStorage (Stores state in Azure Cosmos DB (persistent))
-STORAGE: BlobStorage = None
+# In front of it, CachedStorage keeps hot state in a local LRU and flushes writes to the backing store (see cached_storage.py).
+STORAGE: Storage = None
 
 # Create ConversationState and UserState instances
 # Tracks state specific to a particular conversation (channel + user). This is used to store information relevant to the current interaction flow, like the state of a dialog.
@@ -42,38 +48,60 @@ async def initialize_state_management():
     """
     global STORAGE, CONVERSATION_STATE, USER_STATE, CONVERSATION_DATA_ACCESSOR, USER_DATA_ACCESSOR  # Use global
 
-    # Ensure config attributes are populated
-    if not all([app_config.AZURE_STORAGE_CONNECTION_STRING, app_config.AZURE_STORAGE_CONTAINER_NAME]):
-        print("CRITICAL ERROR: Blob Storage configuration not loaded. Cannot initialize state management.")
-        # Decide how to handle failure - maybe raise an error or exit
-        raise ValueError("Blob Storage configuration is missing.")
-
-    print("Initializing Blob Storage...")
-    # Create BlobStorage instance using loaded config
-    blob_settings = BlobStorageSettings(
-        container_name=app_config.AZURE_STORAGE_CONTAINER_NAME,
-        connection_string=app_config.AZURE_STORAGE_CONNECTION_STRING
-    )
-    STORAGE = BlobStorage(blob_settings)
-    print("Blob Storage initialized.")
-
-    print("Initializing state objects...")
+    if app_config.STATE_STORAGE == "memory":
+        # Local runs and benchmarks only: state lives in the process and is lost on restart
+        logger.warning("Using MemoryStorage for bot state.")
+        STORAGE = MemoryStorage()
+    else:
+        # Ensure config attributes are populated
+        if not all([app_config.AZURE_STORAGE_CONNECTION_STRING, app_config.AZURE_STORAGE_CONTAINER_NAME]):
+            logger.critical("Blob Storage configuration not loaded. Cannot initialize state management.")
+            # Decide how to handle failure - maybe raise an error or exit
+            raise ValueError("Blob Storage configuration is missing.")
+
+        logger.info("Initializing Blob Storage...")
+        # botbuilder-azure pulls in the Blob and Cosmos SDKs: imported on use, so importing the app does not load them
+        from botbuilder.azure import BlobStorage, BlobStorageSettings
+
+        # Create BlobStorage instance using loaded config
+        blob_settings = BlobStorageSettings(
+            container_name=app_config.AZURE_STORAGE_CONTAINER_NAME,
+            connection_string=app_config.AZURE_STORAGE_CONNECTION_STRING
+        )
+        STORAGE = BlobStorage(blob_settings)
+        logger.info("Blob Storage initialized.")
+
+    if app_config.STATE_CACHE_ENABLED:
+        STORAGE = CachedStorage(
+            STORAGE,
+            max_items=app_config.STATE_CACHE_MAX_ITEMS,
+            ttl=app_config.STATE_CACHE_TTL,
+            flush_interval=app_config.STATE_FLUSH_INTERVAL,
+            durability=app_config.STATE_DURABILITY
+        )
+        STORAGE.start()
+        logger.info("State cache enabled (%s).", app_config.STATE_DURABILITY)
+
+    logger.info("Initializing state objects...")
     # Create ConversationState and UserState instances
     CONVERSATION_STATE = ConversationState(STORAGE)
     USER_STATE = UserState(STORAGE)
-    print("Conversation and User State initialized.")
+    logger.info("Conversation and User State initialized.")
 
-    print("Creating state property accessors...")
+    logger.info("Creating state property accessors...")
     # Create state property accessors
     CONVERSATION_DATA_ACCESSOR = CONVERSATION_STATE.create_property(
         CONVERSATION_DATA_PROPERTY)
     USER_DATA_ACCESSOR = USER_STATE.create_property(USER_DATA_PROPERTY)
-    print("State property accessors created.")
+    logger.info("State property accessors created.")
 
 
 async def close_state_management():
-    """Placeholder for any state storage cleanup."""
-    print("Closing state management (Blob Storage has no explicit dispose).")
+    """Flushes pending state writes of the state cache. Blob Storage itself has no explicit dispose."""
+    if isinstance(STORAGE, CachedStorage):
+        logger.info("Flushing state cache...")
+        await STORAGE.close()
+    logger.info("Closing state management (Blob Storage has no explicit dispose).")
     # BlobStorage itself often doesn't have a specific dispose method
     # The underlying SDK client might need disposal if managed manually,
     # but botbuilder-azure likely handles this.
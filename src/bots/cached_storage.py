@@ -0,0 +1,332 @@
+import logging
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Dict, List
+from botbuilder.core import Storage
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Two-tier bot state storage: a bounded in-process LRU in front of a backing Storage (BlobStorage in production).
+
+Reads are served from the LRU while the entry is fresh, so a turn no longer waits on a blob download.
+Writes are validated against the cached eTag (same conflict rules as MemoryStorage) and then either
+written through to the backing store ("write_through") or queued and flushed in batches by a background
+task every flush interval ("write_behind").
+
+Concurrency with other workers: every cached or pending item remembers the backing store's eTag of the version it
+was read as (or derives from), and is written to the backing store with that eTag, so the backing store's optimistic
+concurrency still applies: a turn that worked on a version another worker has replaced fails with an eTag conflict
+(write-through) or has its write dropped and logged (write-behind, the turn has already finished). The backing
+store does not return the eTag of a write, so a written key is dropped from the LRU and read again on its next use.
+A version written on top of one that is still being flushed can only be written unconditionally.
+
+The LRU is local to the worker process and entries are served for up to the TTL, so keep the TTL short with several
+workers. Any botbuilder Storage can be used as backing store, e.g. MemoryStorage for local runs and benchmarks.
+"""
+DURABILITY_WRITE_THROUGH = "write_through"
+DURABILITY_WRITE_BEHIND = "write_behind"
+
+STATE_WRITE_CONFLICTS = METRICS.counter(
+    "saphira_state_write_conflicts_total",
+    "State writes rejected by the backing store's eTag check, by durability mode.",
+    ("durability",)
+)
+
+
+def _get_e_tag(item: object) -> str | None:
+    if isinstance(item, dict):
+        return item.get("e_tag")
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item: object, e_tag: str | None):
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    else:
+        item.e_tag = e_tag
+
+
+def _is_e_tag_conflict(error: BaseException) -> bool:
+    """MemoryStorage raises KeyError, BlobStorage an HTTP 412 (precondition failed) error."""
+    return isinstance(error, KeyError) or getattr(error, "status_code", None) == 412
+
+
+class CachedStorage(Storage):
+    """
+    Storage implementation keeping hot user/conversation state in a bounded LRU,
+    with write-through or write-behind persistence to a backing Storage.
+    """
+
+    def __init__(
+        self,
+        backing_storage: Storage,
+        max_items: int = 10000,
+        ttl: float = 30.0,
+        flush_interval: float = 1.0,
+        durability: str = DURABILITY_WRITE_THROUGH,
+        max_pending: int = 500
+    ):
+        if durability not in (DURABILITY_WRITE_THROUGH, DURABILITY_WRITE_BEHIND):
+            raise ValueError(f"Unsupported state durability mode: {durability}")
+        self._backing_storage = backing_storage
+        self._max_items = max_items
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._durability = durability
+        self._max_pending = max_pending
+
+        # key -> (expires_at, item, backing eTag); item carries the cache's own eTag
+        self._cache: OrderedDict[str, tuple[float, object, str | None]] = OrderedDict()
+        # Writes not yet flushed to the backing store (write-behind only): key -> (item, backing eTag)
+        self._pending: Dict[str, tuple[object, str | None]] = {}
+        # The batch the running flush is writing, still served to reads
+        self._in_flight: Dict[str, tuple[object, str | None]] = {}
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._closing = False
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Starts the background flush task (write-behind mode)."""
+        if self._durability == DURABILITY_WRITE_BEHIND and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stops the background flush task (letting a running flush finish) and flushes every pending write."""
+        if self._flush_task:
+            self._closing = True
+            self._flush_requested.set()
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+    # --- Storage interface ---
+
+    async def read(self, keys: List[str]) -> Dict[str, object]:
+        data = {}
+        if not keys:
+            return data
+
+        missing_keys = []
+        for key in keys:
+            entry = self._get_current(key, fresh_only=True)
+            if entry is None:
+                missing_keys.append(key)
+            else:
+                data[key] = deepcopy(entry[0])
+
+        if missing_keys:
+            backing_items = await self._backing_storage.read(missing_keys)
+            for key, item in backing_items.items():
+                current = self._get_current(key, fresh_only=True)
+                if current is not None:
+                    # Written by a turn of this worker while the backing store was read
+                    data[key] = deepcopy(current[0])
+                    continue
+                item = deepcopy(item)
+                backing_e_tag = _get_e_tag(item)
+                # The cache hands out its own eTags; the backing eTag is kept for the write to the backing store
+                _set_e_tag(item, self._new_e_tag())
+                self._set_cached(key, item, backing_e_tag)
+                data[key] = deepcopy(item)
+        return data
+
+    async def write(self, changes: Dict[str, object]):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+        if not changes:
+            return
+
+        written = {}
+        for key, change in changes.items():
+            new_item = deepcopy(change)
+            new_e_tag = _get_e_tag(new_item)
+            if new_e_tag == "":
+                raise Exception("cached_storage.write(): etag missing")
+
+            current = self._get_current(key)
+            current_e_tag = _get_e_tag(current[0]) if current is not None else None
+            if current is None and new_e_tag not in (None, "*"):
+                # The version this eTag was handed out for is no longer known (evicted): its backing eTag is lost
+                raise KeyError("Etag conflict.\nOriginal: %s\r\nCurrent: unknown" % new_e_tag)
+            if (
+                current_e_tag is not None
+                and new_e_tag is not None
+                and new_e_tag != "*"
+                and new_e_tag != current_e_tag
+            ):
+                raise KeyError(
+                    "Etag conflict.\nOriginal: %s\r\nCurrent: %s" % (new_e_tag, current_e_tag))
+
+            # Based on the current version, or unconditional ("*" or a new item)
+            backing_e_tag = current[1] if current is not None and new_e_tag is not None else None
+            written[key] = (new_item, backing_e_tag)
+
+        if self._durability == DURABILITY_WRITE_THROUGH:
+            try:
+                await self._write_backing(written)
+            except Exception as e:
+                if _is_e_tag_conflict(e):
+                    STATE_WRITE_CONFLICTS.inc(durability=self._durability)
+                    # Read the other worker's version next time
+                    for key in written:
+                        self._cache.pop(key, None)
+                raise
+            for key in written:
+                # The new backing eTag is unknown: read the key again on its next use
+                self._cache.pop(key, None)
+        else:
+            for key, (new_item, backing_e_tag) in written.items():
+                _set_e_tag(new_item, self._new_e_tag())
+                self._set_cached(key, new_item, backing_e_tag)
+                self._pending[key] = (new_item, backing_e_tag)
+            if len(self._pending) >= self._max_pending:
+                self._flush_requested.set()
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self._cache.pop(key, None)
+            self._pending.pop(key, None)
+            # Not served anymore, and not re-queued if the running flush fails
+            self._in_flight.pop(key, None)
+        # After the running flush, so that its write cannot land after the delete
+        async with self._flush_lock:
+            for key in keys:
+                self._pending.pop(key, None)
+            await self._backing_storage.delete(keys)
+
+    # --- Write-behind flushing ---
+
+    async def flush(self):
+        """
+        Writes every pending change to the backing store. Changes rejected by the backing store's eTag check are
+        dropped (another worker's version wins); changes that failed otherwise are re-queued.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._in_flight = dict(batch)
+            try:
+                try:
+                    await self._write_backing(batch)
+                    failed = {}
+                except Exception as e:
+                    logger.warning("CachedStorage: Flushing %s state items failed, retrying one by one: %r",
+                                   len(batch), e)
+                    failed = await self._write_backing_each(batch)
+                self._requeue(failed)
+            except BaseException as e:
+                # Cancellation included: the batch must not be lost with the task
+                logger.error("CachedStorage: Failed flushing %s state items: %r", len(batch), e)
+                self._requeue(batch)
+                raise
+            finally:
+                self._in_flight = {}
+
+            for key in batch:
+                if key in failed:
+                    continue
+                if key in self._pending:
+                    # Written on top of the version just flushed, whose new backing eTag is unknown
+                    item, _ = self._pending[key]
+                    self._pending[key] = (item, None)
+                    self._set_cached(key, item, None)
+                else:
+                    # The new backing eTag is unknown: read the key again on its next use
+                    self._cache.pop(key, None)
+            if failed:
+                logger.error("CachedStorage: Failed flushing %s state items, keeping them pending", len(failed))
+                raise ConnectionError(f"{len(failed)} state items could not be flushed")
+
+    async def _write_backing_each(self, batch: Dict[str, tuple[object, str | None]]) -> Dict[str, tuple]:
+        """Writes the items of a failed batch one at a time; returns those that failed for another reason than
+        an eTag conflict."""
+        failed = {}
+        for key, entry in batch.items():
+            if key not in self._in_flight:
+                continue  # Deleted meanwhile
+            try:
+                await self._write_backing({key: entry})
+            except Exception as e:
+                if not _is_e_tag_conflict(e):
+                    failed[key] = entry
+                    continue
+                STATE_WRITE_CONFLICTS.inc(durability=self._durability)
+                logger.warning("CachedStorage: State %s was changed by another worker, dropping this write", key)
+                self._in_flight.pop(key, None)
+                self._cache.pop(key, None)
+                # A version written on top of the rejected one is rejected as well
+                self._pending.pop(key, None)
+        return failed
+
+    def _requeue(self, batch: Dict[str, tuple[object, str | None]]):
+        for key, entry in batch.items():
+            # Skip keys deleted (or dropped on a conflict) during the flush; a write made during the flush is newer
+            if key in self._in_flight:
+                self._pending.setdefault(key, entry)
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Already logged, the items stay pending for the next flush
+                pass
+
+    async def _write_backing(self, items: Dict[str, tuple[object, str | None]]):
+        """
+        Writes items to the backing store in one write call, each with the backing eTag of the version it is based
+        on (the backing store rejects it if that version was replaced) or unconditionally.
+        """
+        changes = {}
+        for key, (item, backing_e_tag) in items.items():
+            item = deepcopy(item)
+            _set_e_tag(item, backing_e_tag or "*")
+            changes[key] = item
+        await self._backing_storage.write(changes)
+
+    # --- LRU helpers ---
+
+    def _get_current(self, key: str, fresh_only: bool = False) -> tuple[object, str | None] | None:
+        """
+        The newest version of a key known to this worker, as (item, backing eTag): the pending write, the write
+        being flushed or the cached copy. Expired copies still count for eTag validation, not for reads.
+        """
+        entry = self._pending.get(key) or self._in_flight.get(key)
+        if entry is not None:
+            return entry
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        expires_at, item, backing_e_tag = cached
+        if expires_at <= time.monotonic():
+            if fresh_only:
+                del self._cache[key]
+                return None
+        else:
+            self._cache.move_to_end(key)
+        return item, backing_e_tag
+
+    def _set_cached(self, key: str, item: object, backing_e_tag: str | None):
+        self._cache[key] = (time.monotonic() + self._ttl, item, backing_e_tag)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._max_items:
+            # Evicted items that are not flushed yet are still served from _pending
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _new_e_tag() -> str:
+        return uuid.uuid4().hex
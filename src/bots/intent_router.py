@@ -0,0 +1,108 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable
+from src.utils.text_matcher import AhoCorasickMatcher
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Keyword intent routing for incoming messages.
+
+Intents register their keywords (English and Indonesian variants) with a priority and an async handler.
+All keywords of all intents are compiled into one Aho-Corasick matcher, so finding the candidate intents is a single
+pass over the message however many intents are registered. Candidates are tried by priority (then by position in
+the message); a handler returns None to decline (e.g. when the user is not allowed to use it), in which case the
+next candidate is tried.
+"""
+IntentHandler = Callable[..., Awaitable[str | None]]
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    keywords: tuple[str, ...]
+    priority: int
+    handler: IntentHandler
+
+
+@dataclass(frozen=True)
+class IntentRoute:
+    """Outcome of routing one message: the winning intent (None if no handler answered) and the timings."""
+    intent: str | None
+    keyword: str | None
+    response: str | None
+    candidates: tuple[str, ...]
+    match_seconds: float
+    handler_seconds: float
+
+
+class IntentRouter:
+    """
+    Registry of keyword intents compiled into a single matcher.
+    Meant to be created once per process; registering an intent recompiles the matcher on the next route.
+    """
+
+    def __init__(self):
+        self._intents: dict[str, Intent] = {}
+        self._matcher: AhoCorasickMatcher | None = None
+
+    def register(self, name: str, keywords: Iterable[str], priority: int, handler: IntentHandler):
+        """Registers (or replaces) an intent. Higher priority wins when several intents are mentioned."""
+        self._intents[name] = Intent(name=name, keywords=tuple(keywords), priority=priority, handler=handler)
+        self._matcher = None
+
+    def get_matcher(self) -> AhoCorasickMatcher:
+        if self._matcher is None:
+            self._matcher = AhoCorasickMatcher(
+                (keyword, intent.name) for intent in self._intents.values() for keyword in intent.keywords)
+        return self._matcher
+
+    def match(self, text: str | None) -> list[tuple[Intent, str]]:
+        """Returns the intents mentioned in the text with their first keyword, best candidate first."""
+        first_matches = {}
+        for text_match in self.get_matcher().find_all(text):
+            current = first_matches.get(text_match.value)
+            if current is None or text_match.start < current.start:
+                first_matches[text_match.value] = text_match
+        ranked = sorted(
+            first_matches.values(),
+            key=lambda text_match: (-self._intents[text_match.value].priority, text_match.start)
+        )
+        return [(self._intents[text_match.value], text_match.keyword) for text_match in ranked]
+
+    async def route(self, text: str | None, *handler_args: Any) -> IntentRoute:
+        """
+        Calls the handlers of the mentioned intents, best candidate first, until one returns a response.
+        `handler_args` are passed to the handler as they are.
+        """
+        started = time.perf_counter()
+        candidates = self.match(text)
+        matched = time.perf_counter()
+
+        route = None
+        for intent, keyword in candidates:
+            with span("intent", intent.name) as intent_span:
+                response = await intent.handler(*handler_args)
+                intent_span.set_attribute("answered", response is not None)
+            if response is not None:
+                route = (intent.name, keyword, response)
+                break
+        finished = time.perf_counter()
+
+        intent_name, keyword, response = route or (None, None, None)
+        intent_route = IntentRoute(
+            intent=intent_name,
+            keyword=keyword,
+            response=response,
+            candidates=tuple(intent.name for intent, _ in candidates),
+            match_seconds=matched - started,
+            handler_seconds=finished - matched
+        )
+        logger.debug(
+            "IntentRouter: Routed to %s (keyword: %s, candidates: %s) in %.3fms match / %.1fms handler",
+            intent_route.intent, intent_route.keyword, intent_route.candidates,
+            intent_route.match_seconds * 1000, intent_route.handler_seconds * 1000
+        )
+        return intent_route
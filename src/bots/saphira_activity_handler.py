@@ -1,12 +1,19 @@
-from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
 from botbuilder.core import ActivityHandler, TurnContext
 from botbuilder.schema import ChannelAccount
 from src.bots.user_data_handler import UserDataHandler
+from src.bots.intent_router import IntentRouter
 from src.services.contact_service import ContactService
 from src.services.domain_client_service import DomainClientService
 from src.services.reset_password_service import ResetPasswordService
+from src.services.reset_password_job_runner import ResetPasswordJobRunner
 from src.services.faq_service import FaqService
 
+logger = logging.getLogger(__name__)
+
+# turn_state key of the per-turn UserDataHandler
+USER_DATA_HANDLER_KEY = "UserDataHandler"
+
 
 class SaphiraActivityHandler(ActivityHandler):
     """
@@ -27,13 +34,25 @@ class SaphiraActivityHandler(ActivityHandler):
         contact_service: ContactService,
         domain_client_service: DomainClientService,
         reset_password_service: ResetPasswordService,
-        db_session: AsyncSession
+        reset_password_job_runner: ResetPasswordJobRunner | None = None
     ):
         self._faq_service = faq_service
         self._contact_service = contact_service
         self._domain_client_service = domain_client_service
         self._reset_password_service = reset_password_service
-        self._db_session = db_session
+        self._reset_password_job_runner = reset_password_job_runner
+
+    async def on_turn(self, turn_context: TurnContext):
+        """
+        Routes the activity, then writes the turn's UserData back to state once (only if it changed).
+        """
+        try:
+            await super().on_turn(turn_context)
+        finally:
+            user_data_handler: UserDataHandler | None = turn_context.turn_state.get(
+                USER_DATA_HANDLER_KEY)
+            if user_data_handler:
+                await user_data_handler.save_changes()
 
     async def on_message_activity(self, turn_context: TurnContext):
         """
@@ -42,50 +61,78 @@ class SaphiraActivityHandler(ActivityHandler):
         # Get user data handler for the current turn
         user_data_handler = await self._get_user_data_handler(turn_context)
 
-        email = await user_data_handler.get_email()
-        client_type = await user_data_handler.get_client_type()
-        user_input = turn_context.activity.text.lower()
-
-        response_text = f"You said: {user_input}"
-        if user_input and "contact" in user_input and client_type:
-            contacts = await self._contact_service.get_streams(client_type)
-            response_text = f"You asked about Contact. here's the result:\n {contacts}"
-        elif user_input and "reset password" in user_input and client_type != "UNKNOWN" and email:
-            print(
-                "--- User input suggests password reset. Calling ResetPasswordService... ---")
-            # Pass necessary info to the service method
-            await user_data_handler.autogenerate_session_id()
-            reset_result = await self._reset_password_service.initiate_sap_password_reset(
-                user_email=email,
-                session_id=await user_data_handler.get_session_id(),
-                client_details=await user_data_handler.get_domain_client_details_model(),
-                session=self._db_session
-            )
-            print(f"--- ResetPasswordService returned: {reset_result} ---")
-            response_text = f"Attempted SAP password reset. Result: {reset_result.get('text', 'No text provided')}"
-        elif user_input and "key user" in user_input and client_type:
-            # For now, just get available streams and ask the user
-            get_stream_intent = await self._contact_service.find_stream_from_text(client_type, user_input)
-            contacts = await self._contact_service.select_all_by_stream_and_substream(client_type, get_stream_intent)
-            if contacts:
-                response_text = "\n\n---\n\n".join([
-                    f"Name: {contact.contact_name}\n\n"
-                    f"Email: {contact.contact_email}\n\n"
-                    f"Phone: {contact.contact_phone}\n\n"
-                    f"Stream: {contact.stream} / {contact.sub_stream}\n\n"
-                    f"Created: {contact.created_date.strftime('%Y-%m-%d') if contact.created_date else 'N/A'}\n\n"
-                    f"Updated: {contact.changed_date.strftime('%Y-%m-%d') if contact.changed_date else 'N/A'}\n\n"
-                    f"Contact ID: {contact.contact_id}"
-                    for contact in contacts
-                ])
-            else:
-                response_text = "Sorry, I don't have Key User information available for your client at the moment."
+        user_input = (turn_context.activity.text or "").lower()
+
+        # Keyword intents are matched in one pass over the message, see INTENT_ROUTER below for the registrations
+        intent_route = await INTENT_ROUTER.route(user_input, self, turn_context, user_data_handler, user_input)
+        response_text = intent_route.response or f"You said: {user_input}"
         await turn_context.send_activity(response_text)
 
         # --- Later: Integrate Agno agent here ---
-        # response = await self._agno_agent.process_input(turn_context, user_data_handler, session_id, self._db_session) # Pass session to agent if needed
+        # response = await self._agno_agent.process_input(turn_context, user_data_handler, session_id) # Agent repositories open their own sessions
         # await turn_context.send_activity(response)
 
+    async def _handle_contact_intent(
+        self, turn_context: TurnContext, user_data_handler: UserDataHandler, user_input: str
+    ) -> str | None:
+        client_type = await user_data_handler.get_client_type()
+        if not client_type:
+            return None
+        contacts = await self._contact_service.get_all_streams(client_type)
+        return f"You asked about Contact. here's the result:\n {contacts}"
+
+    async def _handle_reset_password_intent(
+        self, turn_context: TurnContext, user_data_handler: UserDataHandler, user_input: str
+    ) -> str | None:
+        email = await user_data_handler.get_email()
+        client_type = await user_data_handler.get_client_type()
+        if client_type == "UNKNOWN" or not email:
+            return None
+        logger.debug("User input suggests password reset. Calling ResetPasswordService...")
+        # Pass necessary info to the service method
+        await user_data_handler.autogenerate_session_id()
+        session_id = await user_data_handler.get_session_id()
+        client_details = await user_data_handler.get_domain_client_details_model()
+
+        if self._reset_password_job_runner:
+            # SAP is called in the background, the result is sent to this conversation when it arrives
+            try:
+                await self._reset_password_job_runner.enqueue(email, session_id, client_details, turn_context)
+                return "Your SAP password reset request has been received. I'll send you the result here shortly."
+            except Exception as e:
+                logger.error("Queueing the password reset failed, resetting within the turn: %s", e)
+
+        reset_result = await self._reset_password_service.initiate_sap_password_reset(
+            user_email=email,
+            session_id=session_id,
+            client_details=client_details
+        )
+        logger.debug("ResetPasswordService returned: %s", reset_result)
+        return f"Attempted SAP password reset. Result: {reset_result.get('text', 'No text provided')}"
+
+    async def _handle_key_user_intent(
+        self, turn_context: TurnContext, user_data_handler: UserDataHandler, user_input: str
+    ) -> str | None:
+        client_type = await user_data_handler.get_client_type()
+        if not client_type:
+            return None
+        # Stream detection runs on the client's cached matcher, only the contacts are read from the database
+        stream_match = await self._contact_service.find_stream_and_sub_stream_from_text(client_type, user_input)
+        stream, sub_stream = stream_match if stream_match else (None, None)
+        contacts = await self._contact_service.select_all_by_stream_and_substream(client_type, stream, sub_stream)
+        if not contacts:
+            return "Sorry, I don't have Key User information available for your client at the moment."
+        return "\n\n---\n\n".join([
+            f"Name: {contact.contact_name}\n\n"
+            f"Email: {contact.contact_email}\n\n"
+            f"Phone: {contact.contact_phone}\n\n"
+            f"Stream: {contact.stream} / {contact.sub_stream}\n\n"
+            f"Created: {contact.created_date.strftime('%Y-%m-%d') if contact.created_date else 'N/A'}\n\n"
+            f"Updated: {contact.changed_date.strftime('%Y-%m-%d') if contact.changed_date else 'N/A'}\n\n"
+            f"Contact ID: {contact.contact_id}"
+            for contact in contacts
+        ])
+
     async def on_members_added_activity(self, members_added: list[ChannelAccount], turn_context: TurnContext):
         """
         Handle when members are added to the conversation.
@@ -110,9 +157,41 @@ class SaphiraActivityHandler(ActivityHandler):
         Helper method to get or create UserDataHandler.
         This will use the user state accessor.
         encapsulate the logic of getting or creating a UserDataHandler instance for the current turn. It acts as a convenient way for handler methods (on_message_activity, on_members_added_activity) to access user-specific data and state in a structured way via the UserDataHandler class.
+        The instance is kept in turn_state so every caller in the turn shares the same memoized UserData.
         """
-        user_data_handler = UserDataHandler(
-            turn_context,
-            domain_client_service=self._domain_client_service
-        )
+        user_data_handler: UserDataHandler | None = turn_context.turn_state.get(
+            USER_DATA_HANDLER_KEY)
+        if user_data_handler is None:
+            user_data_handler = UserDataHandler(
+                turn_context,
+                domain_client_service=self._domain_client_service
+            )
+            turn_context.turn_state[USER_DATA_HANDLER_KEY] = user_data_handler
         return user_data_handler
+
+
+# App-scoped intent router shared by every request; handlers are called as
+# handler(activity_handler, turn_context, user_data_handler, text).
+# Priorities keep the original precedence: contact > reset password > key user.
+INTENT_ROUTER = IntentRouter()
+INTENT_ROUTER.register(
+    "contact",
+    ("contact", "contacts", "kontak", "hubungi"),
+    priority=300,
+    handler=SaphiraActivityHandler._handle_contact_intent
+)
+INTENT_ROUTER.register(
+    "reset_password",
+    (
+        "reset password", "password reset", "forgot password", "reset pass",
+        "lupa password", "reset kata sandi", "lupa kata sandi", "atur ulang kata sandi", "atur ulang password"
+    ),
+    priority=200,
+    handler=SaphiraActivityHandler._handle_reset_password_intent
+)
+INTENT_ROUTER.register(
+    "key_user",
+    ("key user", "key users", "keyuser", "pengguna kunci", "user kunci"),
+    priority=100,
+    handler=SaphiraActivityHandler._handle_key_user_intent
+)
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from botbuilder.schema import Activity
+from botframework.connector.auth import ClaimsIdentity
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Accept-then-process mode of /api/messages (TURN_QUEUE_ENABLED).
+
+The route authenticates the activity, puts it on the turn queue and answers 202 right away, so a slow turn (database,
+state, SAP) no longer holds the HTTP request or triggers a redelivery by the Bot Framework.
+
+Every conversation with pending activities has its own FIFO queue. A conversation is owned by at most one of the
+TURN_QUEUE_WORKERS worker tasks at a time, so its activities are processed one at a time and in arrival order, while
+up to TURN_QUEUE_WORKERS different conversations are processed in parallel; a slow turn only delays its own
+conversation. A worker processes one activity of a conversation and then puts the conversation back at the end of the
+ready line, so a busy conversation does not starve the others. When TURN_QUEUE_SIZE activities are waiting in total,
+or TURN_QUEUE_CONVERSATION_SIZE in one conversation, the activity is refused (the route answers 503 with Retry-After
+and the channel redelivers it later) instead of queueing without bound.
+"""
+TURN_QUEUE_ACTIVITIES = METRICS.counter(
+    "saphira_turn_queue_activities_total",
+    "Activities offered to the turn queue by outcome (accepted, rejected, processed, failed).",
+    ("outcome",)
+)
+TURN_QUEUE_WAIT = METRICS.histogram(
+    "saphira_turn_queue_wait_seconds", "Time activities waited in the turn queue before processing.")
+
+TurnProcessor = Callable[[Activity, ClaimsIdentity], Awaitable[None]]
+
+
+class TurnQueueFull(Exception):
+    """Raised when the queue, or the queue of the activity's conversation, cannot take another activity."""
+
+
+@dataclass
+class QueuedTurn:
+    activity: Activity
+    identity: ClaimsIdentity
+    enqueued_at: float
+
+
+class TurnQueue:
+    """
+    Per-conversation ordered, bounded queues served by a pool of worker tasks.
+    `processor` runs one turn; it is responsible for creating its own services.
+    """
+
+    def __init__(
+        self,
+        processor: TurnProcessor,
+        workers: int = 32,
+        max_queue_size: int = 1000,
+        max_conversation_queue_size: int = 20
+    ):
+        self._processor = processor
+        self._worker_count = workers
+        self._max_queue_size = max_queue_size
+        self._max_conversation_queue_size = max_conversation_queue_size
+        # conversation id -> activities not processed yet; a key exists while the conversation is scheduled
+        self._conversations: dict[str, deque[QueuedTurn]] = {}
+        # Scheduled conversations not owned by a worker, in the order they are served
+        self._ready: asyncio.Queue[str] = asyncio.Queue()
+        self._queued = 0
+        self._busy = 0
+        self._workers: list[asyncio.Task] = []
+        self._accepting = False
+
+    def submit(self, activity: Activity, identity: ClaimsIdentity):
+        """Queues an authenticated activity behind its conversation's. Raises TurnQueueFull when full or stopped."""
+        conversation_id = (activity.conversation.id if activity.conversation else None) or ""
+        pending = self._conversations.get(conversation_id)
+        if not self._accepting:
+            TURN_QUEUE_ACTIVITIES.inc(outcome="rejected")
+            raise TurnQueueFull("Turn queue is not accepting activities")
+        if self._queued >= self._max_queue_size:
+            TURN_QUEUE_ACTIVITIES.inc(outcome="rejected")
+            raise TurnQueueFull("Turn queue is full")
+        if pending is not None and len(pending) >= self._max_conversation_queue_size:
+            TURN_QUEUE_ACTIVITIES.inc(outcome="rejected")
+            raise TurnQueueFull("Turn queue of the conversation is full")
+
+        if pending is None:
+            pending = self._conversations[conversation_id] = deque()
+            self._ready.put_nowait(conversation_id)
+        pending.append(QueuedTurn(activity, identity, time.perf_counter()))
+        self._queued += 1
+        TURN_QUEUE_ACTIVITIES.inc(outcome="accepted")
+
+    def stats(self) -> dict[str, any]:
+        return {
+            "workers": len(self._workers),
+            "busy_workers": self._busy,
+            "queue_depth": self._queued,
+            "conversations": len(self._conversations),
+        }
+
+    def start(self):
+        if not self._workers:
+            self._accepting = True
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self._worker_count)]
+
+    async def close(self, grace: float = 30.0):
+        """Stops accepting, lets the workers finish the queued activities (up to `grace` seconds) and stops them."""
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._ready.join(), timeout=grace)
+        except asyncio.TimeoutError:
+            logger.warning("TurnQueue: %s activities not processed before shutdown", self._queued)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self):
+        while True:
+            conversation_id = await self._ready.get()
+            pending = self._conversations[conversation_id]
+            queued_turn = pending.popleft()
+            self._queued -= 1
+            self._busy += 1
+            try:
+                TURN_QUEUE_WAIT.observe(time.perf_counter() - queued_turn.enqueued_at)
+                await self._processor(queued_turn.activity, queued_turn.identity)
+                TURN_QUEUE_ACTIVITIES.inc(outcome="processed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                TURN_QUEUE_ACTIVITIES.inc(outcome="failed")
+                logger.exception("TurnQueue: Processing activity %s failed: %s", queued_turn.activity.id, e)
+            finally:
+                self._busy -= 1
+                if pending:
+                    # Back at the end of the line; the conversation stays owned by no more than one worker
+                    self._ready.put_nowait(conversation_id)
+                else:
+                    del self._conversations[conversation_id]
+                self._ready.task_done()
+
+
+# Global queue, created during lifespan startup when TURN_QUEUE_ENABLED
+TURN_QUEUE: TurnQueue | None = None
+
+
+async def initialize_turn_queue(
+    processor: TurnProcessor, workers: int, max_queue_size: int, max_conversation_queue_size: int
+):
+    """Creates and starts the turn queue workers."""
+    global TURN_QUEUE
+    TURN_QUEUE = TurnQueue(
+        processor, workers=workers, max_queue_size=max_queue_size,
+        max_conversation_queue_size=max_conversation_queue_size
+    )
+    TURN_QUEUE.start()
+    logger.info("Turn queue started: %s workers, %s activities (%s per conversation)",
+                workers, max_queue_size, max_conversation_queue_size)
+
+
+async def close_turn_queue(grace: float = 30.0):
+    """Processes what is still queued (within the grace period) and stops the workers."""
+    global TURN_QUEUE
+    if TURN_QUEUE:
+        await TURN_QUEUE.close(grace)
+        TURN_QUEUE = None
+
+
+def get_turn_queue() -> TurnQueue | None:
+    """Returns the turn queue, or None when activities are processed within the request."""
+    return TURN_QUEUE
+
+
+METRICS.gauge(
+    "saphira_turn_queue_depth", "Activities waiting in the turn queue.",
+    lambda: TURN_QUEUE.stats()["queue_depth"] if TURN_QUEUE else 0
+)
+METRICS.gauge(
+    "saphira_turn_queue_conversations", "Conversations with activities waiting or being processed.",
+    lambda: TURN_QUEUE.stats()["conversations"] if TURN_QUEUE else 0
+)
+METRICS.gauge(
+    "saphira_turn_queue_busy_workers", "Turn queue workers processing an activity.",
+    lambda: TURN_QUEUE.stats()["busy_workers"] if TURN_QUEUE else 0
+)
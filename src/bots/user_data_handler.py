@@ -1,3 +1,4 @@
+import logging
 from typing import Dict, Any
 from datetime import datetime
 from botbuilder.core import TurnContext, StatePropertyAccessor
@@ -5,6 +6,9 @@ from src.models.user_data import UserData
 from src.bots.bot_state_management import USER_STATE_ACCESSOR_KEY
 from src.services.domain_client_service import DomainClientService
 from src.models.client import Client
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
 
 
 class UserDataHandler:
@@ -20,22 +24,29 @@ class UserDataHandler:
         self._user_data_accessor: StatePropertyAccessor = self._turn_context.turn_state.get(
             USER_STATE_ACCESSOR_KEY)
         if not self._user_data_accessor:
-            print("CRITICAL ERROR: UserDataAccessor not found in TurnContext.turn_state")
+            logger.critical("UserDataAccessor not found in TurnContext.turn_state")
         self._domain_client_service = domain_client_service
+        # UserData is loaded at most once per turn, mutated in place and written back once by save_changes()
+        self._user_data: UserData | None = None
+        self._dirty = False
 
     async def get_user_data(self) -> UserData:
         """
         Retrieves the UserData from state. Returns a default UserData instance
         if the state does not exist in storage (get() returns None).
+        The instance is memoized for the turn, so the state is only read and validated once.
         """
-        print("--- UserDataHandler: Attempting to get user state ---")
+        if self._user_data is not None:
+            return self._user_data
+
+        logger.debug("UserDataHandler: Attempting to get user state")
         user_data_dict = None
         user_data = None
         try:
-            user_data_dict = await self._user_data_accessor.get(self._turn_context)
+            with span("state", "user_data.load"):
+                user_data_dict = await self._user_data_accessor.get(self._turn_context)
         except Exception as e:
-            print(
-                f"--- UserDataHandler UNEXPECTED ERROR during state GET: {e} ---")
+            logger.error("UserDataHandler: Unexpected error during state GET: %s", e)
 
         if user_data_dict is None:
             user_data = UserData()
@@ -43,17 +54,28 @@ class UserDataHandler:
             try:
                 user_data = UserData(**user_data_dict)
             except Exception as e:
-                print(
-                    f"--- UserDataHandler ERROR deserializing state dictionary: {e} ---")
+                logger.error("UserDataHandler: Error deserializing state dictionary: %s", e)
                 user_data = UserData()
+        self._user_data = user_data
         return user_data
 
     async def set_user_data(self, user_data: UserData):
+        """Replaces the memoized UserData and marks it for writing at the end of the turn."""
+        self._user_data = user_data
+        self._dirty = True
+
+    async def save_changes(self):
+        """
+        Writes the UserData back to the state accessor, only if something changed during the turn.
+        Called once at the end of the turn, before the state is persisted by AutoSaveStateMiddleware.
+        """
+        if not self._dirty:
+            return
         try:
-            await self._user_data_accessor.set(self._turn_context, user_data.model_dump())
+            await self._user_data_accessor.set(self._turn_context, self._user_data.model_dump())
+            self._dirty = False
         except Exception as e:
-            print(
-                f"--- UserDataHandler ERROR setting state in accessor: {e} ---")
+            logger.error("UserDataHandler: Error setting state in accessor: %s", e)
             raise
 
     async def get_email(self) -> str | None:
@@ -63,7 +85,7 @@ class UserDataHandler:
 
     async def set_email_from_activity(self):
         """Sets the user's email from the activity."""
-        print("--- UserDataHandler: Setting email from activity ---")
+        logger.debug("UserDataHandler: Setting email from activity")
         # Get the user's email from the activity (usually from the 'from' property)
         # In Teams, the 'from.aad_object_id' or 'from.email' might be available depending on channel config and user's org settings
         # The 'from.name' is usually the display name.
@@ -81,7 +103,7 @@ class UserDataHandler:
         # email = team_member.email if team_member else None
 
         # For initial testing, let's see if activity.from_property.email is available
-        print("start set email in user data handler")
+        logger.debug("start set email in user data handler")
         email = None
         if hasattr(activity.from_property, 'email') and activity.from_property.email:
             email = activity.from_property.email
@@ -102,8 +124,7 @@ class UserDataHandler:
                 if hasattr(activity.from_property, 'aad_object_id') and activity.from_property.aad_object_id
                 else activity.from_property.id
             )
-            print(
-                f"WARNING: Email not directly available in activity. Using ID/AAD ID: {email}")
+            logger.warning("Email not directly available in activity. Using ID/AAD ID: %s", email)
             # In a real scenario, you'd look up the user's email using their AAD ID or Teams ID from your backend DB or AAD
             # This might involve another service or a dependency injected into UserDataHandler
         user_data = await self.get_user_data()
@@ -115,17 +136,16 @@ class UserDataHandler:
         Determines the user's client type based on email domain lookup
         and saves it to state along with domain client details.
         """
-        print("--- UserDataHandler: Determining and setting client type ---")
+        logger.debug("UserDataHandler: Determining and setting client type")
         email = await self.get_email()
         if not email:
-            print("WARNING: Cannot determine client type, email is not available.")
+            logger.warning("Cannot determine client type, email is not available.")
             return
 
         user_id = self._turn_context.activity.from_property.id
         if user_id in self.test_user_mapping:
             email = self.test_user_mapping[user_id]
-            print(
-                f"--- UserDataHandler: Using test email mapping for user ID: {user_id} -> {email} ---")
+            logger.debug("UserDataHandler: Using test email mapping for user ID: %s -> %s", user_id, email)
             user_data = await self.get_user_data()
             user_data.email = email.lower()
             await self.set_user_data(user_data)
@@ -172,14 +192,13 @@ class UserDataHandler:
             try:
                 return Client(**details_dict)
             except Exception as e:
-                print(
-                    f"WARNING: Failed to deserialize domain client details from state to Client model: {e}")
+                logger.warning("Failed to deserialize domain client details from state to Client model: %s", e)
                 return None
         return None
 
     async def set_dialog_welcome_sent(self, sent: bool):
         """Sets the flag indicating if the welcome message has been sent."""
-        print(f"--- UserDataHandler: Setting welcome sent flag to {sent} ---")
+        logger.debug("UserDataHandler: Setting welcome sent flag to %s", sent)
         user_data = await self.get_user_data()
         user_data.dialog_welcome_sent = sent
         await self.set_user_data(user_data)
@@ -202,7 +221,7 @@ class UserDataHandler:
         session_id = f"S_{today.strftime('%Y-%m-%d')}_{today.strftime('%H%M%S')}_{email_part}".upper()
         user_data.session_id = session_id
         await self.set_user_data(user_data)
-        print(f"--- Generated new Session ID: {session_id} ---")
+        logger.debug("Generated new Session ID: %s", session_id)
 
     # --- Add other getter/setter methods for UserData properties as needed ---
     # async def set_current_faq_question(self, question: str):
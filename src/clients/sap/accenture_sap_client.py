@@ -1,3 +1,4 @@
+import logging
 import httpx
 from src.clients.sap.sap_client_interface import SapClientInterface
 from src.clients.sap.amman_sap_client import AmmanSapClient
@@ -6,6 +7,8 @@ from src.config import Config
 # Re-use constants from AmmanSapClient if the API response structure is the same
 from .amman_sap_client import SAP_MSGTY_KEY, SAP_MSGCD_KEY, SAP_MSGTX_KEY, MSGCD_E_SYSTEM
 
+logger = logging.getLogger(__name__)
+
 
 class AccentureSapClient(AmmanSapClient):  # Inherit if API is exactly the same
     """
@@ -15,7 +18,7 @@ class AccentureSapClient(AmmanSapClient):  # Inherit if API is exactly the same
     # If they are different, override __init__ and load different config keys
 
     def __init__(self, config: Config):
-        print("--- Initializing AccentureSapClient (inheriting from AmmanSapClient) ---")
+        logger.debug("Initializing AccentureSapClient (inheriting from AmmanSapClient)")
         # Assuming Accenture uses the same SAP endpoint and creds for reset password
         # If not, load different config keys here:
         # self._sap_service_url = config.ACCENTURE_RP_SAP_SERV
@@ -1,6 +1,11 @@
+import logging
 import httpx
 from src.clients.sap.sap_client_interface import SapClientInterface
 from src.config import Config
+from src.clients.sap.sap_http_pool import get_sap_http_client
+from src.clients.sap.resilience import CircuitOpenError, get_sap_resilience
+
+logger = logging.getLogger(__name__)
 
 # Define constants for expected SAP response fields
 SAP_MSGTY_KEY = "Request.Msgty"
@@ -15,9 +20,11 @@ MSGCD_E_SYSTEM = "4"  # Generic System Error (adjust if different)
 class AmmanSapClient(SapClientInterface):
     """
     SAP Client implementation for the AMMAN client.
+    Requests go through the pooled keep-alive client and the resilience policy (breaker, retries, adaptive timeout)
+    of the SAP endpoint.
     """
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http_client: httpx.AsyncClient | None = None):
         self._config = config
         self._sap_service_url = self._config.AMMAN_RP_SAP_SERV
         self._sap_username = self._config.AMMAN_RP_SAP_USER
@@ -25,20 +32,19 @@ class AmmanSapClient(SapClientInterface):
 
         # Check if required config is available
         if not all([self._sap_service_url, self._sap_username, self._sap_password]):
-            print("WARNING: Amman SAP client configuration is incomplete.")
+            logger.warning("Amman SAP client configuration is incomplete.")
             # Depending on severity, you might raise an error or handle gracefully
+        self._http_client = http_client
 
     async def reset_password(self, email: str, session_id: str) -> dict[str, any]:
         """
         Initiates the SAP password reset process for the AMMAN client.
         """
-        print(
-            f"--- AmmanSapClient: Initiating password reset to {self._sap_service_url}, with user {self._sap_username} ---")
-        print(
-            f"--- AmmanSapClient: Initiating password reset for {email}, session: {session_id} ---")
+        logger.debug("AmmanSapClient: Initiating password reset to %s, with user %s", self._sap_service_url, self._sap_username)
+        logger.debug("AmmanSapClient: Initiating password reset for %s, session: %s", email, session_id)
 
         if not all([self._sap_service_url, self._sap_username, self._sap_password]):
-            print("ERROR: Amman SAP client not configured. Cannot perform reset.")
+            logger.error("Amman SAP client not configured. Cannot perform reset.")
             # Return a standardized error response
             return {
                 "status_code": None,
@@ -53,70 +59,75 @@ class AmmanSapClient(SapClientInterface):
             "SessionId": session_id,
             "Email": email
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
+        # Resolve the pooled client per call so a pool recreated after shutdown/startup is picked up
+        client = self._http_client or get_sap_http_client(self._sap_service_url)
+        try:
+            response = await get_sap_resilience(self._sap_service_url).call(
+                lambda timeout: client.post(
                     self._sap_service_url,
                     json=request_body,
                     auth=auth_headers,
-                    timeout=30.0
+                    timeout=timeout
                 )
-                print(
-                    f"--- AmmanSapClient: Received SAP response status: {response.status_code} {response.reason_phrase} ---")
-                response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+            )
+            logger.debug("AmmanSapClient: Received SAP response status: %s %s", response.status_code, response.reason_phrase)
+            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
 
-                # Parse the JSON response body
-                response_body = response.json()
-                print(
-                    f"--- AmmanSapClient: SAP response body: {response_body} ---")
+            # Parse the JSON response body
+            response_body = response.json()
 
-                # Extract SAP message details from the response body
-                msgty = response_body.get("Request", {}).get("Msgty")
-                msgcd = response_body.get("Request", {}).get("Msgcd")
-                msgtx = response_body.get("Request", {}).get("Msgtx")
+            # Extract SAP message details from the response body
+            msgty = response_body.get("Request", {}).get("Msgty")
+            msgcd = response_body.get("Request", {}).get("Msgcd")
+            msgtx = response_body.get("Request", {}).get("Msgtx")
 
-                print(
-                    f"--- AmmanSapClient: SAP Message Type: {msgty}, Code: {msgcd}, Text: {msgtx} ---")
+            logger.debug("AmmanSapClient: SAP Message Type: %s, Code: %s, Text: %s", msgty, msgcd, msgtx)
 
-                # Return a standardized response dictionary
-                return {
-                    "status_code": str(response.status_code),
-                    "status_message": response.reason_phrase,
-                    "message_type": msgty,
-                    "message_code": msgcd.strip() if msgcd else None,
-                    "message_text": msgtx
-                }
-            except httpx.HTTPStatusError as e:
-                # Handle HTTP errors (4xx or 5xx responses)
-                print(
-                    f"--- AmmanSapClient ERROR: HTTP error occurred: {e} ---")
-                print(f"Response body: {e.response.text}")
-                return {
-                    "status_code": str(e.response.status_code),
-                    "status_message": e.response.reason_phrase,
-                    "message_type": "E",
-                    "message_code": MSGCD_E_SYSTEM,
-                    "message_text": f"SAP service returned an HTTP error: {e.response.status_code}"
-                }
-            except httpx.RequestError as e:
-                # Handle network/request errors (timeout, connection failure, etc.)
-                print(
-                    f"--- AmmanSapClient ERROR: Request error occurred: {e} ---")
-                return {
-                    "status_code": None,
-                    "status_message": "Request Failed",
-                    "message_type": "E",  # Assume Error
-                    "message_code": MSGCD_E_SYSTEM,  # Use generic system error code
-                    "message_text": f"Failed to connect to SAP service: {e}"
-                }
-            except Exception as e:
-                print(f"--- AmmanSapClient UNEXPECTED ERROR: {e} ---")
-                import traceback
-                traceback.print_exc()
-                return {
-                    "status_code": None,
-                    "status_message": "Unexpected Error",
-                    "message_type": "E",
-                    "message_code": MSGCD_E_SYSTEM,
-                    "message_text": f"An unexpected error occurred during SAP reset: {e}"
-                }
+            # Return a standardized response dictionary
+            return {
+                "status_code": str(response.status_code),
+                # HTTP/2 responses carry no reason phrase, fall back to the standard one
+                "status_message": response.reason_phrase or httpx.codes.get_reason_phrase(response.status_code),
+                "message_type": msgty,
+                "message_code": msgcd.strip() if msgcd else None,
+                "message_text": msgtx
+            }
+        except CircuitOpenError as e:
+            # SAP is failing: answer right away instead of holding the turn for the timeout
+            logger.warning("AmmanSapClient: %s", e)
+            return {
+                "status_code": None,
+                "status_message": "Service Unavailable",
+                "message_type": "E",
+                "message_code": MSGCD_E_SYSTEM,
+                "message_text": "The SAP service is currently unavailable. Please try again in a few minutes."
+            }
+        except httpx.HTTPStatusError as e:
+            # Handle HTTP errors (4xx or 5xx responses)
+            logger.error("AmmanSapClient: HTTP error occurred: %s", e)
+            return {
+                "status_code": str(e.response.status_code),
+                "status_message": e.response.reason_phrase or httpx.codes.get_reason_phrase(e.response.status_code),
+                "message_type": "E",
+                "message_code": MSGCD_E_SYSTEM,
+                "message_text": f"SAP service returned an HTTP error: {e.response.status_code}"
+            }
+        except httpx.RequestError as e:
+            # Handle network/request errors (timeout, connection failure, etc.)
+            logger.error("AmmanSapClient: Request error occurred: %s", e)
+            return {
+                "status_code": None,
+                "status_message": "Request Failed",
+                "message_type": "E",  # Assume Error
+                "message_code": MSGCD_E_SYSTEM,  # Use generic system error code
+                "message_text": f"Failed to connect to SAP service: {e}"
+            }
+        except Exception as e:
+            logger.exception("AmmanSapClient: Unexpected error: %s", e)
+            return {
+                "status_code": None,
+                "status_message": "Unexpected Error",
+                "message_type": "E",
+                "message_code": MSGCD_E_SYSTEM,
+                "message_text": f"An unexpected error occurred during SAP reset: {e}"
+            }
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+import httpx
+from src.config import app_config
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Resilience layer for the SAP endpoints, one policy per endpoint (scheme + host + port) like the HTTP pool.
+
+- Circuit breaker: after SAP_BREAKER_FAILURE_THRESHOLD consecutive failures (transport errors, timeouts, HTTP 5xx)
+  the circuit opens and calls fail immediately with CircuitOpenError. After SAP_BREAKER_RECOVERY_TIMEOUT seconds it
+  turns half-open and lets SAP_BREAKER_HALF_OPEN_CALLS probe calls through: a success closes it, a failure opens it
+  again.
+- Retries: only failures where the request never reached SAP (connect errors, pool timeouts) are retried, with
+  jittered exponential backoff, since a password reset POST is not idempotent.
+- Adaptive timeout: the timeout of a call is SAP_TIMEOUT_MULTIPLIER times the SAP_TIMEOUT_PERCENTILE of the recent
+  latencies of the endpoint, clamped to [SAP_TIMEOUT_MIN, SAP_TIMEOUT_MAX]. Until SAP_TIMEOUT_MIN_SAMPLES calls have
+  been observed, SAP_TIMEOUT_MAX is used. A timed-out call counts as a sample of the timeout itself, so the timeout
+  grows again when SAP gets slower instead of locking in.
+
+Breaker state, call outcomes and current timeouts are exported at /metrics.
+"""
+STATE_CLOSED = "closed"
+STATE_HALF_OPEN = "half_open"
+STATE_OPEN = "open"
+# Numeric value of each state in the saphira_sap_circuit_state gauge
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+# Failures where the request was not sent, safe to retry
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+SAP_CALLS = METRICS.counter(
+    "saphira_sap_calls_total",
+    "SAP calls by endpoint and outcome (success, failure, rejected, retry).",
+    ("endpoint", "outcome")
+)
+SAP_CIRCUIT_TRANSITIONS = METRICS.counter(
+    "saphira_sap_circuit_transitions_total", "Circuit breaker state changes by endpoint and new state.",
+    ("endpoint", "state")
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and self._clock() - self._opened_at >= self._recovery_timeout:
+            self._transition(STATE_HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(self._recovery_timeout - (self._clock() - self._opened_at), 0.0)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; a half-open circuit admits a limited number of probes."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and self._half_open_calls < self._half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def release_probe(self):
+        """Returns a half-open probe slot taken by a call that ended without an outcome."""
+        if self._state == STATE_HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self):
+        self._consecutive_failures = 0
+        if self._state != STATE_CLOSED:
+            self._transition(STATE_CLOSED)
+
+    def record_failure(self):
+        self._consecutive_failures += 1
+        if self._state == STATE_HALF_OPEN or (
+                self._state == STATE_CLOSED and self._consecutive_failures >= self._failure_threshold):
+            self._opened_at = self._clock()
+            self._transition(STATE_OPEN)
+
+    def _transition(self, state: str):
+        logger.warning("CircuitBreaker: %s %s -> %s", self.name, self._state, state)
+        self._state = state
+        self._half_open_calls = 0
+        SAP_CIRCUIT_TRANSITIONS.inc(endpoint=self.name, state=state)
+
+
+class AdaptiveTimeout:
+    """Timeout derived from a sliding window of observed latencies."""
+
+    def __init__(
+        self,
+        minimum: float = 2.0,
+        maximum: float = 30.0,
+        percentile: float = 0.99,
+        multiplier: float = 2.0,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        self._minimum = minimum
+        self._maximum = maximum
+        self._percentile = percentile
+        self._multiplier = multiplier
+        self._min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._current = maximum
+
+    @property
+    def current(self) -> float:
+        return self._current
+
+    def observe(self, latency: float):
+        self._latencies.append(latency)
+        if len(self._latencies) < self._min_samples:
+            return
+        ordered = sorted(self._latencies)
+        rank = max(1, math.ceil(self._percentile * len(ordered)))
+        self._current = min(max(ordered[rank - 1] * self._multiplier, self._minimum), self._maximum)
+
+
+class EndpointResilience:
+    """Breaker, retry policy and adaptive timeout of one SAP endpoint."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        breaker: CircuitBreaker,
+        timeout: AdaptiveTimeout,
+        retry_attempts: int = 2,
+        retry_backoff: float = 0.2
+    ):
+        self.endpoint = endpoint
+        self.breaker = breaker
+        self.timeout = timeout
+        self._retry_attempts = retry_attempts
+        self._retry_backoff = retry_backoff
+
+    async def call(self, send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Calls send(timeout) through the breaker, retrying failures that never reached the endpoint.
+        Raises CircuitOpenError when the circuit is open, otherwise returns the response or raises the last error.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                SAP_CALLS.inc(endpoint=self.endpoint, outcome="rejected")
+                raise CircuitOpenError(self.endpoint, self.breaker.retry_after())
+
+            timeout = self.timeout.current
+            started = time.perf_counter()
+            try:
+                response = await send(timeout)
+            except RETRYABLE_ERRORS as e:
+                self._record_failure()
+                if attempt < self._retry_attempts:
+                    attempt += 1
+                    await self._backoff(attempt, e)
+                    continue
+                raise
+            except httpx.TimeoutException:
+                # The call may still be running on the SAP side, its latency is at least the timeout
+                self.timeout.observe(timeout)
+                self._record_failure()
+                raise
+            except httpx.TransportError:
+                self._record_failure()
+                raise
+            except BaseException:
+                # Cancellation or an unexpected error says nothing about the endpoint, only hand back a probe slot
+                self.breaker.release_probe()
+                raise
+
+            self.timeout.observe(time.perf_counter() - started)
+            if response.status_code >= 500:
+                self._record_failure()
+            else:
+                self.breaker.record_success()
+                SAP_CALLS.inc(endpoint=self.endpoint, outcome="success")
+            return response
+
+    def _record_failure(self):
+        self.breaker.record_failure()
+        SAP_CALLS.inc(endpoint=self.endpoint, outcome="failure")
+
+    async def _backoff(self, attempt: int, error: Exception):
+        # Full jitter: a random delay up to the exponential backoff, so retries of many turns spread out
+        delay = random.uniform(0, self._retry_backoff * 2 ** (attempt - 1))
+        logger.warning("SAP resilience: Retry %s for %s in %.2fs after %s", attempt, self.endpoint, delay, error)
+        SAP_CALLS.inc(endpoint=self.endpoint, outcome="retry")
+        await asyncio.sleep(delay)
+
+
+# App-scoped policies, one per SAP endpoint
+SAP_RESILIENCE: dict[str, EndpointResilience] = {}
+
+
+def _endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def get_sap_resilience(url: str) -> EndpointResilience:
+    """Returns the resilience policy of the endpoint of the given URL, creating it on first use."""
+    key = _endpoint_key(url)
+    resilience = SAP_RESILIENCE.get(key)
+    if resilience is None:
+        resilience = EndpointResilience(
+            endpoint=key,
+            breaker=CircuitBreaker(
+                key,
+                failure_threshold=app_config.SAP_BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=app_config.SAP_BREAKER_RECOVERY_TIMEOUT,
+                half_open_max_calls=app_config.SAP_BREAKER_HALF_OPEN_CALLS
+            ),
+            timeout=AdaptiveTimeout(
+                minimum=app_config.SAP_TIMEOUT_MIN,
+                maximum=app_config.SAP_TIMEOUT_MAX,
+                percentile=app_config.SAP_TIMEOUT_PERCENTILE,
+                multiplier=app_config.SAP_TIMEOUT_MULTIPLIER,
+                window=app_config.SAP_TIMEOUT_WINDOW,
+                min_samples=app_config.SAP_TIMEOUT_MIN_SAMPLES
+            ),
+            retry_attempts=app_config.SAP_RETRY_ATTEMPTS,
+            retry_backoff=app_config.SAP_RETRY_BACKOFF
+        )
+        SAP_RESILIENCE[key] = resilience
+    return resilience
+
+
+METRICS.gauge(
+    "saphira_sap_circuit_state", "Circuit breaker state by endpoint (0 closed, 1 half-open, 2 open).",
+    lambda: {(key,): _STATE_VALUES[resilience.breaker.state] for key, resilience in SAP_RESILIENCE.items()},
+    ("endpoint",)
+)
+METRICS.gauge(
+    "saphira_sap_timeout_seconds", "Current adaptive timeout by endpoint.",
+    lambda: {(key,): resilience.timeout.current for key, resilience in SAP_RESILIENCE.items()},
+    ("endpoint",)
+)
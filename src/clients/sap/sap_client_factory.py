@@ -1,7 +1,11 @@
+import logging
 from src.clients.sap.sap_client_interface import SapClientInterface
 from src.clients.sap.amman_sap_client import AmmanSapClient
 from src.clients.sap.accenture_sap_client import AccentureSapClient
-from src.config import Config
+from src.clients.sap.sap_http_pool import initialize_sap_http_clients, close_sap_http_clients
+from src.config import Config, app_config
+
+logger = logging.getLogger(__name__)
 
 CLIENT_TYPE_AMMAN = "AMMAN"
 CLIENT_TYPE_ACCENTURE = "ACCENTURE"
@@ -10,23 +14,55 @@ CLIENT_TYPE_ACCENTURE = "ACCENTURE"
 class SapClientFactory:
     """
     Factory for creating client-specific SAP client implementations.
+    Client instances are created once per client type and reused afterwards.
     """
 
     def __init__(self, config: Config):
         self._config = config
+        self._sap_clients: dict[str, SapClientInterface] = {}
 
     def get_sap_client(self, client_type: str) -> SapClientInterface | None:
         """
         Returns the appropriate SapClientInterface implementation for the given client type.
         Returns None if the client type is not supported for SAP interactions.
         """
-        print(
-            f"--- SapClientFactory: Getting SAP client for type: {client_type} ---")
+        sap_client = self._sap_clients.get(client_type)
+        if sap_client:
+            return sap_client
+
+        logger.debug("SapClientFactory: Creating SAP client for type: %s", client_type)
         if client_type == CLIENT_TYPE_AMMAN:
-            return AmmanSapClient(config=self._config)
+            sap_client = AmmanSapClient(config=self._config)
         elif client_type == CLIENT_TYPE_ACCENTURE:
-            return AccentureSapClient(config=self._config)
+            sap_client = AccentureSapClient(config=self._config)
+        else:
+            logger.debug("SapClientFactory: No supported SAP client found for type: %s", client_type)
+            return None
+
+        self._sap_clients[client_type] = sap_client
+        return sap_client
+
+
+# Global factory shared across requests, created during lifespan startup
+SAP_CLIENT_FACTORY: SapClientFactory = None
+
+
+async def initialize_sap_clients():
+    """Creates the app-scoped SAP client factory and the pooled HTTP clients of the SAP endpoints."""
+    global SAP_CLIENT_FACTORY
+    await initialize_sap_http_clients([app_config.AMMAN_RP_SAP_SERV])
+    SAP_CLIENT_FACTORY = SapClientFactory(config=app_config)
+
+
+async def close_sap_clients():
+    """Closes the pooled HTTP clients."""
+    global SAP_CLIENT_FACTORY
+    await close_sap_http_clients()
+    SAP_CLIENT_FACTORY = None
+
 
-        print(
-            f"--- SapClientFactory: No supported SAP client found for type: {client_type} ---")
-        return None
+def get_sap_client_factory() -> SapClientFactory:
+    if SAP_CLIENT_FACTORY is None:
+        raise RuntimeError(
+            "SapClientFactory not initialized. Call initialize_sap_clients first.")
+    return SAP_CLIENT_FACTORY
@@ -0,0 +1,67 @@
+import logging
+import httpx
+from urllib.parse import urlsplit
+from src.config import app_config
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Pooled HTTP transport for the SAP clients.
+One keep-alive httpx.AsyncClient is kept per SAP endpoint (scheme + host + port) for the lifetime of the app,
+so password resets reuse open TCP/TLS connections instead of paying a new handshake on every call.
+The clients are created during the FastAPI lifespan startup (or lazily on first use) and closed on shutdown.
+"""
+SAP_HTTP_CLIENTS: dict[str, httpx.AsyncClient] = {}
+
+
+class TracedTransport(httpx.AsyncHTTPTransport):
+    """
+    Records a tracing span (kind "http", named by method and host) for every request.
+    The span ends when the response headers arrive; SAP responses are small, so that is close to the full call.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with span("http", f"{request.method} {request.url.host}") as current:
+            response = await super().handle_async_request(request)
+            current.set_attribute("http.status_code", response.status_code)
+            return response
+
+
+def _endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=app_config.SAP_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=app_config.SAP_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=app_config.SAP_HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(transport=TracedTransport(limits=limits, http2=app_config.SAP_HTTP2))
+
+
+def get_sap_http_client(url: str) -> httpx.AsyncClient:
+    """Returns the pooled client for the endpoint of the given URL, creating it on first use."""
+    key = _endpoint_key(url)
+    client = SAP_HTTP_CLIENTS.get(key)
+    if client is None or client.is_closed:
+        client = _create_http_client()
+        SAP_HTTP_CLIENTS[key] = client
+        logger.info("SAP HTTP pool: Created pooled client for %s", key)
+    return client
+
+
+async def initialize_sap_http_clients(urls: list[str]):
+    """Creates the pooled clients for the configured SAP endpoints."""
+    for url in urls:
+        if url:
+            get_sap_http_client(url)
+
+
+async def close_sap_http_clients():
+    """Closes every pooled client and its open connections."""
+    for client in SAP_HTTP_CLIENTS.values():
+        await client.aclose()
+    SAP_HTTP_CLIENTS.clear()
@@ -1,11 +1,36 @@
+import asyncio
+import hashlib
+import logging
 import os
 import sys
+from typing import TYPE_CHECKING, Any, Callable
 from dotenv import load_dotenv
-from azure.identity.aio import ClientSecretCredential, DefaultAzureCredential
-from azure.keyvault.secrets.aio import SecretClient
+from src.utils.secret_cache import SecretCache
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    from azure.keyvault.secrets.aio import SecretClient
+
+logger = logging.getLogger(__name__)
+
+# The Azure identity and Key Vault SDKs (a few hundred modules) are only imported when secrets are actually loaded from
+# Key Vault, so importing the app or starting a worker from the secret cache does not pay for them
+# (see benchmarks/startup_profile.py).
+
+# Config attribute -> (.env variable holding the Key Vault secret name, converter of the secret value)
+KEY_VAULT_SECRETS: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "MICROSOFT_APP_ID": ("DEV_MICROSOFT_APP_ID", str),
+    "MICROSOFT_APP_PASSWORD": ("DEV_MICROSOFT_APP_PASSWORD", str),
+    "AZURE_STORAGE_CONNECTION_STRING": ("AZURE_STORAGE_CONNECTION_STRING", str),
+    "AZURE_STORAGE_CONTAINER_NAME": ("AZURE_STORAGE_CONTAINER_NAME", str),
+    "DB_SERV": ("DB_SERV_SECRET_NAME", str),
+    "DB_NAME": ("DB_NAME_SECRET_NAME", str),
+    "DB_USER": ("DB_USER_SECRET_NAME", str),
+    "DB_PASS": ("DB_PASS_SECRET_NAME", str),
+    "DB_PORT": ("DB_PORT_SECRET_NAME", int),
+    "AMMAN_RP_SAP_SERV": ("AMMAN_RP_SAP_SERV", str),
+    "AMMAN_RP_SAP_USER": ("AMMAN_RP_SAP_USER", str),
+    "AMMAN_RP_SAP_PASS": ("AMMAN_RP_SAP_PASS", str),
+}
 
 
 class Config:
@@ -28,72 +53,308 @@ class Config:
     AZURE_STORAGE_CONNECTION_STRING: str
     AZURE_STORAGE_CONTAINER_NAME: str
 
+    DOMAIN_CLIENT_CACHE_MAX_SIZE: int
+    DOMAIN_CLIENT_CACHE_TTL: float
+    DOMAIN_CLIENT_CACHE_NEGATIVE_TTL: float
+    STREAM_MATCHER_CACHE_MAX_SIZE: int
+    STREAM_MATCHER_CACHE_TTL: float
+
+    SAP_HTTP_MAX_CONNECTIONS: int
+    SAP_HTTP_MAX_KEEPALIVE_CONNECTIONS: int
+    SAP_HTTP_KEEPALIVE_EXPIRY: float
+    SAP_HTTP2: bool
+    SAP_TIMEOUT_MIN: float
+    SAP_TIMEOUT_MAX: float
+    SAP_TIMEOUT_PERCENTILE: float
+    SAP_TIMEOUT_MULTIPLIER: float
+    SAP_TIMEOUT_WINDOW: int
+    SAP_TIMEOUT_MIN_SAMPLES: int
+    SAP_RETRY_ATTEMPTS: int
+    SAP_RETRY_BACKOFF: float
+    SAP_BREAKER_FAILURE_THRESHOLD: int
+    SAP_BREAKER_RECOVERY_TIMEOUT: float
+    SAP_BREAKER_HALF_OPEN_CALLS: int
+
+    RESET_PASSWORD_COOLDOWN: float
+    RESET_PASSWORD_BURST: int
+    RESET_PASSWORD_MAX_TRACKED_USERS: int
+    RESET_PASSWORD_JOBS_ENABLED: bool
+    RESET_PASSWORD_JOB_CONCURRENCY: int
+    RESET_PASSWORD_JOB_POLL_INTERVAL: float
+    RESET_PASSWORD_JOB_STALE_AFTER: float
+    RESET_PASSWORD_JOB_MAX_ATTEMPTS: int
+
+    STATE_STORAGE: str
+    STATE_CACHE_ENABLED: bool
+    STATE_CACHE_MAX_ITEMS: int
+    STATE_CACHE_TTL: float
+    STATE_FLUSH_INTERVAL: float
+    STATE_DURABILITY: str
+
+    LOG_SINK_QUEUE_SIZE: int
+    LOG_SINK_BATCH_SIZE: int
+    LOG_SINK_FLUSH_INTERVAL: float
+
+    DB_URL: str | None
+    DB_POOL_SIZE: int
+    DB_MAX_OVERFLOW: int
+    DB_POOL_TIMEOUT: float
+    DB_POOL_RECYCLE: int
+    DB_POOL_PRE_PING: bool
+    DB_STATEMENT_CACHE_SIZE: int
+    DB_PGBOUNCER_MODE: bool
+    DB_ECHO: bool
+    DB_POOL_PREWARM_CONNECTIONS: int
+
+    TURN_QUEUE_ENABLED: bool
+    TURN_QUEUE_WORKERS: int
+    TURN_QUEUE_SIZE: int
+    TURN_QUEUE_CONVERSATION_SIZE: int
+    TURN_QUEUE_SHUTDOWN_GRACE: float
+
+    WARMUP_ENABLED: bool
+    WARMUP_CONCURRENCY: int
+    WARMUP_TIMEOUT: float
+
+    LOG_LEVEL: str
+    LOG_MODULE_LEVELS: str
+    LOG_SAMPLE_RATES: str
+    LOG_JSON: bool
+
+    BOT_AUTH_TOKEN_CACHE_ENABLED: bool
+    BOT_AUTH_TOKEN_CACHE_MAX_SIZE: int
+    BOT_OPENID_KEY_REFRESH_INTERVAL: float
+    BOT_OPENID_KEY_MIN_REFRESH_INTERVAL: float
+    BOT_OPENID_METADATA_URL: str | None
+
+    TRACE_EXPORT_URL: str | None
+    TRACE_SAMPLE_RATE: float
+    TRACE_SERVICE_NAME: str
+
+    KEY_VAULT_MAX_CONCURRENCY: int
+    KEY_VAULT_RETRIES: int
+    KEY_VAULT_RETRY_BACKOFF: float
+    SECRET_CACHE_PATH: str | None
+    SECRET_CACHE_KEY: str | None
+    SECRET_CACHE_TTL: float
+
     _key_vault_url: str
     _client_id: str | None = None
     _client_secret: str | None = None
     _tenant_id: str | None = None
 
     def __init__(self):
+        # Load environment variables from .env file
+        load_dotenv()
         # These are needed before the async loading begins
         self._key_vault_url = os.getenv("DEV_AZURE_KEY_VAULT_URL")
         self._client_id = os.getenv("DEV_AZURE_CLIENT_ID")
         self._client_secret = os.getenv("DEV_AZURE_CLIENT_SECRET")
         self._tenant_id = os.getenv("DEV_AZURE_TENANT_ID")
 
+        # Non-secret tuning settings, read from the environment with defaults
+        self.DOMAIN_CLIENT_CACHE_MAX_SIZE = int(os.getenv("DOMAIN_CLIENT_CACHE_MAX_SIZE", "10000"))
+        self.DOMAIN_CLIENT_CACHE_TTL = float(os.getenv("DOMAIN_CLIENT_CACHE_TTL", "600"))
+        self.DOMAIN_CLIENT_CACHE_NEGATIVE_TTL = float(os.getenv("DOMAIN_CLIENT_CACHE_NEGATIVE_TTL", "60"))
+        self.STREAM_MATCHER_CACHE_MAX_SIZE = int(os.getenv("STREAM_MATCHER_CACHE_MAX_SIZE", "1000"))
+        self.STREAM_MATCHER_CACHE_TTL = float(os.getenv("STREAM_MATCHER_CACHE_TTL", "600"))
+        self.SAP_HTTP_MAX_CONNECTIONS = int(os.getenv("SAP_HTTP_MAX_CONNECTIONS", "20"))
+        self.SAP_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SAP_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        self.SAP_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SAP_HTTP_KEEPALIVE_EXPIRY", "60"))
+        # Opt-in until verified against the SAP gateway; needs the h2 package (httpx[http2])
+        self.SAP_HTTP2 = os.getenv("SAP_HTTP2", "false").lower() == "true"
+        # SAP resilience (see src/clients/sap/resilience.py): timeout = multiplier x latency percentile, clamped
+        self.SAP_TIMEOUT_MIN = float(os.getenv("SAP_TIMEOUT_MIN", "2"))
+        self.SAP_TIMEOUT_MAX = float(os.getenv("SAP_TIMEOUT_MAX", "30"))
+        self.SAP_TIMEOUT_PERCENTILE = float(os.getenv("SAP_TIMEOUT_PERCENTILE", "0.99"))
+        self.SAP_TIMEOUT_MULTIPLIER = float(os.getenv("SAP_TIMEOUT_MULTIPLIER", "2"))
+        self.SAP_TIMEOUT_WINDOW = int(os.getenv("SAP_TIMEOUT_WINDOW", "200"))
+        self.SAP_TIMEOUT_MIN_SAMPLES = int(os.getenv("SAP_TIMEOUT_MIN_SAMPLES", "20"))
+        self.SAP_RETRY_ATTEMPTS = int(os.getenv("SAP_RETRY_ATTEMPTS", "2"))
+        self.SAP_RETRY_BACKOFF = float(os.getenv("SAP_RETRY_BACKOFF", "0.2"))
+        self.SAP_BREAKER_FAILURE_THRESHOLD = int(os.getenv("SAP_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.SAP_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("SAP_BREAKER_RECOVERY_TIMEOUT", "30"))
+        self.SAP_BREAKER_HALF_OPEN_CALLS = int(os.getenv("SAP_BREAKER_HALF_OPEN_CALLS", "1"))
+        # Per user: RESET_PASSWORD_BURST SAP resets, then one per cooldown (seconds, 0 disables the limit)
+        self.RESET_PASSWORD_COOLDOWN = float(os.getenv("RESET_PASSWORD_COOLDOWN", "60"))
+        self.RESET_PASSWORD_BURST = int(os.getenv("RESET_PASSWORD_BURST", "1"))
+        self.RESET_PASSWORD_MAX_TRACKED_USERS = int(os.getenv("RESET_PASSWORD_MAX_TRACKED_USERS", "10000"))
+        # Background reset jobs, opt-in (needs migrations/002 and 003); false runs the reset inside the turn
+        self.RESET_PASSWORD_JOBS_ENABLED = os.getenv("RESET_PASSWORD_JOBS_ENABLED", "false").lower() == "true"
+        self.RESET_PASSWORD_JOB_CONCURRENCY = int(os.getenv("RESET_PASSWORD_JOB_CONCURRENCY", "4"))
+        self.RESET_PASSWORD_JOB_POLL_INTERVAL = float(os.getenv("RESET_PASSWORD_JOB_POLL_INTERVAL", "5"))
+        self.RESET_PASSWORD_JOB_STALE_AFTER = float(os.getenv("RESET_PASSWORD_JOB_STALE_AFTER", "300"))
+        # Runs of a job left running by a stopped worker; only jobs that never reached the SAP call are run again
+        self.RESET_PASSWORD_JOB_MAX_ATTEMPTS = int(os.getenv("RESET_PASSWORD_JOB_MAX_ATTEMPTS", "3"))
+        # "blob" (Azure Blob Storage) or "memory" (local runs and benchmarks only)
+        self.STATE_STORAGE = os.getenv("STATE_STORAGE", "blob").lower()
+        # Opt-in local state cache; its entries are served for up to the TTL, so keep it short with several workers
+        self.STATE_CACHE_ENABLED = os.getenv("STATE_CACHE_ENABLED", "false").lower() == "true"
+        self.STATE_CACHE_MAX_ITEMS = int(os.getenv("STATE_CACHE_MAX_ITEMS", "10000"))
+        self.STATE_CACHE_TTL = float(os.getenv("STATE_CACHE_TTL", "30"))
+        self.STATE_FLUSH_INTERVAL = float(os.getenv("STATE_FLUSH_INTERVAL", "1.0"))
+        # "write_through" (every write awaits the backing store) or "write_behind" (batched background flush; a
+        # write rejected by the backing store's eTag check is only logged, the turn has already finished)
+        self.STATE_DURABILITY = os.getenv("STATE_DURABILITY", "write_through")
+        self.LOG_SINK_QUEUE_SIZE = int(os.getenv("LOG_SINK_QUEUE_SIZE", "10000"))
+        self.LOG_SINK_BATCH_SIZE = int(os.getenv("LOG_SINK_BATCH_SIZE", "200"))
+        self.LOG_SINK_FLUSH_INTERVAL = float(os.getenv("LOG_SINK_FLUSH_INTERVAL", "1.0"))
+        # Full SQLAlchemy URL replacing the Key Vault DB settings, e.g. a local Postgres or "sqlite+aiosqlite:///..."
+        self.DB_URL = os.getenv("DB_URL") or None
+        # Size the pool for the worker count: each worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+        self.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        self.DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        # PgBouncer in transaction mode cannot keep prepared statements across transactions
+        self.DB_PGBOUNCER_MODE = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+        self.DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+        self.DB_POOL_PREWARM_CONNECTIONS = int(os.getenv("DB_POOL_PREWARM_CONNECTIONS", "2"))
+        # Accept-then-process mode of /api/messages: TURN_QUEUE_WORKERS conversations processed at a time, at most
+        # TURN_QUEUE_SIZE activities waiting in total and TURN_QUEUE_CONVERSATION_SIZE per conversation
+        self.TURN_QUEUE_ENABLED = os.getenv("TURN_QUEUE_ENABLED", "false").lower() == "true"
+        self.TURN_QUEUE_WORKERS = int(os.getenv("TURN_QUEUE_WORKERS", "32"))
+        self.TURN_QUEUE_SIZE = int(os.getenv("TURN_QUEUE_SIZE", "1000"))
+        self.TURN_QUEUE_CONVERSATION_SIZE = int(os.getenv("TURN_QUEUE_CONVERSATION_SIZE", "20"))
+        self.TURN_QUEUE_SHUTDOWN_GRACE = float(os.getenv("TURN_QUEUE_SHUTDOWN_GRACE", "30"))
+        # Startup cache priming; /ready answers 503 until it has finished, and stays at 503 if it fails or times out
+        self.WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+        self.WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+        self.WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "120"))
+        # Per-module settings are "module=value" pairs separated by commas, e.g. "src.database=WARNING"
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+        self.LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+        self.LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+        self.LOG_JSON = os.getenv("LOG_JSON", "true").lower() == "true"
+        # Inbound JWT validation (see src/bots/bot_authentication.py): validated tokens are cached until they expire
+        self.BOT_AUTH_TOKEN_CACHE_ENABLED = os.getenv("BOT_AUTH_TOKEN_CACHE_ENABLED", "true").lower() == "true"
+        self.BOT_AUTH_TOKEN_CACHE_MAX_SIZE = int(os.getenv("BOT_AUTH_TOKEN_CACHE_MAX_SIZE", "10000"))
+        self.BOT_OPENID_KEY_REFRESH_INTERVAL = float(os.getenv("BOT_OPENID_KEY_REFRESH_INTERVAL", "43200"))
+        self.BOT_OPENID_KEY_MIN_REFRESH_INTERVAL = float(os.getenv("BOT_OPENID_KEY_MIN_REFRESH_INTERVAL", "300"))
+        # Channel OpenID metadata override, e.g. a stub server for locally minted tokens (unset: Bot Framework's)
+        self.BOT_OPENID_METADATA_URL = os.getenv("BOT_OPENID_METADATA_URL") or None
+        # Zipkin v2 span endpoint of a local collector, e.g. "http://localhost:9411/api/v2/spans" (unset: metrics only)
+        self.TRACE_EXPORT_URL = os.getenv("TRACE_EXPORT_URL") or None
+        self.TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+        self.TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "saphira")
+        self.KEY_VAULT_MAX_CONCURRENCY = int(os.getenv("KEY_VAULT_MAX_CONCURRENCY", "6"))
+        self.KEY_VAULT_RETRIES = int(os.getenv("KEY_VAULT_RETRIES", "3"))
+        self.KEY_VAULT_RETRY_BACKOFF = float(os.getenv("KEY_VAULT_RETRY_BACKOFF", "0.5"))
+        # The secret cache is only used when both a path and a Fernet key (Fernet.generate_key()) are set
+        self.SECRET_CACHE_PATH = os.getenv("SECRET_CACHE_PATH") or None
+        self.SECRET_CACHE_KEY = os.getenv("SECRET_CACHE_KEY") or None
+        self.SECRET_CACHE_TTL = float(os.getenv("SECRET_CACHE_TTL", "900"))
+
         if not self._key_vault_url:
-            print(
-                "CRITICAL WARNING: AZURE_KEY_VAULT_URL is not set in .env. Key Vault loading will fail.")
+            logger.warning("AZURE_KEY_VAULT_URL is not set in .env. Key Vault loading will fail.")
 
-    async def load_secrets_from_keyvault(self):
+    async def load_secrets_from_keyvault(self, secret_client: "SecretClient | None" = None):
         """
         Authenticates with Azure and loads secrets from Key Vault.
+        Secrets are fetched concurrently (at most KEY_VAULT_MAX_CONCURRENCY at a time) with retries, and are served
+        from the encrypted local secret cache instead when it is configured and fresh.
         Uses ClientSecretCredential for local development based on .env.
         Consider using DefaultAzureCredential or ManagedIdentityCredential for deployment.
+        A secret_client (e.g. a local fake exposing `async get_secret(name)`) replaces the Key Vault client.
         """
-        if not self._key_vault_url:
-            print("Skipping Key Vault loading as URL is not configured.")
+        if not self._key_vault_url and secret_client is None:
+            logger.info("Skipping Key Vault loading as URL is not configured.")
             return
 
+        secret_names = {attribute: os.getenv(env_name) for attribute, (env_name, _) in KEY_VAULT_SECRETS.items()}
+        fingerprint = hashlib.sha256(
+            repr((self._key_vault_url, sorted(secret_names.items()))).encode("utf-8")).hexdigest()
+        secret_cache = self._get_secret_cache()
+
+        if secret_cache:
+            cached_secrets = secret_cache.load(fingerprint)
+            if cached_secrets is not None:
+                self._apply_secrets(cached_secrets)
+                logger.info("Secrets loaded from the local secret cache.")
+                return
+
+        from azure.identity.aio import ClientSecretCredential, DefaultAzureCredential
+        from azure.keyvault.secrets.aio import SecretClient
+
         credential = None
+        client = secret_client
         try:
-            # Prioritize ClientSecretCredential if credentials are provided in .env
-            if all([self._client_id, self._client_secret, self._tenant_id]):
-                credential = ClientSecretCredential(
-                    self._tenant_id, self._client_id, self._client_secret)
-                print("Using ClientSecretCredential for Key Vault.")
-            else:
-                # Fallback to DefaultAzureCredential if explicit creds are missing
-                print(
-                    "ClientSecretCredential details missing, attempting DefaultAzureCredential.")
-                credential = DefaultAzureCredential()
-
-            client = SecretClient(
-                vault_url=self._key_vault_url, credential=credential)
-            print(
-                f"Attempting to load secrets from Key Vault at {self._key_vault_url}...")
-            # Load secrets by name from Key Vault using the secret names from .env
-            # Need to define *_SECRET_NAME variables in .env if not already
-            self.MICROSOFT_APP_ID = (await client.get_secret(os.getenv("DEV_MICROSOFT_APP_ID"))).value
-            self.MICROSOFT_APP_PASSWORD = (await client.get_secret(os.getenv("DEV_MICROSOFT_APP_PASSWORD"))).value
-            self.AZURE_STORAGE_CONNECTION_STRING = (await client.get_secret(os.getenv("AZURE_STORAGE_CONNECTION_STRING"))).value
-            self.AZURE_STORAGE_CONTAINER_NAME = (await client.get_secret(os.getenv("AZURE_STORAGE_CONTAINER_NAME"))).value
-            self.DB_SERV = (await client.get_secret(os.getenv("DB_SERV_SECRET_NAME"))).value
-            self.DB_NAME = (await client.get_secret(os.getenv("DB_NAME_SECRET_NAME"))).value
-            self.DB_USER = (await client.get_secret(os.getenv("DB_USER_SECRET_NAME"))).value
-            self.DB_PASS = (await client.get_secret(os.getenv("DB_PASS_SECRET_NAME"))).value
-            self.DB_PORT = int((await client.get_secret(os.getenv("DB_PORT_SECRET_NAME"))).value)
-            self.AMMAN_RP_SAP_SERV = (await client.get_secret(os.getenv("AMMAN_RP_SAP_SERV"))).value
-            self.AMMAN_RP_SAP_USER = (await client.get_secret(os.getenv("AMMAN_RP_SAP_USER"))).value
-            self.AMMAN_RP_SAP_PASS = (await client.get_secret(os.getenv("AMMAN_RP_SAP_PASS"))).value
-
-            print("Secrets loaded successfully from Key Vault.")
+            if client is None:
+                # Prioritize ClientSecretCredential if credentials are provided in .env
+                if all([self._client_id, self._client_secret, self._tenant_id]):
+                    credential = ClientSecretCredential(
+                        self._tenant_id, self._client_id, self._client_secret)
+                    logger.info("Using ClientSecretCredential for Key Vault.")
+                else:
+                    # Fallback to DefaultAzureCredential if explicit creds are missing
+                    logger.info("ClientSecretCredential details missing, attempting DefaultAzureCredential.")
+                    credential = DefaultAzureCredential()
+
+                client = SecretClient(
+                    vault_url=self._key_vault_url, credential=credential)
+            logger.info("Attempting to load secrets from Key Vault at %s...", self._key_vault_url)
+
+            semaphore = asyncio.Semaphore(self.KEY_VAULT_MAX_CONCURRENCY)
+            values = await asyncio.gather(*[
+                self._get_secret_with_retry(client, semaphore, secret_name) for secret_name in secret_names.values()
+            ])
+            secrets = dict(zip(secret_names.keys(), values))
+            self._apply_secrets(secrets)
+            logger.info("Secrets loaded successfully from Key Vault.")
         except Exception as e:
-            print(f"ERROR loading secrets from Key Vault: {e}")
+            logger.error("Error loading secrets from Key Vault: %s", e)
             raise ValueError("Loading Azure Key Vault credentials error")
         finally:
-            print(f"Azure key vault closing session")
-            await client.close()
-            await credential.close()
+            # An injected client is owned by the caller
+            if secret_client is None:
+                logger.info("Azure key vault closing session")
+                if client is not None:
+                    await client.close()
+                if credential is not None:
+                    await credential.close()
+
+        if secret_cache:
+            try:
+                secret_cache.save(fingerprint, secrets)
+            except OSError as e:
+                logger.warning("Could not write the local secret cache: %s", e)
+
+    async def _get_secret_with_retry(self, client: "SecretClient", semaphore: asyncio.Semaphore, name: str) -> str:
+        """Fetches one secret value, retrying transient failures with exponential backoff."""
+        from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError
+
+        # Key Vault errors that a retry cannot fix
+        non_retryable_errors = (ClientAuthenticationError, ResourceNotFoundError)
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    return (await client.get_secret(name)).value
+            except non_retryable_errors:
+                raise
+            except Exception as e:
+                if attempt >= self.KEY_VAULT_RETRIES:
+                    raise
+                delay = self.KEY_VAULT_RETRY_BACKOFF * (2 ** attempt)
+                attempt += 1
+                logger.warning("Retrying Key Vault secret %s in %.2fs (attempt %s): %s", name, delay, attempt, e)
+                await asyncio.sleep(delay)
+
+    def _apply_secrets(self, secrets: dict[str, str]):
+        """Sets the config attributes from the raw secret values."""
+        for attribute, (_, converter) in KEY_VAULT_SECRETS.items():
+            setattr(self, attribute, converter(secrets[attribute]))
+
+    def _get_secret_cache(self) -> SecretCache | None:
+        if not (self.SECRET_CACHE_PATH and self.SECRET_CACHE_KEY):
+            return None
+        try:
+            return SecretCache(self.SECRET_CACHE_PATH, self.SECRET_CACHE_KEY, self.SECRET_CACHE_TTL)
+        except ValueError as e:
+            logger.warning("Local secret cache disabled, invalid SECRET_CACHE_KEY: %s", e)
+            return None
 
 
 # Global variable to hold the loaded configuration instance, or act like singleton
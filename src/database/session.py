@@ -1,43 +1,133 @@
-from typing import AsyncGenerator
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 import ssl
+import time
+from uuid import uuid4
 from urllib.parse import quote_plus
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config import app_config
 from src.database.base import Base
 import src.models.model_relationships
+from src.utils.metrics import METRICS
+from src.utils.tracing import record_span, sql_span_name
+
+logger = logging.getLogger(__name__)
 
 async_engine: AsyncEngine = None
 async_session_factory = None
 
+# Time spent waiting for a pooled connection, in seconds
+POOL_WAIT_HISTOGRAM = METRICS.histogram(
+    "saphira_db_pool_wait_seconds", "Time spent waiting for a pooled database connection.")
+# Time repository units of work held their own session (and its connection, once a statement ran)
+SESSION_SCOPE_HISTOGRAM = METRICS.histogram(
+    "saphira_db_session_scope_seconds", "Time repository units of work held their own database session.")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording how long each connection checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_HISTOGRAM.observe(time.perf_counter() - started)
+
+
+def _instrument_engine(engine: AsyncEngine):
+    """Records a tracing span (kind "sql") for every statement executed by the engine."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_span("sql", sql_span_name(statement), context._trace_started, time.perf_counter())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        started = getattr(exception_context.execution_context, "_trace_started", None)
+        if started is not None:
+            record_span(
+                "sql", sql_span_name(exception_context.statement or ""), started, time.perf_counter(),
+                error=type(exception_context.original_exception).__name__
+            )
+
+
+def _pool_connection_counts() -> dict[tuple[str, ...], int]:
+    stats = get_pool_stats()
+    # The pool reports overflow as negative while it has not opened all of its pool_size connections
+    return {
+        ("checked_in",): stats["checked_in"],
+        ("checked_out",): stats["checked_out"],
+        ("overflow",): max(stats["overflow"], 0),
+    }
+
+
+METRICS.gauge(
+    "saphira_db_pool_connections", "Connections of the database pool by state.", _pool_connection_counts, ("state",))
+
 
 async def initialize_database_pool():
     """Initializes the async database engine and session factory using loaded config."""
     global async_engine, async_session_factory  # Use global keyword to modify the module-level variables
 
-    # Ensure config attributes are populated before building URL
-    if not all([app_config.DB_USER, app_config.DB_PASS, app_config.DB_SERV, app_config.DB_PORT, app_config.DB_NAME]):
-        print("CRITICAL ERROR: Database configuration not loaded. Cannot initialize pool.")
-        # Decide how to handle failure - maybe raise an error or exit
-        raise ValueError("Database configuration is missing.")
+    if app_config.DB_URL:
+        # Local database (development, benchmarks): used as given, without the Azure SSL settings
+        DATABASE_URL = app_config.DB_URL
+        connect_args = {}
+    else:
+        # Ensure config attributes are populated before building URL
+        if not all([app_config.DB_USER, app_config.DB_PASS, app_config.DB_SERV, app_config.DB_PORT, app_config.DB_NAME]):
+            logger.critical("Database configuration not loaded. Cannot initialize pool.")
+            # Decide how to handle failure - maybe raise an error or exit
+            raise ValueError("Database configuration is missing.")
+
+        # Build the async database connection URL
+        # Use asyncpg for PostgreSQL
+        DATABASE_URL = f"postgresql+asyncpg://{quote_plus(app_config.DB_USER)}:{quote_plus(app_config.DB_PASS)}@{app_config.DB_SERV}:{app_config.DB_PORT}/{app_config.DB_NAME}"
+
+        # Add SSL parameters if needed for Azure PostgreSQL Flexible Server
+        ssl_context = ssl.create_default_context()
+        connect_args = {"ssl": ssl_context}
 
-    # Build the async database connection URL
-    # Use asyncpg for PostgreSQL
-    DATABASE_URL = f"postgresql+asyncpg://{quote_plus(app_config.DB_USER)}:{quote_plus(app_config.DB_PASS)}@{app_config.DB_SERV}:{app_config.DB_PORT}/{app_config.DB_NAME}"
-    # use for sqllite
-    # DATABASE_URL = "sqlite:///db.sqlite"
+    # The statement cache settings only apply to asyncpg
+    if DATABASE_URL.startswith("postgresql+asyncpg"):
+        query_separator = "&" if "?" in DATABASE_URL else "?"
+        if app_config.DB_PGBOUNCER_MODE:
+            # No prepared statement caching (asyncpg and SQLAlchemy) and unique statement names,
+            # so statements never collide on server connections shared through PgBouncer
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+            DATABASE_URL += f"{query_separator}prepared_statement_cache_size=0"
+        else:
+            connect_args["statement_cache_size"] = app_config.DB_STATEMENT_CACHE_SIZE
+            DATABASE_URL += f"{query_separator}prepared_statement_cache_size={app_config.DB_STATEMENT_CACHE_SIZE}"
 
-    # Add SSL parameters if needed for Azure PostgreSQL Flexible Server
     # Create the async engine
-    # echo=True for debugging SQL queries (turn off in production)
-    ssl_context = ssl.create_default_context()
+    # DB_ECHO=true for debugging SQL queries (keep off in production)
     async_engine = create_async_engine(
         DATABASE_URL,
-        connect_args={"ssl": ssl_context},
-        echo=True,
+        connect_args=connect_args,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=app_config.DB_POOL_SIZE,
+        max_overflow=app_config.DB_MAX_OVERFLOW,
+        pool_timeout=app_config.DB_POOL_TIMEOUT,
+        pool_recycle=app_config.DB_POOL_RECYCLE,
+        pool_pre_ping=app_config.DB_POOL_PRE_PING,
+        echo=app_config.DB_ECHO,
         future=True
     )
+    _instrument_engine(async_engine)
 
     # Create an async session factory
     # expire_on_commit=False is often needed with async sessions
@@ -47,17 +137,101 @@ async def initialize_database_pool():
         expire_on_commit=False,
     )
 
-    print("Database engine and session factory created.")
+    logger.info("Database engine and session factory created.")
+
+
+async def prewarm_database_pool(connections: int):
+    """
+    Opens up to `connections` pool connections concurrently (at most DB_POOL_SIZE) and returns them to the pool,
+    so the first requests do not pay for TCP/TLS/auth handshakes.
+    """
+    if async_engine is None:
+        raise RuntimeError(
+            "Database engine not initialized. Call initialize_database_pool first.")
+    connections = min(connections, app_config.DB_POOL_SIZE)
+    if connections <= 0:
+        return
+
+    # All connections are held at the same time, otherwise the pool would hand out the same one again
+    results = await asyncio.gather(
+        *[async_engine.connect().start() for _ in range(connections)], return_exceptions=True)
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    failures = [result for result in results if isinstance(result, BaseException)]
+    try:
+        # Like the connect failures above, a failed check is logged and does not abort startup
+        checks = await asyncio.gather(
+            *[connection.execute(text("SELECT 1")) for connection in opened], return_exceptions=True)
+        broken = [connection for connection, check in zip(opened, checks) if isinstance(check, BaseException)]
+        failures.extend(check for check in checks if isinstance(check, BaseException))
+        # Not returned to the pool as warm connections
+        await asyncio.gather(*[connection.invalidate() for connection in broken], return_exceptions=True)
+    finally:
+        await asyncio.gather(*[connection.close() for connection in opened], return_exceptions=True)
+
+    warmed = connections - len(failures)
+    if failures:
+        logger.warning("Pre-warmed %s of %s database connections: %s", warmed, connections, failures[0])
+    else:
+        logger.info("Pre-warmed %s database connections.", warmed)
+
+
+def get_session_factory() -> sessionmaker:
+    """Returns the session factory, for components that manage their own sessions outside a request."""
+    if async_session_factory is None:
+        raise RuntimeError(
+            "Database session factory not initialized. Call initialize_database_pool first.")
+    return async_session_factory
+
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession | None = None) -> AsyncIterator[AsyncSession]:
+    """
+    One repository unit of work.
+    With a session, the caller owns the transaction: the session is used as is and left open.
+    Without one, a session is opened from the pool, committed when the block succeeds (rolled back otherwise) and
+    closed right away, so its connection is only checked out while the statements run, not for the whole turn.
+    """
+    if session is not None:
+        yield session
+        return
+
+    started = time.perf_counter()
+    try:
+        async with get_session_factory()() as owned_session:
+            try:
+                yield owned_session
+                await owned_session.commit()
+            except BaseException:
+                await owned_session.rollback()
+                raise
+    finally:
+        SESSION_SCOPE_HISTOGRAM.observe(time.perf_counter() - started)
+
+
+def get_pool_stats() -> dict[str, any]:
+    """Live statistics of the connection pool, including the checkout wait time histogram."""
+    if async_engine is None:
+        raise RuntimeError(
+            "Database engine not initialized. Call initialize_database_pool first.")
+    pool = async_engine.pool
+    return {
+        "pool_size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": app_config.DB_MAX_OVERFLOW,
+        "wait_seconds": POOL_WAIT_HISTOGRAM.snapshot(),
+    }
 
 
 async def close_database_pool():
     """Disposes the database engine."""
     if async_engine:
-        print("Disposing database engine...")
+        logger.info("Disposing database engine...")
         await async_engine.dispose()
-        print("Database engine disposed.")
+        logger.info("Database engine disposed.")
     else:
-        print("Database engine was not initialized, no pool to dispose.")
+        logger.info("Database engine was not initialized, no pool to dispose.")
 
 
 async def create_db_and_tables():
@@ -66,12 +240,12 @@ async def create_db_and_tables():
         if async_engine is None:
             raise RuntimeError(
                 "Database engine not initialized. Call initialize_database_pool first.")
-        print("Creating database tables (if they don't exist)...")
+        logger.info("Creating database tables (if they don't exist)...")
         async with async_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
-        print("Database tables checked/created.")
+        logger.info("Database tables checked/created.")
     except Exception as e:
-        print(f"ERROR: Could not create database during startup: {e}")
+        logger.error("Could not create database during startup: %s", e)
         raise
 
 
@@ -87,17 +261,16 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
     async with async_session_factory() as session:
         try:
-            print("--- DB: Providing async session ---")
+            logger.debug("DB: Providing async session")
             yield session  # Provide the session to the endpoint/dependencies
             # If no exceptions occurred, commit the transaction
             # print("--- DB: Committing session changes")
             # await session.commit()
         except Exception as e:
-            print(
-                f"--- DB ERROR: Rolling back session changes due to exception: {e} ---")
+            logger.error("DB: Rolling back session changes due to exception: %s", e)
             await session.rollback()
             # Re-raise the exception so FastAPI's error handling can catch it
             raise
         finally:
-            print("--- DB: Closing async session ---")
+            logger.debug("DB: Closing async session")
             await session.close()
@@ -1,8 +1,7 @@
 from typing import AsyncGenerator
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from botbuilder.core import TurnContext, BotFrameworkAdapter, BotFrameworkAdapterSettings, AutoSaveStateMiddleware
-from src.config import app_config, Config
+from src.config import app_config
 from src.database.session import get_async_session
 from src.bots.saphira_activity_handler import SaphiraActivityHandler
 from src.repositories.contact_repository import ContactRepository
@@ -10,14 +9,18 @@ from src.repositories.faq_repository import FaqRepository
 from src.repositories.object_repository import ObjectRepository
 from src.repositories.domain_client_repository import DomainClientRepository
 from src.repositories.log_repository import LogRepository
-from src.services.contact_service import ContactService
-from src.services.domain_client_service import DomainClientService
+from src.services.contact_service import ContactService, get_stream_matcher_cache
+from src.services.domain_client_service import DomainClientService, get_domain_client_cache
 from src.services.reset_password_service import ResetPasswordService
+from src.services.reset_password_job_runner import ResetPasswordJobRunner, get_reset_password_job_runner
 from src.services.log_service import LogService
+from src.services.log_sink import LogSink, get_log_sink
 from src.services.faq_service import FaqService
-from src.clients.sap.sap_client_factory import SapClientFactory
-from src.middleware.authorization_middleware import AuthorizationMiddleware
-from src.bots.bot_state_management import StateAccessorMiddleware, ConversationState, UserState, get_conversation_state, get_user_state
+from src.services.faq_search_index import FaqIndexRegistry, get_faq_index_registry
+from src.clients.sap.sap_client_factory import SapClientFactory, get_sap_client_factory as get_app_sap_client_factory
+from src.utils.cache import TTLCache
+from src.middleware.turn_services_middleware import DOMAIN_CLIENT_SERVICE_KEY
+from src.bots.bot_adapter import CachingBotFrameworkAdapter, get_bot_adapter as get_app_bot_adapter
 
 """
 the wiring diagram that defines how instances of the adapter, handler, state accessors, database sessions, and later, all services and AI components are created and provided to the parts of the application (like the /api/messages endpoint) that need them.
@@ -31,110 +34,73 @@ def get_config():  # Dependency function for configuration
 
 # Dependency function for async database session
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
-    """Provides an async database session."""
+    """
+    Provides an async database session held until the response is sent.
+    The bot's repositories do not use it: they open a session per unit of work (see session_scope), so a turn only
+    holds a pooled connection while its queries run.
+    """
     async for session in get_async_session():
         yield session
 
 
-def get_domain_client_repository(session: AsyncSession = Depends(get_db_session)) -> DomainClientRepository:
-    """Provides the DomainClientRepository instance with an injected session."""
-    repo = DomainClientRepository(session=session)
+def get_domain_client_repository() -> DomainClientRepository:
+    """Provides the DomainClientRepository instance; each query runs in its own short session."""
+    repo = DomainClientRepository()
     return repo
 
 
-def get_domain_client_service(domain_client_repo: DomainClientRepository = Depends(get_domain_client_repository)) -> DomainClientService:
-    """Provides the DomainClientService instance with an injected repository."""
-    service = DomainClientService(domain_client_repo=domain_client_repo)
+def get_domain_client_service(
+    domain_client_repo: DomainClientRepository = Depends(get_domain_client_repository),
+    cache: TTLCache = Depends(get_domain_client_cache)
+) -> DomainClientService:
+    """Provides the DomainClientService instance with an injected repository and the app-scoped lookup cache."""
+    service = DomainClientService(domain_client_repo=domain_client_repo, cache=cache)
     return service
 
 
-def get_authorization_middleware(
+def get_bot_adapter() -> CachingBotFrameworkAdapter:
+    """Provides the app-scoped Bot Framework Adapter (created during lifespan startup)."""
+    return get_app_bot_adapter()
+
+
+def get_turn_services(
     domain_client_service: DomainClientService = Depends(
         get_domain_client_service)
-) -> AuthorizationMiddleware:
-    """Provides the AuthorizationMiddleware instance with injected dependencies."""
-    print("--- Inside get_authorization_middleware ---")
-    # middleware = AuthorizationMiddleware()
-    # *** Need to pass the service to the middleware instance if its constructor accepts it ***
-    # Let's update AuthorizationMiddleware __init__
-    middleware = AuthorizationMiddleware(
-        domain_client_service=domain_client_service)
-    print("AuthorizationMiddleware instantiated.")
-    return middleware
-
-
-def get_bot_adapter(
-    config: Config = Depends(get_config),
-    conversation_state: ConversationState = Depends(get_conversation_state),
-    user_state: UserState = Depends(get_user_state),
-    auth_middleware: AuthorizationMiddleware = Depends(
-        get_authorization_middleware)
-) -> BotFrameworkAdapter:
-    """Provides the Bot Framework Adapter."""
-    print("--- Inside get_bot_adapter ---")
-    adapter_settings = BotFrameworkAdapterSettings(
-        config.MICROSOFT_APP_ID,
-        config.MICROSOFT_APP_PASSWORD
-    )
-    adapter = BotFrameworkAdapter(adapter_settings)
-    print("BotFrameworkAdapter instantiated with state objects.")
-
-    async def on_turn_error(turn_context: TurnContext, error: Exception):
-        print(f"\n [on_turn_error] unhandled error in bot: {error}")
-        await turn_context.send_activity("The bot encountered an error or bug.")
-        await turn_context.send_trace_activity(
-            "OnTurnError Trace",
-            f"{error}",
-            "https://www.botframework.com/schemas/error",
-            "TurnError"
-        )
-        try:
-            await conversation_state.save_changes(turn_context, True)
-            await user_state.save_changes(turn_context, True)
-            print("[on_turn_error] State saved after error.")
-        except Exception as save_error:
-            print(f"[on_turn_error] Error saving state: {save_error}")
-
-    adapter.on_turn_error = on_turn_error
-    # *** ADD MIDDLEWARE IN ORDER OF EXECUTION ***
-    # 1. Add State Accessors to TurnContext
-    adapter.use(StateAccessorMiddleware())
-    # 2. Authorization Middleware (Checks if user is authorized)
-    adapter.use(auth_middleware)
-    # 3. Auto-save State Middleware (Saves state if not stopped by auth)
-    adapter.use(AutoSaveStateMiddleware([conversation_state, user_state]))
-    print("--- Exiting get_bot_adapter ---")
-    return adapter
-
-
-def get_contact_repository(session: AsyncSession = Depends(get_db_session)) -> ContactRepository:
-    """Provides the ContactRepository instance with an injected session."""
-    repo = ContactRepository(session=session)
+) -> dict[str, any]:
+    """Provides the per-request services exposed to the adapter's middleware through TurnContext.turn_state."""
+    return {DOMAIN_CLIENT_SERVICE_KEY: domain_client_service}
+
+
+def get_contact_repository() -> ContactRepository:
+    """Provides the ContactRepository instance; each query runs in its own short session."""
+    repo = ContactRepository()
     return repo
 
 
-def get_contact_service(contact_repo: ContactRepository = Depends(get_contact_repository)) -> ContactService:
-    """Provides the ContactService instance with an injected repository."""
-    service = ContactService(contact_repo=contact_repo)
+def get_contact_service(
+    contact_repo: ContactRepository = Depends(get_contact_repository),
+    stream_matcher_cache: TTLCache = Depends(get_stream_matcher_cache)
+) -> ContactService:
+    """Provides the ContactService instance with an injected repository and the app-scoped stream matcher cache."""
+    service = ContactService(contact_repo=contact_repo, stream_matcher_cache=stream_matcher_cache)
     return service
 
 
-def get_log_repository(session: AsyncSession = Depends(get_db_session)) -> LogRepository:
-    """Provides the LogRepository instance with an injected session."""
-    repo = LogRepository(session=session)
+def get_log_repository() -> LogRepository:
+    """Provides the LogRepository instance; each insert is committed in its own short session."""
+    repo = LogRepository()
     return repo
 
 
-def get_log_service(log_repo: LogRepository = Depends(get_log_repository)) -> LogService:
-    """Provides the LogService instance with an injected session."""
-    service = LogService(log_repo=log_repo)
+def get_log_service(log_sink: LogSink = Depends(get_log_sink)) -> LogService:
+    """Provides the LogService instance with the app-scoped log sink."""
+    service = LogService(log_sink=log_sink)
     return service
 
 
-def get_sap_client_factory(config: AsyncSession = Depends(get_config)) -> SapClientFactory:
-    """Provides the SapClientFactory instance with an injected session."""
-    factory = SapClientFactory(config=config)
-    return factory
+def get_sap_client_factory() -> SapClientFactory:
+    """Provides the app-scoped SapClientFactory (created during lifespan startup)."""
+    return get_app_sap_client_factory()
 
 
 def get_reset_password_service(
@@ -149,21 +115,24 @@ def get_reset_password_service(
     return service
 
 
-def get_faq_repository(session: AsyncSession = Depends(get_db_session)) -> FaqRepository:
-    """Provides the FaqRepository instance with an injected session."""
-    repo = FaqRepository(session=session)
+def get_faq_repository() -> FaqRepository:
+    """Provides the FaqRepository instance; each query runs in its own short session."""
+    repo = FaqRepository()
     return repo
 
 
-def get_faq_service(faq_repo: FaqRepository = Depends(get_faq_repository)) -> FaqService:
-    """Provides the LogService instance with an injected session."""
-    service = FaqService(faq_repo=faq_repo)
+def get_faq_service(
+    faq_repo: FaqRepository = Depends(get_faq_repository),
+    faq_index_registry: FaqIndexRegistry = Depends(get_faq_index_registry)
+) -> FaqService:
+    """Provides the FaqService instance with an injected repository and the app-scoped FAQ index registry."""
+    service = FaqService(faq_repo=faq_repo, faq_index_registry=faq_index_registry)
     return service
 
 
-def get_object_repository(session: AsyncSession = Depends(get_db_session)) -> ObjectRepository:
-    """Provides the ObjectRepository instance with an injected session."""
-    repo = ObjectRepository(session=session)
+def get_object_repository() -> ObjectRepository:
+    """Provides the ObjectRepository instance; each query runs in its own short session."""
+    repo = ObjectRepository()
     return repo
 
 
@@ -174,7 +143,7 @@ def get_saphira_activity_handler(
         get_domain_client_service),
     reset_password_service: ResetPasswordService = Depends(
         get_reset_password_service),
-    db_session: AsyncSession = Depends(get_db_session)
+    reset_password_job_runner: ResetPasswordJobRunner | None = Depends(get_reset_password_job_runner)
 ) -> SaphiraActivityHandler:
     """Provides the Saphira Activity Handler."""
     handler = SaphiraActivityHandler(
@@ -182,7 +151,24 @@ def get_saphira_activity_handler(
         contact_service=contact_service,
         domain_client_service=domain_client_service,
         reset_password_service=reset_password_service,
-        db_session=db_session
+        reset_password_job_runner=reset_password_job_runner
         # agno_agent=agno_agent
     )
     return handler
+
+
+def create_turn_dependencies() -> tuple[SaphiraActivityHandler, dict[str, any]]:
+    """
+    Builds the activity handler and the turn services of one turn, without FastAPI's dependency injection.
+    Used by /api/messages only when it runs the turn inline, and by the turn queue workers (accept-then-process mode),
+    where the request's dependencies are already closed.
+    """
+    domain_client_service = get_domain_client_service(get_domain_client_repository(), get_domain_client_cache())
+    handler = get_saphira_activity_handler(
+        faq_service=get_faq_service(get_faq_repository(), get_faq_index_registry()),
+        contact_service=get_contact_service(get_contact_repository(), get_stream_matcher_cache()),
+        domain_client_service=domain_client_service,
+        reset_password_service=get_reset_password_service(get_sap_client_factory(), get_log_service(get_log_sink())),
+        reset_password_job_runner=get_reset_password_job_runner()
+    )
+    return handler, get_turn_services(domain_client_service)
@@ -1,40 +1,107 @@
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.config import app_config
-from src.database.session import initialize_database_pool, close_database_pool
+from src.database.session import initialize_database_pool, close_database_pool, prewarm_database_pool, get_pool_stats
 from src.api.routes import chatbot
+from src.api.routes.chatbot import process_queued_turn
 from src.bots.bot_state_management import initialize_state_management, close_state_management
+from src.bots.bot_adapter import initialize_bot_adapter, close_bot_adapter
+from src.bots.bot_authentication import initialize_bot_authentication, close_bot_authentication
+from src.bots.turn_queue import initialize_turn_queue, close_turn_queue
+from src.clients.sap.sap_client_factory import initialize_sap_clients, close_sap_clients
+from src.services.log_sink import initialize_log_sink, close_log_sink, get_log_sink
+from src.services.warmup_service import initialize_warmup, close_warmup, get_warmup_state
+from src.services.reset_password_job_runner import initialize_reset_password_jobs, close_reset_password_jobs
+from src.utils.log_utils import setup_logging, shutdown_logging
+from src.utils.metrics import get_metrics_registry
+from src.utils.tracing import initialize_tracing, close_tracing
+
+setup_logging(
+    level=app_config.LOG_LEVEL,
+    module_levels=app_config.LOG_MODULE_LEVELS,
+    sample_rates=app_config.LOG_SAMPLE_RATES,
+    json_format=app_config.LOG_JSON
+)
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Load configuration from Key Vault (optional)
-    print("Application startup: Loading configuration...")
+    logger.info("Application startup: Loading configuration...")
     await app_config.load_secrets_from_keyvault()
 
-    print("Initializing state management...")
+    # Startup: Initializers that only need the configuration. They only create clients and engines (no I/O), so they
+    # run one after the other.
+    logger.info("Initializing state management, database pool, SAP clients, tracing and bot authentication...")
     await initialize_state_management()
-    print("State management initialized.")
-
-    # Startup: Initialize database pool
-    print("Initializing database pool...")
     await initialize_database_pool()
-    print("Database pool initialized.")
+    await initialize_sap_clients()
+    await initialize_tracing(app_config.TRACE_EXPORT_URL, app_config.TRACE_SERVICE_NAME, app_config.TRACE_SAMPLE_RATE)
+    await initialize_bot_authentication()
+    logger.info("State management, database pool, SAP clients, tracing and bot authentication initialized.")
+
+    # Startup: The log sink needs the database pool, the adapter's middleware pipeline needs state management.
+    # Pool connections are opened up front (concurrently, see prewarm_database_pool) so the first requests do not pay
+    # for the handshakes.
+    logger.info("Starting log sink, bot adapter and pre-warming database pool...")
+    await initialize_log_sink()
+    await initialize_bot_adapter()
+    await prewarm_database_pool(app_config.DB_POOL_PREWARM_CONNECTIONS)
+    logger.info("Log sink, bot adapter and database pool ready.")
+
+    # Startup: Background password reset jobs (needs the pool, SAP clients, log sink and adapter)
+    await initialize_reset_password_jobs()
+
+    # Startup: Turn queue workers of the accept-then-process mode (optional)
+    if app_config.TURN_QUEUE_ENABLED:
+        await initialize_turn_queue(
+            process_queued_turn, app_config.TURN_QUEUE_WORKERS, app_config.TURN_QUEUE_SIZE,
+            app_config.TURN_QUEUE_CONVERSATION_SIZE
+        )
+
+    # Startup: Prime the caches in the background, /ready reports 503 until this has finished (and if it fails)
+    initialize_warmup()
 
     # Startup: Create database tables (Use migrations for production!)
     # await create_db_and_tables() # Uncomment if SQLModel to create tables on startup
     yield
 
-    print("Shutting down database pool...")
+    await close_warmup()
+
+    logger.info("Draining turn queue...")
+    await close_turn_queue(app_config.TURN_QUEUE_SHUTDOWN_GRACE)
+
+    logger.info("Stopping password reset jobs...")
+    await close_reset_password_jobs()
+
+    logger.info("Shutting down bot adapter...")
+    await close_bot_adapter()
+    await close_bot_authentication()
+
+    logger.info("Shutting down SAP clients...")
+    await close_sap_clients()
+    logger.info("SAP clients shut down.")
+
+    logger.info("Draining log sink...")
+    await close_log_sink()
+    logger.info("Log sink drained.")
+
+    logger.info("Shutting down database pool...")
     await close_database_pool()
-    print("Database pool shut down.")
-    print("Application shutdown complete.")
+    logger.info("Database pool shut down.")
 
-    print("Shutting down state management...")
+    logger.info("Shutting down state management...")
     await close_state_management()
-    print("State management shut down.")
-    print("Application shutdown complete.")
+    logger.info("State management shut down.")
+
+    logger.info("Flushing span exporter...")
+    await close_tracing()
+    logger.info("Application shutdown complete.")
+    shutdown_logging()
 
 
 # Create FastAPI app instance
@@ -77,6 +144,40 @@ async def get_app_config():
         "AMMAN_RP_SAP_PASS": app_config.AMMAN_RP_SAP_PASS
     }
 
+
+@app.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 until the startup warm-up has succeeded, so load balancers only route to warm workers."""
+    warmup_state = get_warmup_state()
+    return JSONResponse(
+        content=warmup_state.snapshot(),
+        status_code=status.HTTP_200_OK if warmup_state.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: turn, stage, SQL and HTTP latency histograms plus pool and sink gauges."""
+    return PlainTextResponse(get_metrics_registry().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/stats/log-sink")
+async def get_log_sink_stats():
+    """Queue depth, drop and write counters of the background audit log writer."""
+    return get_log_sink().stats()
+
+
+@app.get("/stats/db-pool")
+async def get_db_pool_stats():
+    """Checked-out/overflow connections and checkout wait times of the database pool."""
+    return get_pool_stats()
+
 # from fastapi import FastAPI
 # from contextlib import asynccontextmanager
 # from src.db.session import init_db
@@ -1,33 +1,31 @@
+import logging
 # bots/authorization_middleware.py
 from botbuilder.core import Middleware, TurnContext
 from botbuilder.schema import ActivityTypes
 from src.services.domain_client_service import DomainClientService
 from src.models.client import Client
+from src.middleware.turn_services_middleware import DOMAIN_CLIENT_SERVICE_KEY
+
+logger = logging.getLogger(__name__)
 
 
 class AuthorizationMiddleware(Middleware):
     """
     Middleware to check if the user's client type is authorized to use the bot.
+    The middleware is app-scoped; the request's DomainClientService is resolved from TurnContext.turn_state.
     """
 
-    def __init__(
-        self,
-        domain_client_service: DomainClientService
-    ):
-        self._domain_client_service = domain_client_service
-
     async def on_turn(self, context: TurnContext, next_logic):
         """
         Processes the turn activity to check for authorization.
         """
-        print("--- Inside AuthorizationMiddleware.on_turn ---")
+        logger.debug("Inside AuthorizationMiddleware.on_turn")
         if context.activity.type in [ActivityTypes.message, ActivityTypes.conversation_update]:
-            # Need to inject service into TurnContext state
-            # domain_client_service: DomainClientService = context.turn_state.get(
-            #     "DomainClientService")
-            if not self._domain_client_service:
-                print(
-                    "CRITICAL ERROR: DomainClientService not available in TurnContext.turn_state for AuthorizationMiddleware.")
+            # Injected into TurnContext state by TurnServicesMiddleware
+            domain_client_service: DomainClientService = context.turn_state.get(
+                DOMAIN_CLIENT_SERVICE_KEY)
+            if not domain_client_service:
+                logger.critical("DomainClientService not available in TurnContext.turn_state for AuthorizationMiddleware.")
                 # Decide how to handle this critical error - maybe send an error message and stop
                 await context.send_activity("An internal error occurred during authorization setup.")
                 return  # Stop the pipeline
@@ -52,8 +50,7 @@ class AuthorizationMiddleware(Middleware):
                     if hasattr(activity.from_property, 'aad_object_id') and activity.from_property.aad_object_id
                     else activity.from_property.id
                 )
-                print(
-                    f"WARNING: Email not directly available in activity for auth check. Using ID/AAD ID: {email}")
+                logger.warning("Email not directly available in activity for auth check. Using ID/AAD ID: %s", email)
 
             # Use the service to determine client details based on email
             # Need to handle the test user mapping here as well for local testing
@@ -64,7 +61,7 @@ class AuthorizationMiddleware(Middleware):
                 email = TEST_USER_MAPPING[user_id]
 
             # Use the service to determine client details
-            client_details: Client | None = await self._domain_client_service.determine_client_details(email)
+            client_details: Client | None = await domain_client_service.determine_client_details(email)
             if not client_details:
                 await context.send_activity("This bot is specifically for Amman users. Your email domain is not recognized as belonging to the Amman client. Please contact your IT support if you believe this is an error.")
                 return
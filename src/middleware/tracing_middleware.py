@@ -0,0 +1,23 @@
+from typing import Awaitable, Callable
+from botbuilder.core import Middleware, TurnContext
+from src.utils.tracing import span
+
+"""
+Tracing for the adapter's middleware pipeline (see src/utils/tracing.py).
+
+TimedMiddleware wraps a middleware in a span (kind "middleware"). The rest of the pipeline runs inside it, so its
+self time is the middleware's own work, e.g. the authorization lookups or the state writes of AutoSaveStateMiddleware.
+"""
+
+
+class TimedMiddleware(Middleware):
+    """Runs the wrapped middleware inside a span named after it."""
+
+    def __init__(self, middleware: Middleware, name: str | None = None):
+        self._middleware = middleware
+        self._name = name or type(middleware).__name__
+
+    async def on_turn(self, context: TurnContext, next_logic: Callable[[], Awaitable]):
+        with span("middleware", self._name):
+            await self._middleware.on_turn(context, next_logic)
+
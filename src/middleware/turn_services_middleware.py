@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from botbuilder.core import Middleware, TurnContext
+
+"""
+The adapter and its middleware pipeline are app-scoped, but some dependencies (DB-backed services) live per request.
+The /api/messages route publishes those per-request dependencies in a context variable, and TurnServicesMiddleware
+copies them into TurnContext.turn_state so middleware and handlers can resolve them for the current turn.
+"""
+# Define turn_state keys for per-request services
+DOMAIN_CLIENT_SERVICE_KEY = "DomainClientService"
+
+_REQUEST_TURN_SERVICES: ContextVar[dict[str, any] | None] = ContextVar(
+    "request_turn_services", default=None)
+
+
+@contextmanager
+def request_turn_services(services: dict[str, any]):
+    """Makes the given services available to the turns processed inside this block."""
+    token = _REQUEST_TURN_SERVICES.set(services)
+    try:
+        yield
+    finally:
+        _REQUEST_TURN_SERVICES.reset(token)
+
+
+class TurnServicesMiddleware(Middleware):
+    async def on_turn(self, context: TurnContext, next_logic):
+        services = _REQUEST_TURN_SERVICES.get()
+        if services:
+            context.turn_state.update(services)
+        await next_logic()  # Continue the middleware pipeline
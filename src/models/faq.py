@@ -1,10 +1,15 @@
 from datetime import date
 from sqlmodel import Field
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from src.database.base import Base
 
 
 class Faq(Base, table=True):
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        Index("ix_faq_additional_token", "additional_token", postgresql_using="gin"),
+        {"schema": "public"},
+    )
 
     id: str = Field(primary_key=True, max_length=40)
     client_id: str | None = Field(
@@ -20,5 +25,6 @@ class Faq(Base, table=True):
     created_date: date | None = None
     changed_date: date | None = None
     additional_tag: str | None = None
-    # tsvector, store as string or use raw SQL for full-text
-    additional_token: str | None = None
+    # Full-text search vector, generated by Postgres from additional_tag (see migrations/001_fts_generated_tsvector.sql)
+    additional_token: str | None = Field(default=None, sa_column=Column(
+        TSVECTOR, Computed("to_tsvector('english', coalesce(additional_tag, ''))", persisted=True)))
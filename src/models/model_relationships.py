@@ -1,4 +1,5 @@
-from sqlmodel import Relationship
+from sqlalchemy import and_
+from sqlalchemy.orm import foreign, relationship
 from src.models.client import Client
 from src.models.object import Object
 from src.models.verb import Verb
@@ -9,66 +10,72 @@ from src.models.log import Log
 from src.models.log_faq import LogFaq
 from src.models.log_reset_password import LogResetPassword
 
-print("--- Loading model relationships ---")
-# Load client relationships
-Client.contacts = Relationship(
-    back_populates="client", sa_relationship_kwargs={"lazy": "selectin"})
-Contact.client = Relationship(
-    back_populates="contacts", sa_relationship_kwargs={"lazy": "selectin"})
-Client.domains = Relationship(
-    back_populates="client", sa_relationship_kwargs={"lazy": "selectin"})
-Domain.client = Relationship(
-    back_populates="domains", sa_relationship_kwargs={"lazy": "selectin"})
-Client.objects = Relationship(
-    back_populates="client", sa_relationship_kwargs={"lazy": "selectin"})
-Object.client = Relationship(
-    back_populates="objects", sa_relationship_kwargs={"lazy": "selectin"})
-Client.faqs = Relationship(back_populates="client",
-                           sa_relationship_kwargs={"lazy": "selectin"})
-Faq.client = Relationship(back_populates="faqs",
-                          sa_relationship_kwargs={"lazy": "selectin"})
-Client.logs = Relationship(back_populates="client",
-                           sa_relationship_kwargs={"lazy": "selectin"})
-Log.client = Relationship(back_populates="logs",
-                          sa_relationship_kwargs={"lazy": "selectin"})
-Client.log_faqs = Relationship(
-    back_populates="client", sa_relationship_kwargs={"lazy": "selectin"})
-LogFaq.client = Relationship(
-    back_populates="log_faqs", sa_relationship_kwargs={"lazy": "selectin"})
-Client.log_reset_passwords = Relationship(
-    back_populates="client", sa_relationship_kwargs={"lazy": "selectin"})
-LogResetPassword.client = Relationship(
-    back_populates="log_reset_passwords", sa_relationship_kwargs={"lazy": "selectin"})
+"""
+ORM relationships between the models, declared here (after every model is defined) to avoid circular imports.
+
+Every relationship is lazy="raise": nothing is loaded unless the query asks for it, and touching an unloaded
+relationship raises instead of silently issuing a query per row. Several of them (a client's logs in particular) grow
+without bound, so each repository query states what it needs with loader options, e.g.
+    select(Faq).options(selectinload(Faq.object))
+and a plain select(Client) stays one statement whatever the log volume (see benchmarks/query_counts.py).
 
-# print("--- Load Faq relationships ---")
-Faq.object = Relationship(back_populates="faqs",
-                          sa_relationship_kwargs={"lazy": "selectin"})
-Object.faqs = Relationship(back_populates="object",
-                           sa_relationship_kwargs={"lazy": "selectin"})
-Faq.verb = Relationship(back_populates="faqs",
-                        sa_relationship_kwargs={"lazy": "selectin"})
-Verb.faqs = Relationship(back_populates="verb",
-                         sa_relationship_kwargs={"lazy": "selectin"})
-Faq.log_faqs = Relationship(
-    back_populates="faq", sa_relationship_kwargs={"lazy": "selectin"})
-LogFaq.faq = Relationship(back_populates="log_faqs",
-                          sa_relationship_kwargs={"lazy": "selectin"})
+faq_id and object_id are only unique within a client, so the relationships on them join on client_id as well and
+are read-only.
+"""
+RAISE = {"lazy": "raise"}
+
+# Load client relationships
+Client.contacts = relationship(Contact, back_populates="client", **RAISE)
+Contact.client = relationship(Client, back_populates="contacts", **RAISE)
+Client.domains = relationship(Domain, back_populates="client", **RAISE)
+Domain.client = relationship(Client, back_populates="domains", **RAISE)
+Client.objects = relationship(Object, back_populates="client", **RAISE)
+Object.client = relationship(Client, back_populates="objects", **RAISE)
+Client.faqs = relationship(Faq, back_populates="client", **RAISE)
+Faq.client = relationship(Client, back_populates="faqs", **RAISE)
+Client.logs = relationship(Log, back_populates="client", **RAISE)
+Log.client = relationship(Client, back_populates="logs", **RAISE)
+Client.log_faqs = relationship(LogFaq, back_populates="client", **RAISE)
+LogFaq.client = relationship(Client, back_populates="log_faqs", **RAISE)
+Client.log_reset_passwords = relationship(LogResetPassword, back_populates="client", **RAISE)
+LogResetPassword.client = relationship(Client, back_populates="log_reset_passwords", **RAISE)
 
-# print("--- Load Verb relationships ---")
-Verb.log_faqs = Relationship(
-    back_populates="verb", sa_relationship_kwargs={"lazy": "selectin"})
-LogFaq.verb = Relationship(back_populates="log_faqs",
-                           sa_relationship_kwargs={"lazy": "selectin"})
+# Load Faq relationships
+Faq.object = relationship(
+    Object,
+    primaryjoin=and_(foreign(Faq.object_id) == Object.object_id, foreign(Faq.client_id) == Object.client_id),
+    back_populates="faqs", viewonly=True, **RAISE
+)
+Object.faqs = relationship(
+    Faq,
+    primaryjoin=and_(foreign(Faq.object_id) == Object.object_id, foreign(Faq.client_id) == Object.client_id),
+    back_populates="object", viewonly=True, **RAISE
+)
+Faq.verb = relationship(Verb, back_populates="faqs", **RAISE)
+Verb.faqs = relationship(Faq, back_populates="verb", **RAISE)
+Faq.log_faqs = relationship(
+    LogFaq,
+    primaryjoin=and_(foreign(LogFaq.faq_id) == Faq.faq_id, foreign(LogFaq.client_id) == Faq.client_id),
+    back_populates="faq", viewonly=True, **RAISE
+)
+LogFaq.faq = relationship(
+    Faq,
+    primaryjoin=and_(foreign(LogFaq.faq_id) == Faq.faq_id, foreign(LogFaq.client_id) == Faq.client_id),
+    back_populates="log_faqs", viewonly=True, **RAISE
+)
 
-# print("--- Load Object relationships ---")
-Object.log_faqs = Relationship(
-    back_populates="object", sa_relationship_kwargs={"lazy": "selectin"})
-LogFaq.object = Relationship(
-    back_populates="log_faqs", sa_relationship_kwargs={"lazy": "selectin"})
+# Load Verb relationships
+Verb.log_faqs = relationship(LogFaq, back_populates="verb", **RAISE)
+LogFaq.verb = relationship(Verb, back_populates="log_faqs", **RAISE)
 
-# print("--- Load Object relationships ---")
-Object.log_faqs = Relationship(
-    back_populates="object", sa_relationship_kwargs={"lazy": "selectin"})
-LogFaq.object = Relationship(
-    back_populates="log_faqs", sa_relationship_kwargs={"lazy": "selectin"})
-print("--- Model relationships loaded ---")
+# Load Object relationships
+Object.log_faqs = relationship(
+    LogFaq,
+    primaryjoin=and_(foreign(LogFaq.object_id) == Object.object_id, foreign(LogFaq.client_id) == Object.client_id),
+    back_populates="object", viewonly=True, **RAISE
+)
+LogFaq.object = relationship(
+    Object,
+    primaryjoin=and_(foreign(LogFaq.object_id) == Object.object_id, foreign(LogFaq.client_id) == Object.client_id),
+    back_populates="log_faqs", viewonly=True, **RAISE
+)
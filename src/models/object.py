@@ -1,10 +1,15 @@
 from sqlmodel import Field
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import date
 from src.database.base import Base
 
 
 class Object(Base, table=True):
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        Index("ix_object_client_id_object_token", "client_id", "object_token", postgresql_using="gin"),
+        {"schema": "public"},
+    )
 
     id: str = Field(primary_key=True, max_length=40)
     client_id: str | None = Field(
@@ -15,6 +20,6 @@ class Object(Base, table=True):
     created_date: date | None = None
     changed_date: date | None = None
     object_tag: str | None = None  # The tag used for search
-    # Text for full-text search index (if you use one in DB)
-    # tsvector not directly supported, you may handle this with raw SQL
-    object_token: str | None = None
+    # Full-text search vector, generated by Postgres from object_tag (see migrations/001_fts_generated_tsvector.sql)
+    object_token: str | None = Field(default=None, sa_column=Column(
+        TSVECTOR, Computed("to_tsvector('english', coalesce(object_tag, ''))", persisted=True)))
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, Index, JSON, text
+from sqlmodel import Field
+from src.database.base import Base
+
+# Job statuses: queued -> running -> delivered | failed | unknown
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DELIVERED = "delivered"
+JOB_STATUS_FAILED = "failed"
+# The worker stopped after the SAP call was issued: whether the password was reset is not known
+JOB_STATUS_UNKNOWN = "unknown"
+
+
+def current_utc_datetime() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResetPasswordJob(Base, table=True):
+    """A password reset requested in a turn, run in the background and answered proactively."""
+    __table_args__ = (
+        # Claiming scans the queued jobs oldest first
+        Index("ix_reset_password_job_queued", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_reset_password_job_status_started_at", "status", "started_at"),
+        {"schema": "public"},
+    )
+
+    # Auto-incrementing primary key
+    id: int | None = Field(default=None, primary_key=True)
+    status: str = Field(default=JOB_STATUS_QUEUED, max_length=10)
+    session_id: str | None = Field(default=None, max_length=255)
+    email: str = Field(max_length=240)
+    client_id: str | None = Field(
+        default=None, max_length=20, foreign_key="public.client.client_id")
+    # Serialized botbuilder ConversationReference of the turn that requested the reset
+    conversation_reference: dict = Field(sa_column=Column(JSON, nullable=False))
+    attempts: int = Field(default=0)
+    result_code: str | None = Field(default=None, max_length=3)
+    result_text: str | None = Field(default=None)
+    error: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=current_utc_datetime,
+                                 sa_column=Column(DateTime(timezone=True), nullable=False))
+    started_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    # Set (and committed) right before the SAP reset is called; a job with it set is never run again
+    sap_called_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
+    finished_at: datetime | None = Field(default=None, sa_column=Column(DateTime(timezone=True)))
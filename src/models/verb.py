@@ -1,15 +1,20 @@
 from datetime import date
 from sqlmodel import Field
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from src.database.base import Base
 
 
 class Verb(Base, table=True):
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        Index("ix_verb_verb_token", "verb_token", postgresql_using="gin"),
+        {"schema": "public"},
+    )
 
     verb_id: str = Field(primary_key=True, max_length=20)
     created_date: date | None = None
     changed_date: date | None = None
     verb_tag: str | None = None  # The tag used for search
-    # Text for full-text search index (if you use one in DB)
-    # tsvector not directly supported, you may handle this with raw SQL
-    verb_token: str | None = None
+    # Full-text search vector, generated by Postgres from verb_tag (see migrations/001_fts_generated_tsvector.sql)
+    verb_token: str | None = Field(default=None, sa_column=Column(
+        TSVECTOR, Computed("to_tsvector('english', coalesce(verb_tag, ''))", persisted=True)))
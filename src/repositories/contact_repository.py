@@ -1,6 +1,7 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, asc
 from src.models.contact import Contact
+from src.database.session import session_scope
 
 
 class ContactRepository:
@@ -8,7 +9,7 @@ class ContactRepository:
     Repository for accessing Contact data from the database asynchronously.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession | None = None):
         self.session = session
 
     async def select_distinct_streams(
@@ -24,8 +25,27 @@ class ContactRepository:
             .distinct()
             .order_by(asc(Contact.stream))
         )
-        result = await self.session.exec(query)
-        return result.all()
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return result.all()
+
+    async def select_distinct_stream_vocabulary(
+        self, client_id: str
+    ) -> list[tuple[str, str | None]]:
+        """
+        Selects the distinct (stream, sub_stream) pairs of a client's contacts.
+        Orders by stream, sub_stream.
+        """
+        query = (
+            select(Contact.stream, Contact.sub_stream)
+            .where(Contact.client_id == client_id)
+            .where(Contact.stream.is_not(None))
+            .distinct()
+            .order_by(asc(Contact.stream), asc(Contact.sub_stream))
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return [(stream, sub_stream) for stream, sub_stream in result.all()]
 
     async def select_all_by_stream_or_substream(
         self,
@@ -49,5 +69,6 @@ class ContactRepository:
         query = query.order_by(
             Contact.stream, Contact.sub_stream, Contact.contact_name)
 
-        result = await self.session.exec(query)
-        return result.all()
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return result.all()
@@ -1,7 +1,9 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, and_
+from sqlalchemy import case
 from src.models.client import Client
 from src.models.domain import Domain
+from src.database.session import session_scope
 
 
 class DomainClientRepository:
@@ -9,7 +11,7 @@ class DomainClientRepository:
     Repository for accessing Client data from the database asynchronously.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession | None = None):
         self.session = session
 
     async def select_domain_client_by_email(self, email: str) -> Client | None:
@@ -27,10 +29,52 @@ class DomainClientRepository:
             )
             .where(Domain.domain_id == email)
         )
-        result = await self.session.exec(query)
-        client = result.first()
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            client = result.first()
 
         if client:
             return client
 
         return None
+
+    async def select_domain_clients_by_email_or_domain(
+        self, email: str, domain: str | None
+    ) -> list[tuple[str, Client]]:
+        """
+        Selects the Client rows registered for the full email and for its domain part in one query.
+        Returns (domain_id, Client) pairs ordered by specificity: the full email match comes first.
+        """
+        domain_ids = [email, domain] if domain else [email]
+        query = (
+            select(Domain.domain_id, Client)
+            .join(
+                Domain,
+                and_(
+                    Client.client_id == Domain.client_id
+                )
+            )
+            .where(Domain.domain_id.in_(domain_ids))
+            .order_by(case((Domain.domain_id == email, 0), else_=1))
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return [(domain_id, client) for domain_id, client in result.all()]
+
+    async def select_all_domain_clients(self) -> list[tuple[str, Client]]:
+        """
+        Selects every registered domain/email with its Client (used to prime the lookup cache).
+        Returns (domain_id, Client) pairs.
+        """
+        query = (
+            select(Domain.domain_id, Client)
+            .join(
+                Domain,
+                and_(
+                    Client.client_id == Domain.client_id
+                )
+            )
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return [(domain_id, client) for domain_id, client in result.all()]
@@ -1,9 +1,11 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, and_
+from sqlalchemy.orm import contains_eager
 from src.models.faq import Faq
 from src.models.object import Object
 from src.models.verb import Verb
 from src.models.contact import Contact
+from src.database.session import session_scope
 
 
 class FaqRepository:
@@ -12,18 +14,48 @@ class FaqRepository:
     from the database asynchronously.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession | None = None):
         self.session = session
 
     async def select_faq_with_object_details(
         self, client_id: str
     ) -> list[Faq]:
         """
-        Selects FAQs and eager loads related Object details using a join.
+        Selects FAQs and eager loads related Object details (Faq.object) from the same join, in one query.
         (Simplified query, not including FTS or verb/additional_tag logic yet)
         """
         query = (
             select(Faq)
+            .join(Faq.object, isouter=True)
+            .options(contains_eager(Faq.object))
+            .where(Faq.client_id == client_id)
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return result.all()
+
+    async def select_faq_search_documents(
+        self, client_id: str
+    ) -> list[dict[str, any]]:
+        """
+        Selects every FAQ of a client together with its object and verb tags,
+        flattened into one dictionary per FAQ for building the FAQ search index.
+        """
+        query = (
+            select(
+                Faq.faq_id,
+                Faq.object_id,
+                Faq.verb_id,
+                Faq.question_text,
+                Faq.answer_text,
+                Faq.url,
+                Faq.additional_tag,
+                Object.object_tag,
+                Object.stream,
+                Object.sub_stream,
+                Verb.verb_tag
+            )
+            .select_from(Faq)
             .join(
                 Object,
                 and_(
@@ -32,10 +64,12 @@ class FaqRepository:
                 ),
                 isouter=True
             )
+            .join(Verb, Verb.verb_id == Faq.verb_id, isouter=True)
             .where(Faq.client_id == client_id)
         )
-        result = await self.session.exec(query)
-        return result.all()
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return [dict(row._mapping) for row in result.all()]
 
     # --- Methods for inserting logs (Log, LogFaq, LogResetPassword) ---
     # async def insert_log(self, log_entry: Log):
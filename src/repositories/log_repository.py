@@ -1,6 +1,9 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, and_
+from src.models.log import Log
+from src.models.log_faq import LogFaq
 from src.models.log_reset_password import LogResetPassword
+from src.database.session import session_scope
 
 
 class LogRepository:
@@ -9,24 +12,33 @@ class LogRepository:
     from the database asynchronously.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession | None = None):
         self.session = session
 
     # --- Methods for inserting logs (Log, LogFaq, LogResetPassword) ---
-    # async def insert_log(self, log_entry: Log):
-    #     """Inserts a general log entry."""
-    #     self.session.add(log_entry)
-    #     # Note: Changes are committed when the session is committed,
-    #     # which will likely happen at the end of the turn via the DI session yield.
-    #     # await self.session.commit() # Only call commit if managing session lifespan differently
-
-    # async def insert_log_faq(self, log_faq_entry: LogFaq):
-    #     """Inserts an FAQ log entry."""
-    #     self.session.add(log_faq_entry)
+    # Note: With a session, changes are committed by the caller when the session is committed.
+    async def insert_log(self, log_entry: Log):
+        """Inserts a general log entry."""
+        async with session_scope(self.session) as session:
+            session.add(log_entry)
+
+    async def insert_log_faq(self, log_faq_entry: LogFaq):
+        """Inserts an FAQ log entry."""
+        async with session_scope(self.session) as session:
+            session.add(log_faq_entry)
+
+    async def insert_logs(self, log_entries: list[Log | LogFaq | LogResetPassword]):
+        """
+        Inserts a batch of log entries of any log table.
+        Rows of the same table are flushed as multi-row INSERT statements.
+        """
+        async with session_scope(self.session) as session:
+            session.add_all(log_entries)
 
     async def insert_log_reset_password(self, log_rp_entry: LogResetPassword):
         """Inserts a Reset Password log entry."""
-        self.session.add(log_rp_entry)
+        async with session_scope(self.session) as session:
+            session.add(log_rp_entry)
 
     # # --- Method for updating logs (e.g., FAQ feedback) ---
     # async def update_log_faq_feedback(self, session_id: str, feedback: str):
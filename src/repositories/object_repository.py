@@ -3,6 +3,7 @@ from sqlmodel import select
 from src.models.object import Object
 from sqlalchemy import func
 from src.utils.db_utils import prevent_sql_injection_safe
+from src.database.session import session_scope
 
 
 class ObjectRepository:
@@ -10,28 +11,38 @@ class ObjectRepository:
     Repository for accessing Object data from the database asynchronously.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession | None = None):
         self.session = session
 
     async def get_all_by_question(
-        self, client_id: str, question: str
-    ) -> list[Object]:
-        question_safe = prevent_sql_injection_safe(question)
-        ts_query_str = question_safe.replace(" ", "|")
+        self, client_id: str, question: str, limit: int = 10
+    ) -> list[tuple[str, str, str | None, float]]:
+        """
+        Selects the objects of a client whose tags match any word of the question, best match first.
+        Uses the GIN-indexed object_token column, ranked with ts_rank_cd and bounded by `limit`.
+        Returns (client_id, object_id, object_tag, rank) rows.
+        """
+        # Only letters, digits and spaces reach websearch_to_tsquery, and the query is sent as a bind parameter
+        words = list(dict.fromkeys(prevent_sql_injection_safe(question).lower().split()))
+        if not words:
+            return []
+        ts_query = func.websearch_to_tsquery("english", " or ".join(words))
+        rank = func.ts_rank_cd(Object.object_token, ts_query).label("rank")
 
         query = (
             select(
                 Object.client_id,
                 Object.object_id,
-                Object.object_tag
+                Object.object_tag,
+                rank
             )
             .select_from(Object)
             .where(Object.client_id == client_id)
-            .where(
-                Object.object_token.op(
-                    "@@")(func.to_tsquery("english", ts_query_str))
-            )
+            .where(Object.object_token.op("@@")(ts_query))
+            .order_by(rank.desc())
+            .limit(limit)
         )
 
-        result = await self.session.exec(query)
-        return result.all()
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return list(result.all())
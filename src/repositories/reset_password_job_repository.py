@@ -0,0 +1,143 @@
+from datetime import datetime
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select, update, and_, func
+from src.database.session import session_scope
+from src.models.reset_password_job import (
+    ResetPasswordJob, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_FAILED, JOB_STATUS_UNKNOWN,
+    current_utc_datetime
+)
+
+
+class ResetPasswordJobRepository:
+    """
+    Repository for the password reset job queue.
+    Note: With a session, changes are committed by the caller when the session is committed.
+    """
+
+    def __init__(self, session: AsyncSession | None = None):
+        self.session = session
+
+    async def check_table(self):
+        """
+        Reads the newest column of the job table, so it raises if migrations/002 or 003 have not been run
+        (or the database is unreachable).
+        """
+        query = select(ResetPasswordJob.sap_called_at).limit(1)
+        async with session_scope(self.session) as session:
+            await session.exec(query)
+
+    async def insert_job(self, job: ResetPasswordJob) -> ResetPasswordJob:
+        """Inserts a queued job and flushes it so its id is assigned."""
+        async with session_scope(self.session) as session:
+            session.add(job)
+            await session.flush()
+        return job
+
+    async def count_unfinished_jobs(self) -> int:
+        """Number of jobs still queued or running."""
+        query = select(func.count()).select_from(ResetPasswordJob).where(
+            ResetPasswordJob.status.in_([JOB_STATUS_QUEUED, JOB_STATUS_RUNNING]))
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            return result.one()
+
+    async def claim_jobs(self, limit: int) -> list[ResetPasswordJob]:
+        """
+        Marks up to `limit` queued jobs as running, oldest first, and returns them.
+        Rows locked by another worker are skipped (FOR UPDATE SKIP LOCKED), so concurrent workers never claim the same job.
+        """
+        query = (
+            select(ResetPasswordJob)
+            .where(ResetPasswordJob.status == JOB_STATUS_QUEUED)
+            .order_by(ResetPasswordJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            jobs = list(result.all())
+            started_at = current_utc_datetime()
+            for job in jobs:
+                job.status = JOB_STATUS_RUNNING
+                job.started_at = started_at
+                job.attempts += 1
+        return jobs
+
+    async def mark_sap_called(self, job_id: int):
+        """Records that the SAP reset of the job is about to be called."""
+        async with session_scope(self.session) as session:
+            await session.exec(
+                update(ResetPasswordJob)
+                .where(ResetPasswordJob.id == job_id)
+                .values(sap_called_at=current_utc_datetime())
+            )
+
+    async def finish_job(
+        self,
+        job_id: int,
+        status: str,
+        result_code: str | None = None,
+        result_text: str | None = None,
+        error: str | None = None
+    ):
+        """Records the final status and result of a job."""
+        async with session_scope(self.session) as session:
+            await session.exec(
+                update(ResetPasswordJob)
+                .where(ResetPasswordJob.id == job_id)
+                .values(
+                    status=status, result_code=result_code, result_text=result_text, error=error,
+                    finished_at=current_utc_datetime()
+                )
+            )
+
+    async def claim_stale_sap_called_jobs(self, started_before: datetime) -> list[ResetPasswordJob]:
+        """
+        Marks the jobs left running since before `started_before` after their SAP call was issued as unknown and
+        returns them. SAP may or may not have reset the password, and the reset is not idempotent, so they are not
+        run again. Rows locked by another worker are skipped.
+        """
+        query = (
+            select(ResetPasswordJob)
+            .where(
+                ResetPasswordJob.status == JOB_STATUS_RUNNING,
+                ResetPasswordJob.started_at < started_before,
+                ResetPasswordJob.sap_called_at.is_not(None)
+            )
+            .order_by(ResetPasswordJob.id)
+            .with_for_update(skip_locked=True)
+        )
+        async with session_scope(self.session) as session:
+            result = await session.exec(query)
+            jobs = list(result.all())
+            finished_at = current_utc_datetime()
+            for job in jobs:
+                job.status = JOB_STATUS_UNKNOWN
+                job.error = "Worker stopped after calling SAP"
+                job.finished_at = finished_at
+        return jobs
+
+    async def requeue_stale_jobs(self, started_before: datetime, max_attempts: int) -> tuple[int, int]:
+        """
+        Re-queues the jobs left running since before `started_before` (their worker stopped) that never reached the
+        SAP call, and fails those that already used `max_attempts`. Returns the numbers of re-queued and failed jobs.
+        Jobs whose SAP call was issued are handled by claim_stale_sap_called_jobs.
+        """
+        stale = and_(
+            ResetPasswordJob.status == JOB_STATUS_RUNNING,
+            ResetPasswordJob.started_at < started_before,
+            ResetPasswordJob.sap_called_at.is_(None)
+        )
+        async with session_scope(self.session) as session:
+            failed = await session.exec(
+                update(ResetPasswordJob)
+                .where(stale, ResetPasswordJob.attempts >= max_attempts)
+                .values(status=JOB_STATUS_FAILED, error="Worker stopped while running the job",
+                        finished_at=current_utc_datetime())
+            )
+            requeued = await session.exec(
+                update(ResetPasswordJob)
+                .where(stale, ResetPasswordJob.attempts < max_attempts)
+                .values(status=JOB_STATUS_QUEUED, started_at=None)
+            )
+        return requeued.rowcount, failed.rowcount
@@ -1,15 +1,34 @@
+import logging
+import asyncio
 from src.repositories.contact_repository import ContactRepository
 from src.models.contact import Contact
+from src.config import app_config
+from src.utils.cache import TTLCache, CACHE_MISS
+from src.utils.text_matcher import AhoCorasickMatcher
+
+logger = logging.getLogger(__name__)
+
+# App-scoped cache of compiled stream matchers, one per client_id, shared by every request.
+# Matcher values are (stream, sub_stream) pairs; sub_stream is None when the keyword is the stream name itself.
+STREAM_MATCHER_CACHE = TTLCache(
+    max_size=app_config.STREAM_MATCHER_CACHE_MAX_SIZE,
+    ttl=app_config.STREAM_MATCHER_CACHE_TTL
+)
+
+
+def get_stream_matcher_cache() -> TTLCache:
+    return STREAM_MATCHER_CACHE
 
 
 class ContactService:
     """
     Service layer for handling Contact-related business logic.
-    Depends on ContactRepository for database access.
+    Depends on ContactRepository for database access, stream matchers are cached in the app-scoped STREAM_MATCHER_CACHE.
     """
 
-    def __init__(self, contact_repo: ContactRepository):
+    def __init__(self, contact_repo: ContactRepository, stream_matcher_cache: TTLCache = STREAM_MATCHER_CACHE):
         self._contact_repo = contact_repo
+        self._stream_matcher_cache = stream_matcher_cache
 
     async def get_all_streams(self, client_id: str) -> list[str]:
         """Retrieves a list of available contact streams for a given client."""
@@ -30,12 +49,42 @@ class ContactService:
         # or a data preparation step after calling this service.
         return contacts
 
+    async def get_stream_matcher(self, client_id: str) -> AhoCorasickMatcher:
+        """
+        Returns the compiled matcher of a client's stream and sub_stream names.
+        The vocabulary is only read from the database when the client's matcher is not cached.
+        """
+        matcher = self._stream_matcher_cache.get(client_id)
+        if matcher is not CACHE_MISS:
+            return matcher
+
+        vocabulary = await self._contact_repo.select_distinct_stream_vocabulary(client_id)
+        # Stream names are registered first, so a name used both as stream and sub_stream resolves to the stream
+        keywords = [(stream, (stream, None)) for stream in dict.fromkeys(stream for stream, _ in vocabulary)]
+        keywords += [(sub_stream, (stream, sub_stream)) for stream, sub_stream in vocabulary if sub_stream]
+        # Compiled in a worker thread so a large vocabulary does not stall the event loop
+        matcher = await asyncio.to_thread(AhoCorasickMatcher, keywords)
+        self._stream_matcher_cache.set(client_id, matcher)
+        logger.debug("ContactService: Compiled stream matcher for client %s (%s keywords)", client_id, len(matcher))
+        return matcher
+
+    async def find_stream_and_sub_stream_from_text(self, client_id: str, text: str) -> tuple[str, str | None] | None:
+        """
+        Finds the stream (and sub_stream, if one is named) mentioned in the text.
+        The longest mention wins, e.g. "Sales Distribution" over "Sales". Returns None if nothing is mentioned.
+        """
+        matcher = await self.get_stream_matcher(client_id)
+        match = matcher.find_longest(text)
+        return match.value if match else None
+
     async def find_stream_from_text(self, client_id: str, text: str) -> str | None:
-        """Attempts to find a stream name mentioned in the text."""
-        available_streams = await self._contact_repo.select_distinct_streams(client_id)
-        # Implement simple string matching or fuzzy matching here
-        # Example: check if any available stream name is in the text
-        for stream in available_streams:
-            if stream.lower() in text.lower():
-                return stream
-        return None
+        """Attempts to find a stream name (or the stream of a sub_stream name) mentioned in the text."""
+        stream_match = await self.find_stream_and_sub_stream_from_text(client_id, text)
+        return stream_match[0] if stream_match else None
+
+    def invalidate_stream_matcher(self, client_id: str | None = None):
+        """Drops the cached matcher of a client, or of every client, so it is rebuilt (call after Contact changes)."""
+        if client_id is None:
+            self._stream_matcher_cache.clear()
+        else:
+            self._stream_matcher_cache.pop(client_id)
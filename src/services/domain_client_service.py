@@ -1,33 +1,108 @@
+import logging
 from src.repositories.domain_client_repository import DomainClientRepository
 from src.models.client import Client
+from src.config import app_config
+from src.utils.cache import TTLCache, CACHE_MISS
+
+logger = logging.getLogger(__name__)
+
+# App-scoped cache of domain lookups, shared by every request.
+# Keys are ("email", <full email>) and ("domain", <domain part>); a None value is a cached "no row" (negative entry).
+# A primed cache also holds the complete domain table under DOMAIN_SNAPSHOT_KEY, which answers every lookup.
+DOMAIN_CLIENT_CACHE = TTLCache(
+    max_size=app_config.DOMAIN_CLIENT_CACHE_MAX_SIZE,
+    ttl=app_config.DOMAIN_CLIENT_CACHE_TTL
+)
+
+
+DOMAIN_SNAPSHOT_KEY = ("snapshot",)
+
+
+def get_domain_client_cache() -> TTLCache:
+    return DOMAIN_CLIENT_CACHE
 
 
 class DomainClientService:
     """
     Service layer for determining client type and retrieving domain client details.
-    Depends on DomainClientRepository for database access.
+    Depends on DomainClientRepository for database access, results are cached in the app-scoped DOMAIN_CLIENT_CACHE.
     """
 
-    def __init__(self, domain_client_repo: DomainClientRepository):
+    def __init__(self, domain_client_repo: DomainClientRepository, cache: TTLCache = DOMAIN_CLIENT_CACHE):
         self._domain_client_repo = domain_client_repo
+        self._cache = cache
+        self._negative_ttl = app_config.DOMAIN_CLIENT_CACHE_NEGATIVE_TTL
 
     async def determine_client_details(self, email: str) -> Client | None:
         """
         Determines the user's client details based on email domain lookup.
+        A row registered for the full email wins over a row registered for the domain part.
         Returns None if no client is found for the email/domain.
         """
-        # Call the repository method
-        client_details = await self._domain_client_repo.select_domain_client_by_email(email)
+        domain = email.rpartition("@")[2] if "@" in email else None
 
-        if client_details:
-            print(
-                f"--- DomainClientService: Client details: {client_details} ---")
-            return client_details
+        # A primed snapshot of the whole domain table answers without touching the per-key entries
+        snapshot = self._cache.get(DOMAIN_SNAPSHOT_KEY)
+        if snapshot is not CACHE_MISS:
+            return snapshot.get(email) or (snapshot.get(domain) if domain else None)
 
-        # If not found, try the domain part
-        if "@" in email:
-            _, domain = email.split("@")
-            client_details = await self._domain_client_repo.select_domain_client_by_email(domain)
-        print(f"--- DomainClientService: Client details: {client_details} ---")
+        # Serve from cache: the full email entry first, then (if the email has no row of its own) the domain entry
+        email_entry = self._cache.get(("email", email))
+        if email_entry is not CACHE_MISS:
+            if email_entry is not None or domain is None:
+                return email_entry
+            domain_entry = self._cache.get(("domain", domain))
+            if domain_entry is not CACHE_MISS:
+                return domain_entry
 
+        # Cache miss: resolve both the email and the domain rows in a single query
+        matches = dict(await self._domain_client_repo.select_domain_clients_by_email_or_domain(email, domain))
+        email_client = self._cache_entry(("email", email), matches.get(email))
+        domain_client = self._cache_entry(("domain", domain), matches.get(domain)) if domain else None
+        client_details = email_client or domain_client
+
+        logger.debug("DomainClientService: Client details: %s", client_details)
         return client_details
+
+    def _cache_entry(self, key: tuple[str, str], client: Client | None) -> Client | None:
+        """Caches a detached copy of the client (or a negative entry) and returns the cached value."""
+        if client is None:
+            self._cache.set(key, None, ttl=self._negative_ttl)
+            return None
+        # Copy so the cached instance is never tied to (or expired by) the request's session
+        cached_client = Client(**client.model_dump())
+        self._cache.set(key, cached_client)
+        return cached_client
+
+    async def prime_cache(self) -> set[str]:
+        """
+        Loads the complete domain table into the cache as one snapshot (during startup warm-up).
+        Returns the client_ids of the registered clients.
+        """
+        clients: dict[str, Client] = {}
+        snapshot: dict[str, Client] = {}
+        for domain_id, client in await self._domain_client_repo.select_all_domain_clients():
+            # One detached copy per client, shared by all of its domains
+            if client.client_id not in clients:
+                clients[client.client_id] = Client(**client.model_dump())
+            snapshot[domain_id] = clients[client.client_id]
+        self._cache.set(DOMAIN_SNAPSHOT_KEY, snapshot)
+        return set(clients)
+
+    def invalidate(self, email_or_domain: str | None = None):
+        """
+        Drops cached lookups for a full email or a domain (the domain_id of a changed Domain row),
+        or the whole cache if nothing is given.
+        """
+        self._cache.pop(DOMAIN_SNAPSHOT_KEY)
+        if email_or_domain is None:
+            self._cache.clear()
+        elif "@" in email_or_domain:
+            self._cache.pop(("email", email_or_domain))
+        else:
+            self._cache.pop(("domain", email_or_domain))
+
+    def invalidate_client(self, client_id: str):
+        """Drops every cached lookup resolving to a client (e.g. after the Client row changed)."""
+        self._cache.pop(DOMAIN_SNAPSHOT_KEY)
+        self._cache.pop_where(lambda _, client: isinstance(client, Client) and client.client_id == client_id)
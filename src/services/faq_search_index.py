@@ -0,0 +1,169 @@
+import logging
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+"""
+In-memory FAQ search index, replacing the per-question MiniSearch rebuild planned in FaqService.
+
+One FaqSearchIndex is built per client_id from the FAQ rows (joined with their object/verb tags) and kept in the
+app-scoped FaqIndexRegistry. Scoring is per-field BM25 multiplied by the field boost (same scheme as MiniSearch),
+and all of it is precomputed at build time so a search is only a few dictionary lookups and a heap selection.
+"""
+
+# Same boosts as the Node.js MiniSearch configuration
+FAQ_FIELD_BOOSTS: dict[str, float] = {
+    "object_tag": 1000,
+    "verb_tag": 300,
+    "additional_tag": 800,
+    "question_text": 800,
+    "stream": 100,
+    "sub_stream": 100,
+}
+
+# Fields returned with every search result
+FAQ_STORE_FIELDS: tuple[str, ...] = (
+    "faq_id", "object_id", "verb_id", "question_text", "answer_text", "url", "stream", "sub_stream"
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.7
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lowercases the text and splits it into word tokens."""
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class FaqSearchResult:
+    document: dict[str, Any]
+    score: float
+
+
+class FaqSearchIndex:
+    """
+    Immutable inverted index over the FAQ documents of a single client.
+    Each posting already holds the boosted BM25 weight of a term for a document,
+    so search only sums the postings of the query terms.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[dict[str, Any]],
+        field_boosts: dict[str, float] = FAQ_FIELD_BOOSTS,
+        k1: float = BM25_K1,
+        b: float = BM25_B
+    ):
+        self._documents: list[dict[str, Any]] = []
+        field_term_counts: dict[str, list[Counter]] = {field: [] for field in field_boosts}
+
+        for document in documents:
+            self._documents.append({field: document.get(field) for field in FAQ_STORE_FIELDS})
+            for field in field_boosts:
+                field_term_counts[field].append(Counter(tokenize(document.get(field))))
+
+        total_docs = len(self._documents)
+        self._postings: dict[str, dict[int, float]] = {}
+
+        for field, boost in field_boosts.items():
+            term_counts = field_term_counts[field]
+            total_length = sum(sum(counts.values()) for counts in term_counts)
+            if total_length == 0:
+                continue
+            avg_length = total_length / total_docs
+
+            # Document frequency of each term within this field
+            doc_frequency: Counter = Counter()
+            for counts in term_counts:
+                doc_frequency.update(counts.keys())
+
+            for doc_index, counts in enumerate(term_counts):
+                length_norm = 1 - b + b * sum(counts.values()) / avg_length
+                for term, tf in counts.items():
+                    df = doc_frequency[term]
+                    idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                    weight = boost * idf * (tf * (k1 + 1)) / (tf + k1 * length_norm)
+                    postings = self._postings.setdefault(term, {})
+                    postings[doc_index] = postings.get(doc_index, 0.0) + weight
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def search(self, question: str, limit: int = 5) -> list[FaqSearchResult]:
+        """Returns the top `limit` documents matching any term of the question, best score first."""
+        scores: dict[int, float] = {}
+        for term in set(tokenize(question)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            for doc_index, weight in postings.items():
+                scores[doc_index] = scores.get(doc_index, 0.0) + weight
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [FaqSearchResult(document=self._documents[doc_index], score=score) for doc_index, score in top]
+
+
+class FaqIndexRegistry:
+    """
+    App-scoped holder of one FaqSearchIndex per client.
+    Indexes are built on first use (once, even under concurrent requests) and shared by every request afterwards.
+    """
+
+    def __init__(self):
+        self._indexes: dict[str, FaqSearchIndex] = {}
+        self._build_locks: dict[str, asyncio.Lock] = {}
+
+    def get(self, client_id: str) -> FaqSearchIndex | None:
+        return self._indexes.get(client_id)
+
+    def set(self, client_id: str, index: FaqSearchIndex):
+        """Atomically replaces the index of a client (e.g. after FAQ data changed)."""
+        self._indexes[client_id] = index
+
+    async def get_or_build(
+        self,
+        client_id: str,
+        load_documents: Callable[[], Awaitable[Iterable[dict[str, Any]]]]
+    ) -> FaqSearchIndex:
+        """Returns the index of a client, building it from `load_documents` if it does not exist yet."""
+        index = self._indexes.get(client_id)
+        if index is not None:
+            return index
+
+        lock = self._build_locks.setdefault(client_id, asyncio.Lock())
+        async with lock:
+            # Another request may have built it while we were waiting for the lock
+            index = self._indexes.get(client_id)
+            if index is None:
+                documents = await load_documents()
+                # Built in a worker thread so the other requests keep being served meanwhile
+                index = await asyncio.to_thread(FaqSearchIndex, documents)
+                self._indexes[client_id] = index
+                logger.info("FaqIndexRegistry: Built FAQ index for client %s (%s FAQs)", client_id, len(index))
+        return index
+
+    def invalidate(self, client_id: str | None = None):
+        """Drops the index of a client, or of every client if no client_id is given."""
+        if client_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(client_id, None)
+
+
+# Global registry shared across requests
+FAQ_INDEX_REGISTRY = FaqIndexRegistry()
+
+
+def get_faq_index_registry() -> FaqIndexRegistry:
+    return FAQ_INDEX_REGISTRY
@@ -1,26 +1,30 @@
-from src.repositories.log_repository import LogRepository
-from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+from src.services.log_sink import LogSink
+from src.models.log import Log
+from src.models.log_faq import LogFaq
 from src.models.log_reset_password import LogResetPassword
 
+logger = logging.getLogger(__name__)
+
 
 class LogService:
     """
     Service layer for handling All Log operations.
+    Log rows are handed to the background LogSink, so logging never waits on the database.
     """
 
-    def __init__(self, log_repo: LogRepository):
-        self._log_repo = log_repo
+    def __init__(self, log_sink: LogSink):
+        self._log_sink = log_sink
+
+    async def log_reset_password(self, log_rp: LogResetPassword):
+        """Logs a reset password attempt."""
+        logger.debug("LogService: Logging reset password attempt")
+        self._log_sink.submit(log_rp)
 
-    async def log_reset_password(self, log_rp: LogResetPassword, session: AsyncSession):
-        """
-        Logs a reset password attempt and commits the session for this DML.
-        Receives the session from the caller.
-        """
-        print("--- LogService: Logging reset password attempt ---")
-        await self._log_repo.insert_log_reset_password(log_rp)
-        print("--- LogService: Committing session for log entry ---")
-        await session.commit()
+    async def log_general_interaction(self, log_entry: Log):
+        """Logs a general interaction."""
+        self._log_sink.submit(log_entry)
 
-    # Add similar methods for logging general interactions or FAQ interactions if they are logged at specific points
-    # async def log_general_interaction(self, log_entry: Log, session: AsyncSession): ...
-    # async def log_faq_lookup(self, log_faq_entry: LogFaq, session: AsyncSession): ...
+    async def log_faq_lookup(self, log_faq_entry: LogFaq):
+        """Logs an FAQ interaction."""
+        self._log_sink.submit(log_faq_entry)
@@ -0,0 +1,176 @@
+import logging
+import asyncio
+import time
+from typing import Callable
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import app_config
+from src.database.session import get_session_factory
+from src.repositories.log_repository import LogRepository
+from src.models.log import Log
+from src.models.log_faq import LogFaq
+from src.models.log_reset_password import LogResetPassword
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Background sink for the audit log tables (Log, LogFaq, LogResetPassword).
+
+Handlers only put the row on a bounded in-memory queue; a background task takes rows off the queue and inserts them
+in batches (one transaction per batch, SQLAlchemy turns same-table inserts into multi-row INSERT statements) when
+either the batch size or the flush interval is reached. When the queue is full new rows are dropped and counted
+rather than blocking the turn. A batch that fails to write is retried once before its rows are counted as failed.
+
+The queue is drained on shutdown: close() queues a stop marker behind the pending rows instead of cancelling the
+writer, so the batch being collected or written when the app stops is still written.
+"""
+LogRow = Log | LogFaq | LogResetPassword
+
+# Queued by close(): the writer writes everything before it, then returns
+_STOP = object()
+
+
+class LogSink:
+    """
+    Bounded queue of audit log rows with a background batch writer.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0
+    ):
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue[LogRow] = asyncio.Queue(maxsize=max_queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._writer_task: asyncio.Task | None = None
+
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, row: LogRow) -> bool:
+        """Queues a row for writing. Returns False (and counts a drop) if the queue is full."""
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("LogSink: Queue full, dropped %s row", type(row).__name__)
+            return False
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    def start(self):
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stops the writer once it has written every row queued so far, then writes any row queued meanwhile."""
+        if self._writer_task:
+            # Behind the pending rows; the writer consumes the queue, so this only waits while it is full
+            await self._queue.put(_STOP)
+            await self._writer_task
+            self._writer_task = None
+        while not self._queue.empty():
+            await self._write_batch([row for row in self._take_available(self._batch_size) if row is not _STOP])
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            # Wait for the first row, then collect more until the batch is full or the interval elapsed
+            batch = []
+            row = await self._queue.get()
+            deadline = time.monotonic() + self._flush_interval
+            while True:
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+                if len(batch) >= self._batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._write_batch(batch)
+
+    def _take_available(self, limit: int) -> list[LogRow]:
+        rows = []
+        while len(rows) < limit and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def _write_batch(self, rows: list[LogRow]):
+        if not rows:
+            return
+        for attempt in range(2):
+            try:
+                async with self._session_factory() as session:
+                    await LogRepository(session).insert_logs(rows)
+                    await session.commit()
+                self.written += len(rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt:
+                    self.failed += len(rows)
+                    logger.error("LogSink: Failed to write %s log rows: %s", len(rows), e)
+                else:
+                    logger.warning("LogSink: Writing %s log rows failed, retrying: %s", len(rows), e)
+                    await asyncio.sleep(self._flush_interval)
+
+
+# Global sink shared across requests, created during lifespan startup
+LOG_SINK: LogSink = None
+
+
+async def initialize_log_sink():
+    """Creates and starts the log sink. Requires the database pool to be initialized."""
+    global LOG_SINK
+    LOG_SINK = LogSink(
+        session_factory=get_session_factory(),
+        max_queue_size=app_config.LOG_SINK_QUEUE_SIZE,
+        batch_size=app_config.LOG_SINK_BATCH_SIZE,
+        flush_interval=app_config.LOG_SINK_FLUSH_INTERVAL
+    )
+    LOG_SINK.start()
+
+
+async def close_log_sink():
+    """Drains the queue and stops the writer."""
+    global LOG_SINK
+    if LOG_SINK:
+        await LOG_SINK.close()
+        logger.info("Log sink closed: %s", LOG_SINK.stats())
+        LOG_SINK = None
+
+
+def get_log_sink() -> LogSink:
+    if LOG_SINK is None:
+        raise RuntimeError(
+            "LogSink not initialized. Call initialize_log_sink first.")
+    return LOG_SINK
+
+
+METRICS.gauge(
+    "saphira_log_sink_queue_depth", "Audit log rows waiting to be written.",
+    lambda: get_log_sink().stats()["queue_depth"])
+METRICS.callback_counter(
+    "saphira_log_sink_rows_total", "Audit log rows by outcome.",
+    lambda: {(outcome,): get_log_sink().stats()[outcome] for outcome in ("written", "dropped", "failed")},
+    ("outcome",))
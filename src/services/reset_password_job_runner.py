@@ -0,0 +1,312 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Callable
+from botbuilder.core import TurnContext
+from botbuilder.schema import ConversationReference
+from botframework.connector.auth import ClaimsIdentity
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import app_config
+from src.bots.bot_adapter import get_bot_adapter
+from src.clients.sap.sap_client_factory import get_sap_client_factory
+from src.database.session import get_session_factory
+from src.models.client import Client
+from src.models.reset_password_job import (
+    ResetPasswordJob, JOB_STATUS_DELIVERED, JOB_STATUS_FAILED, JOB_STATUS_UNKNOWN, current_utc_datetime
+)
+from src.repositories.reset_password_job_repository import ResetPasswordJobRepository
+from src.services.log_service import LogService
+from src.services.log_sink import get_log_sink
+from src.services.reset_password_service import ResetPasswordService
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Background runner of the password reset jobs.
+
+The reset turn only inserts a job (with the ConversationReference of the turn) and answers with an acknowledgement,
+so its latency no longer depends on SAP. The runner claims queued jobs (FOR UPDATE SKIP LOCKED, so every app worker
+can run one), calls SAP through ResetPasswordService (single-flight, rate limit and resilience included), and
+delivers the outcome to the conversation with adapter.continue_conversation.
+
+Jobs live in Postgres (public.reset_password_job, see migrations/002_reset_password_job.sql), so a restart does not
+lose them: jobs still queued are picked up by the next worker. The SAP reset is not idempotent, so a job records
+sap_called_at (committed) before calling SAP. A job left running by a stopped worker for more than
+RESET_PASSWORD_JOB_STALE_AFTER seconds is re-queued only if it never got that far (up to
+RESET_PASSWORD_JOB_MAX_ATTEMPTS runs); otherwise it is marked unknown and the user is asked to check before requesting
+a new reset, rather than having their password reset a second time. New jobs wake the runner right away; the table is
+also polled every RESET_PASSWORD_JOB_POLL_INTERVAL seconds for jobs enqueued by other workers.
+"""
+RESET_PASSWORD_JOBS = METRICS.counter(
+    "saphira_reset_password_jobs_total",
+    "Password reset jobs by outcome (enqueued, delivered, failed, requeued, unknown).",
+    ("outcome",)
+)
+
+ResetPasswordServiceFactory = Callable[[], ResetPasswordService]
+
+UNKNOWN_RESULT_TEXT = (
+    "Your SAP password reset was interrupted after it was sent to SAP, so I can't tell whether it went through. "
+    "Please check whether your password was reset before requesting a new reset."
+)
+
+
+class ResetPasswordJobRunner:
+    """
+    Runs up to `concurrency` jobs at a time, each in its own session, outside of any request.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        reset_password_service_factory: ResetPasswordServiceFactory,
+        adapter_getter: Callable,
+        concurrency: int = 4,
+        poll_interval: float = 5.0,
+        stale_after: float = 300.0,
+        max_attempts: int = 3,
+        shutdown_grace: float = 30.0
+    ):
+        self._session_factory = session_factory
+        self._reset_password_service_factory = reset_password_service_factory
+        self._adapter_getter = adapter_getter
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._stale_after = stale_after
+        self._max_attempts = max_attempts
+        self._shutdown_grace = shutdown_grace
+        self._wakeup = asyncio.Event()
+        self._running: set[asyncio.Task] = set()
+        self._runner_task: asyncio.Task | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    async def enqueue(
+        self,
+        user_email: str,
+        session_id: str,
+        client_details: Client | None,
+        turn_context: TurnContext
+    ) -> int:
+        """Persists a job for the turn's user and conversation, wakes the runner and returns the job id."""
+        reference = TurnContext.get_conversation_reference(turn_context.activity)
+        job = ResetPasswordJob(
+            session_id=session_id,
+            email=user_email,
+            client_id=client_details.client_id if client_details else None,
+            conversation_reference=reference.serialize()
+        )
+        async with self._session_factory() as session:
+            await ResetPasswordJobRepository(session).insert_job(job)
+            await session.commit()
+        RESET_PASSWORD_JOBS.inc(outcome="enqueued")
+        self._wakeup.set()
+        logger.info("ResetPasswordJobRunner: Queued job %s for %s", job.id, user_email)
+        return job.id
+
+    def start(self):
+        if self._runner_task is None:
+            self._runner_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stops claiming jobs and waits (up to the grace period) for the running ones; see requeue_stale_jobs."""
+        if self._runner_task:
+            self._runner_task.cancel()
+            try:
+                await self._runner_task
+            except asyncio.CancelledError:
+                pass
+            self._runner_task = None
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=self._shutdown_grace)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(
+                    "ResetPasswordJobRunner: %s jobs cancelled at shutdown, the stale job check re-queues those that "
+                    "did not reach SAP and reports the others as unknown", len(pending))
+
+    async def count_unfinished_jobs(self) -> int:
+        """Jobs still queued or running in any worker."""
+        async with self._session_factory() as session:
+            return await ResetPasswordJobRepository(session).count_unfinished_jobs()
+
+    async def requeue_stale_jobs(self):
+        """
+        Resolves the jobs left running by a stopped worker: re-queued if they never called SAP, otherwise marked
+        unknown and reported to their conversation.
+        """
+        started_before = current_utc_datetime() - timedelta(seconds=self._stale_after)
+        async with self._session_factory() as session:
+            repository = ResetPasswordJobRepository(session)
+            unknown_jobs = await repository.claim_stale_sap_called_jobs(started_before)
+            requeued, failed = await repository.requeue_stale_jobs(started_before, self._max_attempts)
+            await session.commit()
+        if requeued or failed or unknown_jobs:
+            RESET_PASSWORD_JOBS.inc(requeued, outcome="requeued")
+            RESET_PASSWORD_JOBS.inc(failed, outcome="failed")
+            RESET_PASSWORD_JOBS.inc(len(unknown_jobs), outcome=JOB_STATUS_UNKNOWN)
+            logger.warning("ResetPasswordJobRunner: Re-queued %s stale jobs, failed %s, %s with an unknown SAP result",
+                           requeued, failed, len(unknown_jobs))
+        for job in unknown_jobs:
+            try:
+                await self._deliver(job, UNKNOWN_RESULT_TEXT)
+            except Exception as e:
+                logger.error("ResetPasswordJobRunner: Delivering the unknown result of job %s failed: %s", job.id, e)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_stale_check = loop.time()
+        while True:
+            try:
+                if loop.time() >= next_stale_check:
+                    await self.requeue_stale_jobs()
+                    next_stale_check = loop.time() + self._stale_after
+                await self._claim_and_start()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("ResetPasswordJobRunner: Polling failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim_and_start(self):
+        free_slots = self._concurrency - len(self._running)
+        if free_slots <= 0:
+            return
+        async with self._session_factory() as session:
+            jobs = await ResetPasswordJobRepository(session).claim_jobs(free_slots)
+            await session.commit()
+        for job in jobs:
+            task = asyncio.create_task(self._process(job))
+            self._running.add(task)
+            task.add_done_callback(self._job_done)
+
+    def _job_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        # A slot is free again: look for more queued jobs
+        self._wakeup.set()
+
+    async def _process(self, job: ResetPasswordJob):
+        try:
+            # Committed before the call: a job that may have reached SAP is never run again
+            async with self._session_factory() as session:
+                await ResetPasswordJobRepository(session).mark_sap_called(job.id)
+                await session.commit()
+        except Exception as e:
+            logger.error("ResetPasswordJobRunner: Recording the SAP call of job %s failed, job re-queued later: %s",
+                         job.id, e)
+            return
+        try:
+            client_details = Client(client_id=job.client_id) if job.client_id else None
+            result = await self._reset_password_service_factory().initiate_sap_password_reset(
+                user_email=job.email,
+                session_id=job.session_id,
+                client_details=client_details
+            )
+        except Exception as e:
+            logger.exception("ResetPasswordJobRunner: Job %s failed: %s", job.id, e)
+            await self._finish(job, JOB_STATUS_FAILED, error=str(e))
+            return
+
+        result_text = result.get("text", "No text provided")
+        try:
+            await self._deliver(job, f"SAP password reset result: {result_text}")
+        except Exception as e:
+            logger.error("ResetPasswordJobRunner: Delivering job %s failed: %s", job.id, e)
+            await self._finish(job, JOB_STATUS_FAILED, result.get("code"), result_text, error=f"Delivery failed: {e}")
+            return
+        await self._finish(job, JOB_STATUS_DELIVERED, result.get("code"), result_text)
+
+    async def _deliver(self, job: ResetPasswordJob, text: str):
+        """Sends the outcome to the conversation that requested the reset (proactive message)."""
+        reference = ConversationReference().deserialize(job.conversation_reference)
+
+        async def send_result(turn_context: TurnContext):
+            await turn_context.send_activity(text)
+
+        if app_config.MICROSOFT_APP_ID:
+            await self._adapter_getter().continue_conversation(
+                reference, send_result, bot_id=app_config.MICROSOFT_APP_ID)
+        else:
+            # Local runs without an app registration: unauthenticated, like the incoming requests
+            await self._adapter_getter().continue_conversation(
+                reference, send_result, claims_identity=ClaimsIdentity({}, is_authenticated=True))
+
+    async def _finish(
+        self,
+        job: ResetPasswordJob,
+        status: str,
+        result_code: str | None = None,
+        result_text: str | None = None,
+        error: str | None = None
+    ):
+        RESET_PASSWORD_JOBS.inc(outcome=status)
+        try:
+            async with self._session_factory() as session:
+                await ResetPasswordJobRepository(session).finish_job(job.id, status, result_code, result_text, error)
+                await session.commit()
+        except Exception as e:
+            logger.error("ResetPasswordJobRunner: Recording the %s status of job %s failed: %s", status, job.id, e)
+
+
+# Global runner, created during lifespan startup when RESET_PASSWORD_JOBS_ENABLED
+RESET_PASSWORD_JOB_RUNNER: ResetPasswordJobRunner | None = None
+
+
+async def initialize_reset_password_jobs():
+    """
+    Creates and starts the job runner. Requires the database pool, SAP clients, log sink and bot adapter.
+    The runner stays disabled (resets run inside the turn) when the job table is not migrated.
+    """
+    global RESET_PASSWORD_JOB_RUNNER
+    if not app_config.RESET_PASSWORD_JOBS_ENABLED:
+        logger.info("Password reset jobs disabled, resets run inside the turn.")
+        return
+    try:
+        await ResetPasswordJobRepository().check_table()
+    except Exception as e:
+        # Without the table every reset turn would fail its insert and the poller every poll
+        logger.warning("Password reset jobs disabled, resets run inside the turn: public.reset_password_job is not "
+                       "usable (run migrations/002 and 003): %r", e)
+        return
+
+    RESET_PASSWORD_JOB_RUNNER = ResetPasswordJobRunner(
+        session_factory=get_session_factory(),
+        reset_password_service_factory=lambda: ResetPasswordService(
+            sap_client_factory=get_sap_client_factory(),
+            log_service=LogService(log_sink=get_log_sink())
+        ),
+        adapter_getter=get_bot_adapter,
+        concurrency=app_config.RESET_PASSWORD_JOB_CONCURRENCY,
+        poll_interval=app_config.RESET_PASSWORD_JOB_POLL_INTERVAL,
+        stale_after=app_config.RESET_PASSWORD_JOB_STALE_AFTER,
+        max_attempts=app_config.RESET_PASSWORD_JOB_MAX_ATTEMPTS,
+        shutdown_grace=app_config.SAP_TIMEOUT_MAX
+    )
+    RESET_PASSWORD_JOB_RUNNER.start()
+
+
+async def close_reset_password_jobs():
+    """Stops the runner, letting running jobs finish within the grace period."""
+    global RESET_PASSWORD_JOB_RUNNER
+    if RESET_PASSWORD_JOB_RUNNER:
+        await RESET_PASSWORD_JOB_RUNNER.close()
+        RESET_PASSWORD_JOB_RUNNER = None
+
+
+def get_reset_password_job_runner() -> ResetPasswordJobRunner | None:
+    """Returns the runner, or None when password reset jobs are disabled (resets then run inside the turn)."""
+    return RESET_PASSWORD_JOB_RUNNER
+
+
+METRICS.gauge(
+    "saphira_reset_password_jobs_running", "Password reset jobs running in this worker.",
+    lambda: RESET_PASSWORD_JOB_RUNNER.in_flight if RESET_PASSWORD_JOB_RUNNER else 0
+)
@@ -1,10 +1,38 @@
-from sqlmodel.ext.asyncio.session import AsyncSession
+import logging
+from src.config import app_config
 from src.clients.sap.sap_client_interface import SapClientInterface
 from src.clients.sap.sap_client_factory import SapClientFactory
 from src.services.log_service import LogService
 from src.models.log_reset_password import LogResetPassword
 from src.models.client import Client
 from src.clients.sap.amman_sap_client import MSGCD_S, MSGCD_E_SYSTEM
+from src.utils.cache import TTLCache, CACHE_MISS
+from src.utils.metrics import METRICS
+from src.utils.rate_limit import KeyedTokenBucket
+from src.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# App-scoped, keyed by (client_id, lowercased email):
+# - concurrent resets of the same user share one in-flight SAP call (and one log row);
+# - each user may call SAP RESET_PASSWORD_BURST times, then once per RESET_PASSWORD_COOLDOWN seconds;
+#   requests over the limit get the user's last result (kept for one cooldown) without calling SAP.
+RESET_PASSWORD_FLIGHTS = SingleFlight()
+RESET_PASSWORD_RATE_LIMITER = KeyedTokenBucket(
+    capacity=app_config.RESET_PASSWORD_BURST,
+    refill_interval=app_config.RESET_PASSWORD_COOLDOWN,
+    max_keys=app_config.RESET_PASSWORD_MAX_TRACKED_USERS
+)
+RESET_PASSWORD_LAST_RESULTS = TTLCache(
+    max_size=app_config.RESET_PASSWORD_MAX_TRACKED_USERS,
+    ttl=app_config.RESET_PASSWORD_COOLDOWN
+)
+
+RESET_PASSWORD_REQUESTS = METRICS.counter(
+    "saphira_reset_password_requests_total",
+    "Password reset requests by outcome (sap_call, coalesced, rate_limited).",
+    ("outcome",)
+)
 
 
 class ResetPasswordService:
@@ -13,27 +41,62 @@ class ResetPasswordService:
     Orchestrates SAP client interactions and logging.
     """
 
-    def __init__(self, sap_client_factory: SapClientFactory, log_service: LogService):
+    def __init__(
+        self,
+        sap_client_factory: SapClientFactory,
+        log_service: LogService,
+        single_flight: SingleFlight = RESET_PASSWORD_FLIGHTS,
+        rate_limiter: KeyedTokenBucket = RESET_PASSWORD_RATE_LIMITER,
+        last_results: TTLCache = RESET_PASSWORD_LAST_RESULTS
+    ):
         self._sap_client_factory = sap_client_factory
         self._log_service = log_service
+        self._single_flight = single_flight
+        self._rate_limiter = rate_limiter
+        self._last_results = last_results
 
     async def initiate_sap_password_reset(
         self,
         user_email: str,
         session_id: str,
-        client_details: Client | None,
-        session: AsyncSession
+        client_details: Client | None
     ) -> dict[str, any]:
         """
         Initiates the SAP password reset process for the user.
         Selects the correct SAP client based on user's client type.
         Logs the reset request and response.
+        A request joins the reset already running for the same user, and a user over the rate limit gets the
+        result of their last reset without a new SAP call or log row.
         """
-        print(
-            f"--- ResetPasswordService: Initiating SAP password reset for email: {user_email}, session: {session_id} ---")
+        logger.debug("ResetPasswordService: Initiating SAP password reset for email: %s, session: %s", user_email, session_id)
 
         client_id = client_details.client_id if client_details else "UNKNOWN"
+        key = (client_id, user_email.lower())
 
+        if self._single_flight.in_flight(key):
+            RESET_PASSWORD_REQUESTS.inc(outcome="coalesced")
+            logger.info("ResetPasswordService: Joining the reset already in flight for %s", user_email)
+        elif not self._rate_limiter.try_acquire(key):
+            RESET_PASSWORD_REQUESTS.inc(outcome="rate_limited")
+            logger.info("ResetPasswordService: Rate limited reset for %s, returning the last result", user_email)
+            last_result = self._last_results.get(key)
+            if last_result is not CACHE_MISS:
+                return last_result
+            return self._to_result({
+                "status_code": None,
+                "status_message": "Too Many Requests",
+                "message_type": "E",
+                "message_code": MSGCD_E_SYSTEM,
+                "message_text": "A password reset was requested recently. Please wait a moment before trying again."
+            })
+        else:
+            RESET_PASSWORD_REQUESTS.inc(outcome="sap_call")
+
+        return await self._single_flight.do(
+            key, lambda: self._reset_and_log(key, user_email, session_id, client_id))
+
+    async def _reset_and_log(self, key: tuple[str, str], user_email: str, session_id: str, client_id: str) -> dict[str, any]:
+        """Calls SAP once and logs the attempt; the result is shared by every request coalesced into this call."""
         # Select the correct SAP client implementation using the factory
         sap_client: SapClientInterface | None = self._sap_client_factory.get_sap_client(
             client_id)
@@ -41,8 +104,7 @@ class ResetPasswordService:
         sap_response: dict[str, any] = {}
         if sap_client:
             sap_response = await sap_client.reset_password(user_email, session_id)
-            print(
-                f"--- ResetPasswordService: SAP client returned: {sap_response} ---")
+            logger.debug("ResetPasswordService: SAP client returned: %s", sap_response)
         else:
             # Return error response if no client found
             sap_response = {
@@ -64,9 +126,15 @@ class ResetPasswordService:
             message_code=sap_response.get("message_code"),
             message_text=sap_response.get("message_text")
         )
-        await self._log_service.log_reset_password(log_entry, session)
-        print(f"--- ResetPasswordService: Reset Password log inserted ---")
+        await self._log_service.log_reset_password(log_entry)
+        logger.debug("ResetPasswordService: Reset Password log queued")
+
+        result = self._to_result(sap_response)
+        self._last_results.set(key, result)
+        return result
 
+    @staticmethod
+    def _to_result(sap_response: dict[str, any]) -> dict[str, any]:
         # Return a standardized result dictionary based on SAP message code
         # This will be used by the Agno tool to formulate the response
         result_code = sap_response.get("message_code", MSGCD_E_SYSTEM)
@@ -0,0 +1,126 @@
+import logging
+import asyncio
+import time
+from typing import Callable
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import app_config
+from src.database.session import get_session_factory
+from src.repositories.contact_repository import ContactRepository
+from src.repositories.domain_client_repository import DomainClientRepository
+from src.repositories.faq_repository import FaqRepository
+from src.services.contact_service import ContactService
+from src.services.domain_client_service import DomainClientService
+from src.services.faq_service import FaqService
+from src.services.faq_search_index import get_faq_index_registry
+
+logger = logging.getLogger(__name__)
+
+"""
+Startup warm-up: fills the app-scoped caches before the worker reports itself ready.
+
+After the lifespan has created the pools, a background task loads the domain table into the domain client cache and,
+for every registered client, compiles the contact stream matcher and builds the FAQ search index.
+The /ready endpoint answers 503 until the task has finished, so a load balancer only routes to warm workers,
+while /health (liveness) answers immediately. Clients are primed concurrently: their database reads overlap, and the
+matcher and index builds run in worker threads (see ContactService and FaqIndexRegistry), so the event loop keeps
+serving /health meanwhile. A client that fails to prime is logged and fills lazily on first use; a warm-up that
+fails or times out as a whole leaves the worker "degraded" and /ready at 503.
+"""
+
+
+class WarmupState:
+    """Progress of the startup warm-up, reported by the /ready endpoint."""
+
+    def __init__(self):
+        self.ready = False
+        self.failed = False
+        self.started_at: float | None = None
+        self.duration: float | None = None
+        self.clients_primed = 0
+        self.errors: list[str] = []
+
+    def snapshot(self) -> dict[str, any]:
+        return {
+            "status": "ready" if self.ready else "degraded" if self.failed else "warming_up",
+            "duration_seconds": self.duration,
+            "clients_primed": self.clients_primed,
+            "errors": list(self.errors),
+        }
+
+
+class CacheWarmer:
+    """
+    Primes the domain client cache, stream matchers and FAQ indexes, at most `concurrency` clients at a time.
+    Each unit of work runs in its own session, outside of any request.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], state: WarmupState, concurrency: int = 4):
+        self._session_factory = session_factory
+        self._state = state
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm_up(self):
+        async with self._session_factory() as session:
+            client_ids = await DomainClientService(DomainClientRepository(session)).prime_cache()
+        logger.info("Warm-up: Domain client cache primed (%s clients)", len(client_ids))
+        await asyncio.gather(*[self._prime_client(client_id) for client_id in sorted(client_ids)])
+
+    async def _prime_client(self, client_id: str):
+        async with self._semaphore:
+            try:
+                async with self._session_factory() as session:
+                    await ContactService(ContactRepository(session)).get_stream_matcher(client_id)
+                    await FaqService(FaqRepository(session), get_faq_index_registry()).get_faq_index(client_id)
+                self._state.clients_primed += 1
+            except Exception as e:
+                logger.warning("Warm-up: Priming client %s failed: %s", client_id, e)
+                self._state.errors.append(f"{client_id}: {e}")
+
+
+# Global warm-up state and task, created during lifespan startup
+WARMUP_STATE = WarmupState()
+WARMUP_TASK: asyncio.Task | None = None
+
+
+async def _run_warmup():
+    WARMUP_STATE.started_at = time.monotonic()
+    try:
+        warmer = CacheWarmer(get_session_factory(), WARMUP_STATE, concurrency=app_config.WARMUP_CONCURRENCY)
+        await asyncio.wait_for(warmer.warm_up(), timeout=app_config.WARMUP_TIMEOUT)
+        WARMUP_STATE.ready = True
+    except asyncio.TimeoutError:
+        logger.error("Warm-up: Timed out after %ss, worker stays not ready", app_config.WARMUP_TIMEOUT)
+        WARMUP_STATE.errors.append("timeout")
+        WARMUP_STATE.failed = True
+    except Exception as e:
+        logger.exception("Warm-up: Failed, worker stays not ready: %s", e)
+        WARMUP_STATE.errors.append(str(e))
+        WARMUP_STATE.failed = True
+    finally:
+        WARMUP_STATE.duration = time.monotonic() - WARMUP_STATE.started_at
+        logger.info("Warm-up: Finished in %.2fs", WARMUP_STATE.duration)
+
+
+def initialize_warmup():
+    """Starts the background warm-up (or marks the worker ready right away when warm-up is disabled)."""
+    global WARMUP_TASK
+    if not app_config.WARMUP_ENABLED:
+        WARMUP_STATE.ready = True
+        return
+    WARMUP_TASK = asyncio.create_task(_run_warmup())
+
+
+async def close_warmup():
+    """Cancels a warm-up still running at shutdown."""
+    global WARMUP_TASK
+    if WARMUP_TASK and not WARMUP_TASK.done():
+        WARMUP_TASK.cancel()
+        try:
+            await WARMUP_TASK
+        except asyncio.CancelledError:
+            pass
+    WARMUP_TASK = None
+
+
+def get_warmup_state() -> WarmupState:
+    return WARMUP_STATE
@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Returned by TTLCache.get when the key is absent or expired, so a cached None can be told apart from a miss
+CACHE_MISS = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a time-to-live.
+    Values may be None, which is how negative lookups are cached.
+    Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value, or CACHE_MISS if the key is absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return CACHE_MISS
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return CACHE_MISS
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """Stores a value, evicting the least recently used entries beyond max_size."""
+        expires_at = self._clock() + (self._ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """Removes every entry for which predicate(key, value) is true."""
+        for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
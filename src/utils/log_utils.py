@@ -0,0 +1,136 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+
+"""
+Application logging: structured JSON lines written by a background thread.
+
+Callers only pay for building the LogRecord and putting it on an in-memory queue (QueueHandler);
+formatting and writing to stdout happen on the QueueListener thread, so a slow stdout never blocks the event loop.
+Every record carries the correlation ID of the turn being processed (set by the /api/messages route).
+Levels can be set per module and records below WARNING can be sampled per module to cap log volume.
+"""
+CORRELATION_ID: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_STANDARD_RECORD_ATTRIBUTES = set(logging.LogRecord(
+    "", logging.INFO, "", 0, "", None, None).__dict__) | {"message", "asctime", "correlation_id"}
+
+_LOG_LISTENER: logging.handlers.QueueListener | None = None
+
+
+def set_correlation_id(correlation_id: str | None) -> Token:
+    return CORRELATION_ID.set(correlation_id)
+
+
+def reset_correlation_id(token: Token):
+    CORRELATION_ID.reset(token)
+
+
+def get_correlation_id() -> str | None:
+    return CORRELATION_ID.get()
+
+
+def parse_module_settings(value: str | None) -> dict[str, str]:
+    """Parses "module=value,module=value" settings, e.g. "src.database=WARNING,src.bots=DEBUG"."""
+    settings = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            module, setting = item.split("=", 1)
+            settings[module.strip()] = setting.strip()
+    return settings
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamps the current correlation ID on the record (runs in the logging thread of the caller)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = CORRELATION_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records below WARNING for the configured modules.
+    The most specific module prefix wins; warnings and errors are never sampled out.
+    """
+
+    def __init__(self, sample_rates: dict[str, float]):
+        super().__init__()
+        # Longest prefix first so the most specific module setting is found first
+        self._sample_rates = sorted(sample_rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self._sample_rates:
+            return True
+        for module, rate in self._sample_rates:
+            if record.name == module or record.name.startswith(module + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(
+    level: str = "INFO",
+    module_levels: str | None = None,
+    sample_rates: str | None = None,
+    json_format: bool = True
+):
+    """
+    Configures the root logger with a queue handler and starts the background writer thread.
+    Safe to call more than once; only the first call installs the handlers.
+    """
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JsonFormatter() if json_format
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+    queue_handler.addFilter(SamplingFilter(
+        {module: float(rate) for module, rate in parse_module_settings(sample_rates).items()}))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(level.upper())
+    for module, module_level in parse_module_settings(module_levels).items():
+        logging.getLogger(module).setLevel(module_level.upper())
+
+    _LOG_LISTENER = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _LOG_LISTENER.start()
+
+
+def shutdown_logging():
+    """Writes the remaining queued records and stops the writer thread."""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        _LOG_LISTENER = None
@@ -0,0 +1,241 @@
+import bisect
+import math
+from typing import Callable, Iterable
+
+"""
+In-process metrics with Prometheus text exposition (served at /metrics).
+
+Counters and histograms are labeled metric families; each label combination holds its own series.
+Gauges read their value from a callback at scrape time (pool sizes, queue depths), so they cost nothing per request.
+All metrics are updated from the event loop only and are local to the worker process (scrape every worker).
+"""
+
+# Default latency buckets in seconds
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of observed values (e.g. durations in seconds).
+    Cheap enough to be updated on every request from the event loop.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        # One counter per bucket plus the +Inf bucket
+        self._counts = [0] * (len(self._buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, any]:
+        """Returns cumulative bucket counts (Prometheus 'le' semantics), sum and count."""
+        cumulative = 0
+        buckets = {}
+        for upper_bound, count in zip(self._buckets + (float("inf"),), self._counts):
+            cumulative += count
+            buckets["+Inf" if upper_bound == float("inf") else str(upper_bound)] = cumulative
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+def _format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for name, value in zip(label_names, label_values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _MetricFamily:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _label_values(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class CounterMetric(_MetricFamily):
+    """Monotonic counter per label combination."""
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class HistogramMetric(_MetricFamily):
+    """Histogram per label combination."""
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self._buckets = buckets
+        self._histograms: dict[tuple[str, ...], Histogram] = {}
+
+    def labels(self, **labels: str) -> Histogram:
+        key = self._label_values(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(self._buckets)
+            self._histograms[key] = histogram
+        return histogram
+
+    def observe(self, value: float, **labels: str):
+        self.labels(**labels).observe(value)
+
+    def snapshot(self, **labels: str) -> dict[str, any]:
+        return self.labels(**labels).snapshot()
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for label_values, histogram in sorted(self._histograms.items()):
+            snapshot = histogram.snapshot()
+            for upper_bound, count in snapshot["buckets"].items():
+                labels = _format_labels(self.label_names, label_values, f'le="{upper_bound}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class GaugeMetric(_MetricFamily):
+    """
+    Gauge whose values are read from a callback when the metrics are rendered.
+    The callback returns {label values tuple: value}, or a plain number for an unlabeled gauge.
+    Also used for counters kept by another component (metric_type="counter").
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple[str, ...], float] | float],
+        label_names: Iterable[str] = (),
+        metric_type: str = "gauge"
+    ):
+        super().__init__(name, documentation, label_names)
+        self._callback = callback
+        self.metric_type = metric_type
+
+    def render(self) -> list[str]:
+        try:
+            values = self._callback()
+        except RuntimeError:
+            # The component is not initialized (yet), nothing to report
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = super().render()
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the metric families of the process; registering an existing name returns the existing family."""
+
+    def __init__(self):
+        self._metrics: dict[str, _MetricFamily] = {}
+
+    def _register(self, metric: _MetricFamily) -> _MetricFamily:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                raise ValueError(f"Metric {metric.name} already registered with another type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> CounterMetric:
+        return self._register(CounterMetric(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    ) -> HistogramMetric:
+        return self._register(HistogramMetric(name, documentation, label_names, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple[str, ...], float] | float],
+        label_names: Iterable[str] = ()
+    ) -> GaugeMetric:
+        """Registers (or replaces the callback of) a callback gauge."""
+        gauge = GaugeMetric(name, documentation, callback, label_names)
+        self._metrics[name] = gauge
+        return gauge
+
+    def callback_counter(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple[str, ...], float] | float],
+        label_names: Iterable[str] = ()
+    ) -> GaugeMetric:
+        """Registers (or replaces the callback of) a counter whose values are kept by another component."""
+        counter = GaugeMetric(name, documentation, callback, label_names, metric_type="counter")
+        self._metrics[name] = counter
+        return counter
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry shared by the whole process
+METRICS = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return METRICS
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class KeyedTokenBucket:
+    """
+    One token bucket per key (e.g. per user), holding up to `capacity` tokens and refilling one token every
+    `refill_interval` seconds. With capacity 1 it is a plain cooldown between two calls.
+    Only the `max_keys` most recently used keys are tracked; a forgotten key starts again with a full bucket.
+    A refill_interval of 0 disables the limit. Not thread-safe; meant to be used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        refill_interval: float,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._capacity = max(capacity, 1)
+        self._refill_interval = refill_interval
+        self._max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens, time of the last update)
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def try_acquire(self, key: Hashable) -> bool:
+        """Takes a token from the key's bucket. Returns False (taking nothing) if the bucket is empty."""
+        if self._refill_interval <= 0:
+            return True
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key, (self._capacity, now))
+        tokens = min(self._capacity, tokens + (now - updated_at) / self._refill_interval)
+        acquired = tokens >= 1
+        self._buckets[key] = (tokens - 1 if acquired else tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return acquired
+
+    def reset(self, key: Hashable):
+        self._buckets.pop(key, None)
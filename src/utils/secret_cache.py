@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import tempfile
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = logging.getLogger(__name__)
+
+"""
+Encrypted on-disk cache of the Key Vault secrets, shared by the workers of a host and kept across restarts.
+
+The file is a Fernet token (AES-128-CBC + HMAC) of the secrets as JSON. Fernet tokens carry their creation time,
+so freshness is checked with the token TTL and a tampered, expired or foreign file is simply treated as a miss.
+The key is never stored next to the file; it comes from the environment (SECRET_CACHE_KEY).
+"""
+
+
+class SecretCache:
+    """Reads and atomically writes the encrypted secret cache file."""
+
+    def __init__(self, path: str, key: str | bytes, ttl: float):
+        self._path = path
+        self._fernet = Fernet(key)
+        self._ttl = ttl
+
+    def load(self, fingerprint: str) -> dict[str, str] | None:
+        """
+        Returns the cached secrets if the file exists, decrypts, is younger than the TTL
+        and was written for the same vault and secret names (fingerprint). Returns None otherwise.
+        """
+        try:
+            with open(self._path, "rb") as cache_file:
+                token = cache_file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("SecretCache: Cannot read %s: %s", self._path, e)
+            return None
+
+        try:
+            payload = json.loads(self._fernet.decrypt(token, ttl=int(self._ttl)))
+        except InvalidToken:
+            # Expired, written with another key, or corrupted
+            return None
+        except ValueError as e:
+            logger.warning("SecretCache: Invalid cache content in %s: %s", self._path, e)
+            return None
+
+        if payload.get("fingerprint") != fingerprint:
+            return None
+        return payload.get("secrets")
+
+    def save(self, fingerprint: str, secrets: dict[str, str]):
+        """Encrypts and writes the secrets, readable by the owner only. Readers never see a partial file."""
+        token = self._fernet.encrypt(json.dumps({"fingerprint": fingerprint, "secrets": secrets}).encode("utf-8"))
+        directory = os.path.dirname(os.path.abspath(self._path))
+        os.makedirs(directory, exist_ok=True)
+
+        # mkstemp creates the file with 0600 permissions; os.replace swaps it in atomically
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".secret-cache-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(token)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self._path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
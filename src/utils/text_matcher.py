@@ -0,0 +1,124 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+"""
+Multi-keyword matching over free text with an Aho-Corasick automaton.
+
+The automaton is compiled once from the keyword vocabulary; matching then walks the text a single time,
+whatever the number of keywords, and reports every occurrence with its position.
+Matching is case-insensitive and, by default, only whole words match (so "FI" is not found inside "FIle").
+"""
+
+
+@dataclass(frozen=True)
+class TextMatch:
+    start: int
+    end: int
+    keyword: str
+    value: Any
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+class AhoCorasickMatcher:
+    """
+    Compiled, immutable multi-keyword matcher.
+    Each keyword is mapped to a value (e.g. the stream it names), returned with every match of the keyword.
+    """
+
+    def __init__(self, keywords: Iterable[tuple[str, Any]], whole_words: bool = True):
+        self._whole_words = whole_words
+        # Trie as parallel lists: goto transitions, failure links and the keywords ending at each node
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # (keyword, value, length of the lowercased keyword)
+        self._outputs: list[list[tuple[str, Any, int]]] = [[]]
+
+        seen = set()
+        for keyword, value in keywords:
+            normalized = keyword.strip().lower() if keyword else ""
+            # The first value registered for a keyword wins
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            node = 0
+            for char in normalized:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                node = next_node
+            self._outputs[node].append((keyword.strip(), value, len(normalized)))
+        self._keyword_count = len(seen)
+
+        # Breadth-first pass to set the failure links and merge the outputs of the failure targets
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def __len__(self) -> int:
+        return self._keyword_count
+
+    def find_all(self, text: str | None) -> list[TextMatch]:
+        """
+        Returns every keyword occurrence in the text, ordered by end position (one pass over the text).
+        Positions index the original text, also when lowercasing changes the length of a character (e.g. "İ").
+        """
+        if not text or self._keyword_count == 0:
+            return []
+        lowered = text.lower()
+        # Original index of every lowercased character; None when lowercasing kept every character's length
+        origins = None
+        if len(lowered) != len(text):
+            origins = [index for index, char in enumerate(text) for _ in char.lower()]
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        node = 0
+        for index, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not outputs[node]:
+                continue
+            end = index + 1
+            for _, value, length in outputs[node]:
+                start = end - length
+                if origins is None:
+                    match_start, match_end = start, end
+                elif (start and origins[start - 1] == origins[start]) or (
+                        end < len(origins) and origins[end] == origins[end - 1]):
+                    # Part of a character that lowercases to several: not a match of the original text
+                    continue
+                else:
+                    match_start, match_end = origins[start], origins[end - 1] + 1
+                if self._whole_words and not self._is_whole_word(text, match_start, match_end):
+                    continue
+                matches.append(TextMatch(
+                    start=match_start, end=match_end, keyword=text[match_start:match_end], value=value))
+        return matches
+
+    def find_longest(self, text: str | None) -> TextMatch | None:
+        """Returns the longest keyword occurrence in the text (the earliest one on ties), or None."""
+        best = None
+        for match in self.find_all(text):
+            if best is None or match.length > best.length or (match.length == best.length and match.start < best.start):
+                best = match
+        return best
+
+    @staticmethod
+    def _is_whole_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
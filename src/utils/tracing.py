@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+from uuid import uuid4
+import httpx
+from src.utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+"""
+Per-turn tracing: nested timing spans for middleware stages, intent handlers, state access, SQL statements and
+outbound HTTP calls.
+
+Every span is aggregated into the Prometheus metrics served at /metrics:
+- saphira_span_duration_seconds{kind,name}: wall time of the span, children included;
+- saphira_span_self_seconds_total{kind,name}: time not spent in child spans, to attribute a turn's latency;
+- saphira_span_errors_total{kind,name}: spans that ended with an exception.
+
+The /api/messages route opens the root span of the turn (kind "turn"). Spans opened while it is running become its
+children through a context variable, which also follows SQLAlchemy's greenlets into the cursor events.
+Optionally, the spans of a sampled fraction of the turns are exported in batches as Zipkin v2 JSON to a local
+collector (Zipkin, Jaeger or an OpenTelemetry collector with a zipkin receiver), from a background task that drops
+spans rather than slowing down turns when the collector cannot keep up.
+"""
+SPAN_DURATION = METRICS.histogram(
+    "saphira_span_duration_seconds", "Duration of traced stages, children included.", ("kind", "name"))
+SPAN_SELF_SECONDS = METRICS.counter(
+    "saphira_span_self_seconds_total", "Time spent in traced stages outside their child spans.", ("kind", "name"))
+SPAN_ERRORS = METRICS.counter(
+    "saphira_span_errors_total", "Traced stages that ended with an exception.", ("kind", "name"))
+
+# Span kinds exported as calls to another service
+_CLIENT_KINDS = {"sql", "http"}
+
+_SQL_VERB = re.compile(r"^\s*(\w+)")
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+@dataclass
+class Trace:
+    """Spans of one sampled turn, collected for export."""
+    trace_id: str
+    spans: list["Span"] = field(default_factory=list)
+
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    span_id: str
+    parent: "Span | None"
+    trace: Trace | None
+    start_time: float
+    started: float
+    attributes: dict[str, any] = field(default_factory=dict)
+    duration: float = 0.0
+    children_seconds: float = 0.0
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: any):
+        self.attributes[key] = value
+
+
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def get_current_span() -> Span | None:
+    return _CURRENT_SPAN.get()
+
+
+def _new_span(kind: str, name: str, attributes: dict[str, any], started: float | None = None) -> Span:
+    parent = _CURRENT_SPAN.get()
+    now = time.perf_counter()
+    started = now if started is None else started
+    return Span(
+        kind=kind,
+        name=name,
+        span_id=uuid4().hex[:16],
+        parent=parent,
+        trace=parent.trace if parent else None,
+        # Wall clock start, for the exported timestamp
+        start_time=time.time() - (now - started),
+        started=started,
+        attributes=attributes
+    )
+
+
+def _finish_span(span: Span, finished: float | None = None):
+    span.duration = (time.perf_counter() if finished is None else finished) - span.started
+    SPAN_DURATION.observe(span.duration, kind=span.kind, name=span.name)
+    # Concurrent children can add up to more than the parent's duration
+    SPAN_SELF_SECONDS.inc(max(span.duration - span.children_seconds, 0.0), kind=span.kind, name=span.name)
+    if span.error is not None:
+        SPAN_ERRORS.inc(kind=span.kind, name=span.name)
+    if span.parent is not None:
+        span.parent.children_seconds += span.duration
+    if span.trace is not None:
+        span.trace.spans.append(span)
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: any) -> Iterator[Span]:
+    """
+    Times the enclosed block as a child of the current span. Works in sync and async code alike.
+    `name` becomes a metric label: keep it to a small set of values (no ids, emails or free text).
+    """
+    current = _new_span(kind, name, attributes)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        _finish_span(current)
+
+
+@contextmanager
+def start_trace(kind: str, name: str, **attributes: any) -> Iterator[Span]:
+    """Opens the root span of a turn; its spans are exported when tracing is enabled and the turn is sampled."""
+    exporter = SPAN_EXPORTER
+    trace = None
+    if exporter is not None and random.random() < exporter.sample_rate:
+        trace = Trace(trace_id=uuid4().hex)
+    with span(kind, name, **attributes) as root:
+        # A root span never has a parent, even when a trace is started inside another one
+        root.parent = None
+        root.trace = trace
+        try:
+            yield root
+        finally:
+            if trace is not None:
+                # The root span finishes after this block, so it is added by hand
+                exporter.submit(trace, root)
+
+
+def record_span(kind: str, name: str, started: float, finished: float, error: str | None = None, **attributes: any):
+    """Records an already finished span (perf_counter timestamps), for callbacks that cannot wrap a block."""
+    finished_span = _new_span(kind, name, attributes, started=started)
+    finished_span.error = error
+    _finish_span(finished_span, finished)
+
+
+def sql_span_name(statement: str) -> str:
+    """Low-cardinality name of a SQL statement: its verb and first table, e.g. "SELECT public.contact"."""
+    verb = _SQL_VERB.match(statement)
+    table = _SQL_TABLE.search(statement)
+    name = verb.group(1).upper() if verb else "SQL"
+    return f"{name} {table.group(1).replace(chr(34), '')}" if table else name
+
+
+class SpanExporter:
+    """
+    Bounded queue of finished traces with a background task posting them to a Zipkin v2 endpoint in batches.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        service_name: str = "saphira",
+        sample_rate: float = 1.0,
+        max_queue_size: int = 1000,
+        flush_interval: float = 2.0,
+        timeout: float = 5.0
+    ):
+        self.url = url
+        self.service_name = service_name
+        self.sample_rate = sample_rate
+        self._queue: asyncio.Queue[list[dict[str, any]]] = asyncio.Queue(maxsize=max_queue_size)
+        self._flush_interval = flush_interval
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._exporter_task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+
+    def submit(self, trace: Trace, root: Span):
+        """Queues the spans of a finished trace. Drops (and counts) them if the queue is full."""
+        # The root span is still open here: close it at the current time for the export
+        root_duration = time.perf_counter() - root.started
+        spans = [self._to_zipkin(trace, item) for item in trace.spans]
+        spans.append(self._to_zipkin(trace, root, root_duration))
+        try:
+            self._queue.put_nowait(spans)
+        except asyncio.QueueFull:
+            self.dropped += len(spans)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "failed": self.failed,
+        }
+
+    def start(self):
+        if self._exporter_task is None:
+            self._exporter_task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """
+        Stops the exporter once its running export has finished (it is not cancelled mid-POST, which would lose the
+        spans it took), sends what is still queued (best effort) and closes the HTTP client.
+        """
+        if self._exporter_task:
+            self._stopping.set()
+            await self._exporter_task
+            self._exporter_task = None
+        await self._export(self._take_available())
+        await self._client.aclose()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._export(self._take_available())
+
+    def _take_available(self) -> list[dict[str, any]]:
+        spans = []
+        while not self._queue.empty():
+            spans.extend(self._queue.get_nowait())
+        return spans
+
+    async def _export(self, spans: list[dict[str, any]]):
+        if not spans:
+            return
+        try:
+            response = await self._client.post(self.url, json=spans)
+            response.raise_for_status()
+            self.exported += len(spans)
+        except Exception as e:
+            self.failed += len(spans)
+            logger.warning("SpanExporter: Failed to export %s spans: %s", len(spans), e)
+
+    def _to_zipkin(self, trace: Trace, item: Span, duration: float | None = None) -> dict[str, any]:
+        tags = {key: str(value) for key, value in item.attributes.items()}
+        tags["kind"] = item.kind
+        if item.error is not None:
+            tags["error"] = item.error
+        zipkin_span = {
+            "traceId": trace.trace_id,
+            "id": item.span_id,
+            "name": item.name,
+            "timestamp": int(item.start_time * 1_000_000),
+            "duration": max(int((item.duration if duration is None else duration) * 1_000_000), 1),
+            "localEndpoint": {"serviceName": self.service_name},
+            "tags": tags,
+        }
+        if item.parent is not None:
+            zipkin_span["parentId"] = item.parent.span_id
+        if item.kind in _CLIENT_KINDS:
+            zipkin_span["kind"] = "CLIENT"
+        return zipkin_span
+
+
+# Global exporter, only created when a collector URL is configured
+SPAN_EXPORTER: SpanExporter | None = None
+
+
+async def initialize_tracing(url: str | None, service_name: str, sample_rate: float):
+    """Starts the span exporter when a collector URL is set; metrics are recorded either way."""
+    global SPAN_EXPORTER
+    if not url:
+        logger.info("Span export disabled (TRACE_EXPORT_URL not set).")
+        return
+    SPAN_EXPORTER = SpanExporter(url, service_name=service_name, sample_rate=sample_rate)
+    SPAN_EXPORTER.start()
+    logger.info("Exporting %s of the turn traces to %s", sample_rate, url)
+
+
+async def close_tracing():
+    """Flushes the queued spans and stops the exporter."""
+    global SPAN_EXPORTER
+    if SPAN_EXPORTER:
+        exporter = SPAN_EXPORTER
+        SPAN_EXPORTER = None
+        await exporter.close()
+        logger.info("Span exporter closed: %s", exporter.stats())